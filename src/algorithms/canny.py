@@ -1,34 +1,86 @@
 from PIL import Image
 import numpy as np
-from .convolution import generate_gauss_kernel, convolve_native, convolution_kernels
+from scipy.ndimage import label
+from scipy.signal import convolve2d
+from .convolution import generate_gauss_kernel, separate_kernel
 
 np.seterr(divide='ignore', invalid='ignore', over='ignore')
 name: str = "Canny Edge Detection"
+# Convolution engines the smoothing and gradient phases run on
+canny_sub_types: list[str] = ["native convolution", "SciPy convolution"]
+
+
+def _smooth(image_array: np.ndarray, kernel: list[list[float]], engine: str) -> np.ndarray:
+    """
+    Smooths the given grayscale array with the given gaussian kernel, keeping float32 values.
+    The native engine accumulates shifted views with clamp-to-edge borders, as the native convolution does, while
+    the SciPy engine convolves with symmetric borders, as the SciPy convolution does. Gaussian kernels are
+    separable, so both apply them as two 1-D passes.
+    :param image_array: The float32 grayscale array.
+    :param kernel: The gaussian kernel.
+    :param engine: One of the canny sub types.
+    :return: The smoothed float32 array.
+    """
+    column_vector, row_vector = separate_kernel(kernel)
+    if engine == canny_sub_types[1]:
+        column_array = convolve2d(image_array, column_vector[:, np.newaxis], mode='same', boundary='symm')
+        return convolve2d(column_array, row_vector[np.newaxis, :], mode='same', boundary='symm').astype(np.float32)
+    elif engine != canny_sub_types[0]:
+        raise ValueError(f"Invalid canny sub type: {engine}")
+    image_height, image_width = image_array.shape
+    padding: int = int(len(kernel) / 2)
+    padded_array = np.pad(image_array, ((padding, padding), (0, 0)), mode="edge")
+    column_array = np.zeros_like(image_array)
+    for ky, weight in enumerate(column_vector.astype(np.float32)):
+        column_array += padded_array[ky:ky + image_height, :] * weight
+    padded_array = np.pad(column_array, ((0, 0), (padding, padding)), mode="edge")
+    smoothed_array = np.zeros_like(image_array)
+    for kx, weight in enumerate(row_vector.astype(np.float32)):
+        smoothed_array += padded_array[:, kx:kx + image_width] * weight
+    return smoothed_array
+
+
+def _sobel_gradients(image_array: np.ndarray, engine: str) -> tuple[np.ndarray, np.ndarray]:
+    """
+    Computes both Sobel gradients in a single pass: the [1, 2, 1] smoothing and the [-1, 0, 1] difference of the
+    rows are shared by the two separable kernels. Negative responses are kept.
+    :param image_array: The float32 smoothed array.
+    :param engine: One of the canny sub types, which picks the border handling.
+    :return: The horizontal and vertical float32 gradients.
+    """
+    padded_array = np.pad(image_array, 1, mode="symmetric" if engine == canny_sub_types[1] else "edge")
+    row_smoothed = padded_array[:, :-2] + 2 * padded_array[:, 1:-1] + padded_array[:, 2:]
+    row_difference = padded_array[:, 2:] - padded_array[:, :-2]
+    gradient_x = row_difference[:-2] + 2 * row_difference[1:-1] + row_difference[2:]
+    gradient_y = row_smoothed[2:] - row_smoothed[:-2]
+    return gradient_x, gradient_y
 
 
 def _non_maximal_supress(gradient_magnitude: np.ndarray, gradient_direction: np.ndarray) -> np.ndarray:
     """
-    Suppresses the non-maximal values in the given gradient magnitude array.
+    Suppresses the non-maximal values in the given gradient magnitude array: a pixel is kept when it is not lower
+    than its two neighbors along the gradient direction, quantized to 0, 45, 90 or 135 degrees.
     :param gradient_magnitude: The gradient magnitude array.
     :param gradient_direction: The gradient direction array.
     :return: The suppressed gradient magnitude array.
     """
     suppressed_magnitude = np.zeros_like(gradient_magnitude)
-    angles = np.rad2deg(gradient_direction)
+    angles = np.rad2deg(gradient_direction[1:-1, 1:-1])
     angles[angles < 0] += 180
-    for i in range(1, gradient_magnitude.shape[0] - 1):
-        for j in range(1, gradient_magnitude.shape[1] - 1):
-            direction = angles[i, j]
-            if (0 <= direction < 22.5) or (157.5 <= direction <= 180):  # 0 degrees
-                neighbors = [gradient_magnitude[i, j - 1], gradient_magnitude[i, j + 1]]
-            elif 22.5 <= direction < 67.5:  # 45 degrees
-                neighbors = [gradient_magnitude[i - 1, j - 1], gradient_magnitude[i + 1, j + 1]]
-            elif 67.5 <= direction < 112.5:  # 90 degrees
-                neighbors = [gradient_magnitude[i - 1, j], gradient_magnitude[i + 1, j]]
-            else:  # 135 degrees
-                neighbors = [gradient_magnitude[i - 1, j + 1], gradient_magnitude[i + 1, j - 1]]
-            if gradient_magnitude[i, j] >= max(neighbors):
-                suppressed_magnitude[i, j] = gradient_magnitude[i, j]
+    # The direction is binned once, each bin compares the pixel with the two neighbors across the edge
+    horizontal = ((0 <= angles) & (angles < 22.5)) | ((157.5 <= angles) & (angles <= 180))  # 0 degrees
+    diagonal = (22.5 <= angles) & (angles < 67.5)  # 45 degrees
+    vertical = (67.5 <= angles) & (angles < 112.5)  # 90 degrees
+    magnitude = gradient_magnitude
+    neighbors = np.select(
+        [horizontal, diagonal, vertical],
+        [np.maximum(magnitude[1:-1, :-2], magnitude[1:-1, 2:]),
+         np.maximum(magnitude[:-2, :-2], magnitude[2:, 2:]),
+         np.maximum(magnitude[:-2, 1:-1], magnitude[2:, 1:-1])],
+        np.maximum(magnitude[:-2, 2:], magnitude[2:, :-2]))  # 135 degrees
+    center = magnitude[1:-1, 1:-1]
+    # The border pixels have not all their neighbors and are left suppressed
+    suppressed_magnitude[1:-1, 1:-1] = np.where(center >= neighbors, center, 0)
     return suppressed_magnitude
 
 
@@ -48,44 +100,70 @@ def _double_threshold(image_array: np.ndarray, low_threshold: int, high_threshol
 
 def _link_edges(image_array: np.ndarray) -> np.ndarray:
     """
-    Links the edges of the given image array
+    Links the edges of the given image array with hysteresis: the weak edges are kept only when their 8-connected
+    component of weak and strong edges holds at least one strong edge, however long the chain leading to it.
     :param image_array: The image array.
-    :return: Tge image array with the edges linked.
+    :return: The image array with the edges linked.
+    """
+    components, _ = label(image_array > 0, structure=np.ones((3, 3), dtype=bool))
+    # A component is kept when any of its pixels is strong, component 0 being the background
+    kept_components = np.zeros(components.max() + 1, dtype=bool)
+    kept_components[components[image_array == 255]] = True
+    kept_components[0] = False
+    return np.where(kept_components[components], 255, 0).astype(image_array.dtype)
+
+
+def link_edge_map(edge_map: Image.Image) -> Image.Image:
+    """
+    Links the edges of a whole double threshold map, made of tiles that stopped before the edge linking.
+    Hysteresis follows chains of weak edges of any length, across any tile border, so it runs once on the merged map.
+    :param edge_map: The double threshold map, 0, 127 for weak and 255 for strong edges.
+    :return: The edges image.
+    """
+    return Image.fromarray(_link_edges(np.asarray(edge_map.convert("L"))))
+
+
+def canny_halo(gauss_size: int) -> int:
+    """
+    Returns how many pixels around a tile the canny pipeline reads: the gaussian radius, the sobel radius, the
+    non-maximal suppression neighbors and the edge linking neighbors.
+    Hysteresis follows chains of weak edges of any length, so a chain that leaves the tile halo may still link
+    differently than in a whole-image run, unless the tiles stop at the double threshold map and link_edge_map runs
+    on the merged map.
+    :param gauss_size: The size of the gaussian kernel.
+    :return: The halo width in pixels.
     """
-    for i in range(1, image_array.shape[0] - 1):
-        for j in range(1, image_array.shape[1] - 1):
-            if image_array[i, j] == 127:
-                if np.max(image_array[i - 1:i + 2, j - 1:j + 2]) == 255:
-                    image_array[i, j] = 255
-                else:
-                    image_array[i, j] = 0
-    return image_array
+    return int(gauss_size / 2) + 3
 
 
 def canny_edge_detector(target_image: Image.Image, gauss_size: int, sigma: int, low_threshold: int,
-                        high_threshold: int) -> Image.Image:
+                        high_threshold: int, engine: str = canny_sub_types[0], link: bool = True) -> Image.Image:
     """
-    Applies the canny edge detection algorithm to the given image.
+    Applies the canny edge detection algorithm to the given image. The whole pipeline works on float32 arrays, from
+    the grayscale conversion to the thresholding.
     :param target_image: The image to apply the canny algorithm to.
     :param gauss_size: The size of the gaussian kernel.
     :param sigma: The sigma value for the gaussian kernel.
     :param low_threshold: The low threshold for the double thresholding.
     :param high_threshold: The high threshold for the double thresholding.
+    :param engine: One of the canny sub types, the convolution engine of the smoothing and gradient phases.
+    :param link: Whether to link the edges, or to stop at the double threshold map of a tile, linked once merged.
     :return: The image with the canny algorithm applied.
     """
-    target_image = target_image.convert("L")
+    image_array = np.asarray(target_image.convert("L"), dtype=np.float32)
     # Phase 1 Smoothing applying gaussian kernel
     gauss_kernel = generate_gauss_kernel(gauss_size, sigma)
-    gauss_image = convolve_native(target_image, gauss_kernel)
+    gauss_array = _smooth(image_array, gauss_kernel, engine)
     # Phase 2 Finding the gradients
-    sobel_x_array = np.array(convolve_native(gauss_image, convolution_kernels["edge_detection (sobel-x)"], True))
-    sobel_y_array = np.array(convolve_native(gauss_image, convolution_kernels["edge_detection (sobel-y)"], True))
+    sobel_x_array, sobel_y_array = _sobel_gradients(gauss_array, engine)
     gradient_magnitude = np.hypot(sobel_x_array, sobel_y_array)
     gradient_direction = np.arctan2(sobel_y_array, sobel_x_array)
     # Phase 3 Non-maximal supression
     supressed = _non_maximal_supress(gradient_magnitude, gradient_direction)
     # Phase 4 Double thresholding
     thresholded = _double_threshold(supressed, low_threshold, high_threshold)
+    if not link:
+        return Image.fromarray(thresholded.astype(np.uint8))
     # Phase 5 Edge tracking by linking edges
     result_array = _link_edges(thresholded)
     return Image.fromarray(result_array.astype(np.uint8))
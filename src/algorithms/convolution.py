@@ -1,5 +1,7 @@
+import math
+import time
 from PIL import Image
-from scipy.signal import convolve2d
+from scipy.signal import convolve2d, oaconvolve
 import numpy as np
 
 
@@ -16,8 +18,83 @@ def generate_gauss_kernel(kernel_size: int, sigma: int) -> list[list[float]]:
     return (kernel / np.sum(kernel)).tolist()
 
 
+def separate_kernel(kernel: list[list[float]], tolerance: float = 1e-9) -> tuple[np.ndarray, np.ndarray] | None:
+    """
+    Factors the given kernel into a column and a row vector whose outer product is the kernel.
+    The rank is checked through the singular values, while the factors are taken from the kernel itself so that
+    integer kernels (Sobel, Prewitt) keep exact factors.
+    :param kernel: The kernel to factor.
+    :param tolerance: The maximum ratio between the second and the first singular value of a separable kernel.
+    :return: The (column, row) vectors, or None if the kernel is not separable.
+    """
+    kernel_array = np.asarray(kernel, dtype=np.float64)
+    singular_values = np.linalg.svd(kernel_array, compute_uv=False)
+    if singular_values[0] == 0 or np.any(singular_values[1:] > tolerance * singular_values[0]):
+        return None
+    pivot_row, pivot_column = np.unravel_index(np.argmax(np.abs(kernel_array)), kernel_array.shape)
+    row_vector = kernel_array[pivot_row, :]
+    column_vector = kernel_array[:, pivot_column] / kernel_array[pivot_row, pivot_column]
+    return column_vector, row_vector
+
+
+def box_kernel_value(kernel: list[list[float]]) -> float | None:
+    """
+    Returns the common value of a box kernel, whose taps are all equal, such as the low-pass blur.
+    :param kernel: The kernel to check.
+    :return: The value of every tap, or None if the kernel is not a non-zero box.
+    """
+    kernel_array = np.asarray(kernel, dtype=np.float64)
+    if kernel_array[0, 0] == 0 or np.any(kernel_array != kernel_array[0, 0]):
+        return None
+    return float(kernel_array[0, 0])
+
+
+def integral_box_sum(image_array: np.ndarray, window_height: int, window_width: int,
+                     mode: str = "edge") -> np.ndarray:
+    """
+    Sums every window of the given size centered on each pixel through a summed-area table: each sum costs four
+    lookups, whatever the window size. Integer arrays are summed exactly.
+    :param image_array: The grayscale or RGB image array.
+    :param window_height: The height of the window.
+    :param window_width: The width of the window.
+    :param mode: The np.pad mode of the borders, "edge" to clamp or "symmetric" to mirror.
+    :return: The window sums, int64 for integer arrays and float64 otherwise.
+    """
+    image_height, image_width = image_array.shape[:2]
+    pad_rows: tuple[int, int] = (int(window_height / 2), window_height - 1 - int(window_height / 2))
+    pad_columns: tuple[int, int] = (int(window_width / 2), window_width - 1 - int(window_width / 2))
+    padded_array = np.pad(image_array, _pad_width(pad_rows, pad_columns, image_array.ndim == 2), mode=mode)
+    # The table has a leading row and column of zeros, so that table[y, x] is the sum of padded[:y, :x]
+    summed_type = np.int64 if np.issubdtype(image_array.dtype, np.integer) else np.float64
+    table = np.zeros((padded_array.shape[0] + 1, padded_array.shape[1] + 1) + padded_array.shape[2:],
+                     dtype=summed_type)
+    np.cumsum(padded_array, axis=0, dtype=summed_type, out=table[1:, 1:])
+    np.cumsum(table[1:, 1:], axis=1, out=table[1:, 1:])
+    return (table[window_height:window_height + image_height, window_width:window_width + image_width]
+            - table[:image_height, window_width:window_width + image_width]
+            - table[window_height:window_height + image_height, :image_width]
+            + table[:image_height, :image_width])
+
+
+def kernel_halo(kernel: list[list[float]]) -> int:
+    """
+    Returns how many pixels around a tile the given kernel reads.
+    :param kernel: The kernel to convolve with.
+    :return: The halo width in pixels.
+    """
+    return int(max(len(kernel), len(kernel[0])) / 2)
+
+
 name_native: str = "Convolution (Native)"
 name_lib: str = "Convolution (SciPy)"
+name_numpy: str = "Convolution (NumPy)"
+
+convolution_paths: list[str] = ["direct (2-D kernel)", "separable (two 1-D passes)", "fft (overlap-add)",
+                                 "box (integral image)"]
+
+# Seconds per multiply-add of a direct convolution and per N*log2(N) element of an FFT convolution,
+# measured on this host the first time a path has to be selected
+_convolution_costs: dict[str, float] = {}
 
 parameterized_kernel_list: list[str] = ["blur (gaussian Parametrized)"]
 
@@ -86,23 +163,236 @@ def convolve_native(target_image: Image.Image, kernel: list[list[float]], gray_s
     return result_image
 
 
-def convolve_lib(target_image: Image.Image, kernel: list[list[float]], gray_scale: bool = False) -> Image.Image:
+def describe_convolution_path(algorithm_type: str, kernel: list[list[float]],
+                              image_size: tuple[int, int] | None = None) -> str:
+    """
+    Describes the path the given convolution engine takes for the given kernel.
+    :param algorithm_type: The convolution engine name.
+    :param kernel: The kernel to convolve with.
+    :param image_size: The (width, height) of the image, or tile, to convolve. Only used by the SciPy engine.
+    :return: One of the convolution paths.
+    """
+    if algorithm_type == name_lib and image_size is not None:
+        path: str = select_convolution_path(kernel, image_size)
+        crossover: int | None = fft_crossover_kernel_size(image_size)
+        if crossover is None:
+            return f"{path}, direct always beats FFT on {image_size[0]}x{image_size[1]}"
+        return f"{path}, FFT beats direct from {crossover}x{crossover} on {image_size[0]}x{image_size[1]}"
+    if algorithm_type == name_lib and box_kernel_value(kernel) is not None:
+        return convolution_paths[3]
+    if algorithm_type == name_numpy and box_kernel_value(kernel) is not None:
+        return convolution_paths[0]
+    if algorithm_type != name_native and separate_kernel(kernel) is not None:
+        return convolution_paths[1]
+    return convolution_paths[0]
+
+
+def calibrate_convolution_costs() -> dict[str, float]:
+    """
+    Measures the cost of the direct and of the FFT convolution on this host. The measure is taken once per process.
+    :return: The seconds per direct multiply-add ("direct") and per N*log2(N) FFT element ("fft").
+    """
+    if not _convolution_costs:
+        sample_array = np.random.default_rng(0).random((256, 256))
+        direct_kernel = np.ones((9, 9))
+        fft_kernel = np.ones((31, 31))
+        direct_time: float = _best_time(
+            lambda: convolve2d(sample_array, direct_kernel, mode='same', boundary='symm'))
+        fft_time: float = _best_time(lambda: _convolve_channel_fft(sample_array, fft_kernel))
+        fft_size: int = (256 + 30) * (256 + 30)
+        _convolution_costs["direct"] = direct_time / (sample_array.size * direct_kernel.size)
+        _convolution_costs["fft"] = fft_time / (fft_size * math.log2(fft_size))
+    return _convolution_costs
+
+
+def _best_time(function: callable, repetitions: int = 3) -> float:
+    """
+    Times the given function and keeps the fastest run.
+    :param function: The function to time.
+    :param repetitions: How many times the function is run.
+    :return: The fastest run, in seconds.
+    """
+    best: float = math.inf
+    for _ in range(repetitions):
+        start_time: float = time.perf_counter()
+        function()
+        best = min(best, time.perf_counter() - start_time)
+    return best
+
+
+def _estimate_convolution_costs(kernel_size: tuple[int, int], image_size: tuple[int, int]) -> dict[str, float]:
+    """
+    Estimates, using the measured costs, the time each path takes to convolve a single channel.
+    :param kernel_size: The (width, height) of the kernel.
+    :param image_size: The (width, height) of the channel.
+    :return: The estimated seconds of each convolution path.
+    """
+    costs: dict[str, float] = calibrate_convolution_costs()
+    kernel_width, kernel_height = kernel_size
+    image_width, image_height = image_size
+    fft_size: int = (image_width + kernel_width - 1) * (image_height + kernel_height - 1)
+    return {
+        convolution_paths[0]: costs["direct"] * image_width * image_height * kernel_width * kernel_height,
+        convolution_paths[1]: costs["direct"] * image_width * image_height * (kernel_width + kernel_height),
+        convolution_paths[2]: costs["fft"] * fft_size * math.log2(fft_size)
+    }
+
+
+def select_convolution_path(kernel: list[list[float]], image_size: tuple[int, int], allow_separable: bool = True,
+                            allow_fft: bool = True, allow_box: bool = True) -> str:
+    """
+    Selects the cheapest path for the SciPy engine using the costs measured on this host. Box kernels always take
+    the integral image path, whose cost does not depend on the kernel size.
+    :param kernel: The kernel to convolve with.
+    :param image_size: The (width, height) of the image to convolve.
+    :param allow_separable: Whether rank-1 kernels may be applied as two 1-D passes.
+    :param allow_fft: Whether the FFT path may be selected.
+    :param allow_box: Whether box kernels may be applied through an integral image.
+    :return: One of the convolution paths.
+    """
+    if allow_box and box_kernel_value(kernel) is not None:
+        return convolution_paths[3]
+    candidates: list[str] = [convolution_paths[0]]
+    if allow_separable and separate_kernel(kernel) is not None:
+        candidates.append(convolution_paths[1])
+    if allow_fft:
+        candidates.append(convolution_paths[2])
+    if len(candidates) == 1:
+        return candidates[0]
+    estimated_costs: dict[str, float] = _estimate_convolution_costs((len(kernel[0]), len(kernel)), image_size)
+    return min(candidates, key=lambda path: estimated_costs[path])
+
+
+def fft_crossover_kernel_size(image_size: tuple[int, int], max_kernel_size: int = 255) -> int | None:
+    """
+    Finds the smallest odd square kernel for which the FFT path beats the direct one on this host.
+    :param image_size: The (width, height) of the image to convolve.
+    :param max_kernel_size: The largest kernel size to consider.
+    :return: The crossover kernel size, or None if the direct path is always cheaper.
+    """
+    for kernel_size in range(3, max_kernel_size + 1, 2):
+        estimated_costs: dict[str, float] = _estimate_convolution_costs((kernel_size, kernel_size), image_size)
+        if estimated_costs[convolution_paths[2]] < estimated_costs[convolution_paths[0]]:
+            return kernel_size
+    return None
+
+
+def convolve_numpy(target_image: Image.Image, kernel: list[list[float]], gray_scale: bool = False,
+                   allow_separable: bool = True, allow_box: bool = False) -> Image.Image:
+    """
+    Convolves the target image with the given kernel by accumulating shifted views of the whole image.
+    It uses the same clamp-to-edge borders and 0-255 clipping as the native implementation.
+    :param target_image: The image to convolve.
+    :param kernel: The kernel to convolve with.
+    :param gray_scale: Whether to convert the image to grayscale before convolving.
+    :param allow_separable: Whether rank-1 kernels, box kernels excepted, may be applied as two 1-D passes.
+    :param allow_box: Whether box kernels may be applied through an integral image. Off by default: both the scaled
+    window sums and the two 1-D passes round differently from the native tap by tap accumulation, by one level at
+    most, so box kernels otherwise take the direct path.
+    :return: The convolved image.
+    """
+    target_image = target_image.convert("L" if gray_scale else "RGB")
+    image_array = np.asarray(target_image, dtype=np.float64)
+    image_height, image_width = image_array.shape[:2]
+    kernel_size: int = len(kernel)
+    padding: int = int(kernel_size / 2)
+    box_value: float | None = box_kernel_value(kernel)
+    factors = separate_kernel(kernel) if allow_separable and box_value is None else None
+    if not allow_box:
+        box_value = None
+    if box_value is not None:
+        # The window sums are exact integers, scaled once instead of tap by tap
+        output_array = integral_box_sum(np.asarray(target_image), len(kernel), len(kernel[0])) * box_value
+    elif factors is not None:
+        column_vector, row_vector = factors
+        padded_array = np.pad(image_array, _pad_width((padding, padding), (0, 0), gray_scale), mode="edge")
+        column_array = np.zeros_like(image_array)
+        for ky in range(kernel_size):
+            column_array += padded_array[ky:ky + image_height, :] * column_vector[ky]
+        padded_array = np.pad(column_array, _pad_width((0, 0), (padding, padding), gray_scale), mode="edge")
+        output_array = np.zeros_like(image_array)
+        for kx in range(kernel_size):
+            output_array += padded_array[:, kx:kx + image_width] * row_vector[kx]
+    else:
+        padded_array = np.pad(image_array, _pad_width((padding, padding), (padding, padding), gray_scale),
+                              mode="edge")
+        output_array = np.zeros_like(image_array)
+        # Taps are accumulated in the same row-major order as the native loop, so results match it exactly
+        for ky in range(kernel_size):
+            for kx in range(kernel_size):
+                output_array += padded_array[ky:ky + image_height, kx:kx + image_width] * kernel[ky][kx]
+    output_array = np.clip(output_array, 0, 255)
+    return Image.fromarray(output_array.astype(np.uint8))
+
+
+def _pad_width(rows: tuple[int, int], columns: tuple[int, int], gray_scale: bool) -> tuple:
+    """
+    Builds the np.pad width for a grayscale or an RGB image array.
+    :param rows: The padding before and after the rows.
+    :param columns: The padding before and after the columns.
+    :param gray_scale: Whether the image array is grayscale.
+    :return: The pad width.
+    """
+    return (rows, columns) if gray_scale else (rows, columns, (0, 0))
+
+
+def convolve_lib(target_image: Image.Image, kernel: list[list[float]], gray_scale: bool = False,
+                 allow_separable: bool = True, allow_fft: bool = True, allow_box: bool = True) -> Image.Image:
     """
     Convolves using the scipy library the target image with the given kernel.
     :param target_image: The image to convolve.
     :param kernel: The kernel to convolve with.
     :param gray_scale: Whether to convert the image to grayscale before convolving.
+    :param allow_separable: Whether rank-1 kernels may be applied as two 1-D passes.
+    :param allow_fft: Whether large kernels may be applied through an overlap-add FFT convolution.
+    :param allow_box: Whether box kernels may be applied through an integral image.
     :return: The convolved image.
     """
     if gray_scale:
         target_image = target_image.convert("L")
     image_array = np.array(target_image)
     output_array = np.zeros_like(image_array, dtype=np.float32)
+    path: str = select_convolution_path(kernel, target_image.size, allow_separable, allow_fft, allow_box)
     if gray_scale:
-        output_array = convolve2d(image_array, kernel, mode='same', boundary='symm')
+        output_array = _convolve_channel_lib(image_array, kernel, path)
     else:
         for channel in range(3):
             channel_array = image_array[:, :, channel]
-            output_array[:, :, channel] = convolve2d(channel_array, kernel, mode='same', boundary='symm')
+            output_array[:, :, channel] = _convolve_channel_lib(channel_array, kernel, path)
     output_array = np.clip(output_array, 0, 255)
     return Image.fromarray(output_array.astype(np.uint8))
+
+
+def _convolve_channel_lib(channel_array: np.ndarray, kernel: list[list[float]], path: str) -> np.ndarray:
+    """
+    Convolves a single channel using scipy through the given path.
+    :param channel_array: The channel to convolve.
+    :param kernel: The kernel to convolve with.
+    :param path: One of the convolution paths.
+    :return: The convolved channel.
+    """
+    if path == convolution_paths[3]:
+        return integral_box_sum(channel_array, len(kernel), len(kernel[0]), "symmetric") * box_kernel_value(kernel)
+    if path == convolution_paths[2]:
+        return _convolve_channel_fft(channel_array, kernel)
+    if path == convolution_paths[1]:
+        column_vector, row_vector = separate_kernel(kernel)
+        column_array = convolve2d(channel_array, column_vector[:, np.newaxis], mode='same', boundary='symm')
+        return convolve2d(column_array, row_vector[np.newaxis, :], mode='same', boundary='symm')
+    return convolve2d(channel_array, kernel, mode='same', boundary='symm')
+
+
+def _convolve_channel_fft(channel_array: np.ndarray, kernel: list[list[float]] | np.ndarray) -> np.ndarray:
+    """
+    Convolves a single channel through an overlap-add FFT convolution.
+    The channel is padded symmetrically beforehand so the result matches convolve2d with boundary='symm'.
+    :param channel_array: The channel to convolve.
+    :param kernel: The kernel to convolve with.
+    :return: The convolved channel.
+    """
+    kernel_array = np.asarray(kernel, dtype=np.float64)
+    kernel_height, kernel_width = kernel_array.shape
+    padded_array = np.pad(channel_array.astype(np.float64),
+                          ((kernel_height // 2, (kernel_height - 1) // 2), (kernel_width // 2, (kernel_width - 1) // 2)),
+                          mode="symmetric")
+    return oaconvolve(padded_array, kernel_array, mode='valid')
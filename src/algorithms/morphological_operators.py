@@ -1,6 +1,8 @@
-from PIL import Image
+from PIL import Image, ImageChops
+import numpy as np
 
 name: str = "Morphological Ops"
+name_numpy: str = "Morphological Ops (NumPy)"
 
 
 structural_elements: dict[str, list[list[int]]] = {
@@ -29,12 +31,55 @@ structural_elements: dict[str, list[list[int]]] = {
 
 }
 
-morphological_sub_types: list[str] = ["erosion", "dilation"]
+
+def generate_structural_element(shape: str, size: int) -> list[list[int]]:
+    """
+    Generates a structural element of the given shape and odd size, drawn like the built-in ones.
+    :param shape: One of "square", "cross", "line" or "circle".
+    :param size: The size of the element.
+    :return: The generated structural element.
+    """
+    center: int = int(size / 2)
+    rows, columns = np.mgrid[0:size, 0:size]
+    if shape == "square":
+        mask = np.ones((size, size), dtype=bool)
+    elif shape == "cross":
+        mask = (rows == center) | (columns == center)
+    elif shape == "line":
+        mask = rows == center
+    elif shape == "circle":
+        mask = (rows - center) ** 2 + (columns - center) ** 2 <= center * (center + 1)
+    else:
+        raise ValueError(f"Invalid structural element shape: {shape}")
+    return mask.astype(int).tolist()
+
+
+# Larger elements, only practical with the NumPy engine
+for _shape in ["square", "cross", "line", "circle"]:
+    for _size in [15, 31]:
+        structural_elements[f"{_shape} ({_size}x{_size})"] = generate_structural_element(_shape, _size)
+
+morphological_sub_types: list[str] = ["erosion", "dilation", "opening", "closing", "gradient", "top-hat"]
+# Compound operators chaining an erosion and a dilation, which read twice the element radius
+chained_sub_types: list[str] = ["opening", "closing", "top-hat"]
+
+
+def structural_element_halo(structural_element: list[list[int]], sub_type: str = morphological_sub_types[0]) -> int:
+    """
+    Returns how many pixels around a tile the given structural element reads. The compound operators run fused on
+    the tile, so the chained ones need the combined radius of both passes.
+    :param structural_element: The structural element to use.
+    :param sub_type: The morphological operator to apply.
+    :return: The halo width in pixels.
+    """
+    radius: int = int(len(structural_element) / 2)
+    return 2 * radius if sub_type in chained_sub_types else radius
 
 
 def morphological_operate(target_image: Image.Image, sub_type: str, structural_element: list[list[int]]) -> Image.Image:
     """
-    Applies the morphological operator to an RGB image.
+    Applies the morphological operator to an RGB image. The compound operators chain the erosion and the dilation on
+    the same image, the intermediate image never leaves the call.
     :param target_image: The image to apply the operator to.
     :param sub_type: The morphological operator to apply.
     :param structural_element: The structural element to use.
@@ -42,8 +87,19 @@ def morphological_operate(target_image: Image.Image, sub_type: str, structural_e
     """
     if sub_type == "erosion":
         return _erosion(target_image, structural_element)
-    else:
+    elif sub_type == "dilation":
         return _dilation(target_image, structural_element)
+    elif sub_type == "opening":
+        return _dilation(_erosion(target_image, structural_element), structural_element)
+    elif sub_type == "closing":
+        return _erosion(_dilation(target_image, structural_element), structural_element)
+    elif sub_type == "gradient":
+        return ImageChops.subtract(_dilation(target_image, structural_element),
+                                   _erosion(target_image, structural_element))
+    elif sub_type == "top-hat":
+        return ImageChops.subtract(target_image.convert("RGB"),
+                                   _dilation(_erosion(target_image, structural_element), structural_element))
+    raise ValueError(f"Invalid morphological sub type: {sub_type}")
 
 
 def _erosion(target_image: Image.Image, structural_element: list[list[int]]) -> Image.Image:
@@ -104,3 +160,137 @@ def _dilation(target_image: Image.Image, structural_element: list[list[int]]) ->
                         pixel_chs[2] = max(pixel_chs[2], pixel_b + kernel_value)
             result_pixels[x, y] = (pixel_chs[0], pixel_chs[1], pixel_chs[2])
     return result_image
+
+
+def morphological_operate_numpy(target_image: Image.Image, sub_type: str,
+                                structural_element: list[list[int]]) -> Image.Image:
+    """
+    Applies the morphological operator to an RGB image with whole-array running min/max filters. The results match
+    the native operator: the element values are subtracted (erosion) or added (dilation) over the whole window and
+    the pixels out of the image are skipped.
+    :param target_image: The image to apply the operator to.
+    :param sub_type: The morphological operator to apply.
+    :param structural_element: The structural element to use.
+    :return: The filtered image.
+    """
+    image_array = np.asarray(target_image.convert("RGB"), dtype=np.int32)
+    if sub_type == "erosion":
+        result_array = _extreme_filter(image_array, structural_element, np.minimum)
+    elif sub_type == "dilation":
+        result_array = _extreme_filter(image_array, structural_element, np.maximum)
+    elif sub_type == "opening":
+        result_array = _open_array(image_array, structural_element)
+    elif sub_type == "closing":
+        result_array = _extreme_filter(_extreme_filter(image_array, structural_element, np.maximum),
+                                       structural_element, np.minimum)
+    elif sub_type == "gradient":
+        result_array = (_extreme_filter(image_array, structural_element, np.maximum) -
+                        _extreme_filter(image_array, structural_element, np.minimum))
+    elif sub_type == "top-hat":
+        result_array = image_array - _open_array(image_array, structural_element)
+    else:
+        raise ValueError(f"Invalid morphological sub type: {sub_type}")
+    return Image.fromarray(np.clip(result_array, 0, 255).astype(np.uint8))
+
+
+def _open_array(image_array: np.ndarray, structural_element: list[list[int]]) -> np.ndarray:
+    """
+    Computes the opening of an image array, an erosion followed by a dilation.
+    :param image_array: The int32 image array.
+    :param structural_element: The structural element to use.
+    :return: The opened int32 array, clipped to [0, 255].
+    """
+    return _extreme_filter(_extreme_filter(image_array, structural_element, np.minimum), structural_element,
+                           np.maximum)
+
+
+def _extreme_filter(image_array: np.ndarray, structural_element: list[list[int]], reduce: np.ufunc) -> np.ndarray:
+    """
+    Computes the non-flat erosion (np.minimum) or dilation (np.maximum) of an image array. The element is split
+    into nested superlevel sets: the erosion is the minimum over every element value t of the minimum over the
+    pixels valued t or more, minus t, and the dilation likewise. Each set is covered with rectangles, each one
+    reduced with two separable running passes whose cost does not depend on the rectangle size. The cost is then
+    linear in the number of rectangles: constant for squares, lines and crosses, linear in the size for circles.
+    :param image_array: The int32 image array.
+    :param structural_element: The structural element to use.
+    :param reduce: np.minimum or np.maximum.
+    :return: The filtered int32 array, clipped to [0, 255] as the native operator stores it.
+    """
+    element_array = np.asarray(structural_element)
+    kernel_size: int = len(structural_element)
+    padding: int = int(kernel_size / 2)
+    height, width = image_array.shape[:2]
+    eroding: bool = reduce is np.minimum
+    # Out of image pixels are skipped: they are padded with a value the reduction never picks
+    neutral: int = np.iinfo(np.int32).max // 2 if eroding else np.iinfo(np.int32).min // 2
+    padded_array = np.pad(image_array, ((padding, kernel_size - 1 - padding), (padding, kernel_size - 1 - padding),
+                                        (0, 0)), constant_values=neutral)
+    result_array = np.full_like(image_array, 255 if eroding else 0)
+    row_passes: dict[int, np.ndarray] = {}
+    rectangle_passes: dict[tuple[int, int], np.ndarray] = {}
+    for value in np.unique(element_array):
+        for top, bottom, left, right in _cover_mask(element_array >= value):
+            rectangle_width: int = right - left
+            rectangle_height: int = bottom - top
+            if rectangle_width not in row_passes:
+                row_passes[rectangle_width] = _running_extreme(padded_array, rectangle_width, 1, reduce)
+            if (rectangle_width, rectangle_height) not in rectangle_passes:
+                rectangle_passes[(rectangle_width, rectangle_height)] = _running_extreme(
+                    row_passes[rectangle_width], rectangle_height, 0, reduce)
+            extreme_array = rectangle_passes[(rectangle_width, rectangle_height)][top:top + height,
+                                                                                  left:left + width]
+            result_array = reduce(result_array, extreme_array - value if eroding else extreme_array + value)
+    return np.clip(result_array, 0, 255)
+
+
+def _cover_mask(mask: np.ndarray) -> list[tuple[int, int, int, int]]:
+    """
+    Covers a mask with rectangles, which may overlap since minimum and maximum are idempotent: every run of a row is
+    extended over the consecutive rows whose runs contain it. Squares and lines give one rectangle, crosses two and
+    circles one per distinct row width, which grows with their radius: 10 for the 31x31 circle.
+    :param mask: The boolean mask.
+    :return: The (top, bottom, left, right) rectangles, bottom and right excluded.
+    """
+    row_runs: list[list[tuple[int, int]]] = []
+    for row in range(mask.shape[0]):
+        bounds = np.flatnonzero(np.diff(np.concatenate(([0], mask[row].astype(np.int8), [0]))))
+        row_runs.append(list(zip(bounds[::2].tolist(), bounds[1::2].tolist())))
+
+    def contains(row: int, left: int, right: int) -> bool:
+        return any(run_left <= left and right <= run_right for run_left, run_right in row_runs[row])
+
+    rectangles: set[tuple[int, int, int, int]] = set()
+    for row, runs in enumerate(row_runs):
+        for left, right in runs:
+            top, bottom = row, row + 1
+            while top > 0 and contains(top - 1, left, right):
+                top -= 1
+            while bottom < mask.shape[0] and contains(bottom, left, right):
+                bottom += 1
+            rectangles.add((top, bottom, left, right))
+    return sorted(rectangles)
+
+
+def _running_extreme(array: np.ndarray, length: int, axis: int, reduce: np.ufunc) -> np.ndarray:
+    """
+    Computes the min or max of every window of the given length along an axis with the van Herk/Gil-Werman
+    algorithm: the axis is cut in blocks of the window length, and every window is the reduction of a block suffix and
+    of the next block prefix, three operations per element whatever the length.
+    :param array: The array to filter.
+    :param length: The window length.
+    :param axis: The axis to filter along.
+    :param reduce: np.minimum or np.maximum.
+    :return: The array of the windows, shorter by length - 1 along the axis.
+    """
+    if length == 1:
+        return array
+    array = np.moveaxis(array, axis, 0)
+    size: int = array.shape[0]
+    blocks: int = -(-size // length)
+    blocks_array = np.pad(array, ((0, blocks * length - size),) + ((0, 0),) * (array.ndim - 1), mode="edge")
+    blocks_array = blocks_array.reshape(blocks, length, *array.shape[1:])
+    prefix_array = reduce.accumulate(blocks_array, axis=1).reshape(blocks * length, *array.shape[1:])
+    suffix_array = reduce.accumulate(blocks_array[:, ::-1], axis=1)[:, ::-1].reshape(blocks * length,
+                                                                                       *array.shape[1:])
+    windows_array = reduce(suffix_array[:size - length + 1], prefix_array[length - 1:size])
+    return np.moveaxis(windows_array, 0, axis)
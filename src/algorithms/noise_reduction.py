@@ -1,9 +1,47 @@
 from PIL import Image
 import math
+import numpy as np
+from scipy.ndimage import gaussian_filter1d, map_coordinates
+from .convolution import integral_box_sum
 
 name: str = "Noise Reduction"
 
-noise_reduction_sub_types: list[str] = ["mean filter", "bilateral filter"]
+noise_reduction_sub_types: list[str] = ["mean filter", "bilateral filter", "mean filter (integral image)",
+                                        "bilateral filter (lookup tables)", "bilateral filter (bilateral grid)"]
+mean_filter_sub_types: list[str] = [noise_reduction_sub_types[0], noise_reduction_sub_types[2]]
+bilateral_filter_sub_types: list[str] = [noise_reduction_sub_types[1], noise_reduction_sub_types[3],
+                                         noise_reduction_sub_types[4]]
+# The largest squared distance between two RGB colors, 3 * 255 ** 2
+_max_color_distance: int = 195075
+
+
+def mean_filter_halo(filter_size: int) -> int:
+    """
+    Returns how many pixels around a tile the mean filter reads.
+    :param filter_size: The size of the filter.
+    :return: The halo width in pixels.
+    """
+    return int(filter_size / 2)
+
+
+def bilateral_filter_halo(diameter: int) -> int:
+    """
+    Returns how many pixels around a tile the bilateral filter reads. The neighborhood spans -diameter..diameter.
+    :param diameter: The diameter of the neighborhood.
+    :return: The halo width in pixels.
+    """
+    return diameter
+
+
+def bilateral_grid_halo(diameter: int, sigma_space: int) -> int:
+    """
+    Returns how many pixels around a tile the bilateral grid reads: the blurred neighborhood plus the cells the
+    pixels are splatted to and sliced from.
+    :param diameter: The diameter of the neighborhood.
+    :param sigma_space: The sigma space value, the size of the grid cells.
+    :return: The halo width in pixels.
+    """
+    return max(diameter, sigma_space) + 2 * sigma_space
 
 
 def mean_filter(target_image: Image.Image, filter_size: int) -> Image.Image:
@@ -36,6 +74,19 @@ def mean_filter(target_image: Image.Image, filter_size: int) -> Image.Image:
     return result_image
 
 
+def mean_filter_integral(target_image: Image.Image, filter_size: int) -> Image.Image:
+    """
+    Applies the mean filter to an RGB image through a summed-area table, four lookups per pixel whatever the filter
+    size. The borders are clamped to the edge and the means truncated, as the native filter does.
+    :param target_image: The image to apply the operator to.
+    :param filter_size: The size of the filter. By default it is 3.
+    :return: The filtered image.
+    """
+    window_size: int = 2 * int(filter_size / 2) + 1
+    window_sums = integral_box_sum(np.asarray(target_image.convert("RGB")), window_size, window_size)
+    return Image.fromarray((window_sums // (window_size * window_size)).astype(np.uint8))
+
+
 def bilateral_filter(target_image: Image.Image, diameter: int, sigma_color: int, sigma_space: int) -> Image.Image:
     """
     Applies the bilateral filter to an RGB image.
@@ -73,3 +124,88 @@ def bilateral_filter(target_image: Image.Image, diameter: int, sigma_color: int,
                     w_acc += weight
             result_pixels[x, y] = (int(r_acc / w_acc), int(g_acc / w_acc), int(b_acc / w_acc))
     return result_image
+
+
+def _gaussian_weights(squared_distances: np.ndarray, sigma_value: int) -> np.ndarray:
+    """
+    Computes the gaussian weights the native bilateral filter uses, from squared distances.
+    :param squared_distances: The squared distances.
+    :param sigma_value: The sigma of the gaussian.
+    :return: The float64 weights.
+    """
+    return (1 / (2 * math.pi * sigma_value ** 2)) * np.exp(-squared_distances / (2 * sigma_value ** 2))
+
+
+def bilateral_filter_lut(target_image: Image.Image, diameter: int, sigma_color: int, sigma_space: int) -> Image.Image:
+    """
+    Applies the bilateral filter to an RGB image with the weights of the native filter, computed once: the spatial
+    weights only depend on the neighbor offset, and the range weights are looked up by the integer squared color
+    distance. Each neighbor offset is then accumulated over the whole image at once.
+    Results match the native filter within one level per channel, as the sums are accumulated in another order.
+    :param target_image: The image to apply the operator to.
+    :param diameter: The diameter of the neighborhood.
+    :param sigma_color: The sigma color value.
+    :param sigma_space: The sigma space value.
+    :return: The filtered image.
+    """
+    image_array = np.asarray(target_image.convert("RGB"), dtype=np.int32)
+    height, width = image_array.shape[:2]
+    offsets = np.arange(-diameter, diameter + 1)
+    spatial_weights = _gaussian_weights(offsets[:, np.newaxis] ** 2 + offsets[np.newaxis, :] ** 2, sigma_space)
+    range_weights = _gaussian_weights(np.arange(_max_color_distance + 1, dtype=np.float64), sigma_color)
+    padded_array = np.pad(image_array, ((diameter, diameter), (diameter, diameter), (0, 0)), mode="edge")
+    color_sums = np.zeros(image_array.shape, dtype=np.float64)
+    weight_sums = np.zeros((height, width), dtype=np.float64)
+    for row, j in enumerate(offsets):
+        for column, i in enumerate(offsets):
+            neighbor_array = padded_array[diameter + j:diameter + j + height, diameter + i:diameter + i + width]
+            color_distances = np.sum((neighbor_array - image_array) ** 2, axis=2)
+            weights = range_weights[color_distances] * spatial_weights[row, column]
+            color_sums += neighbor_array * weights[:, :, np.newaxis]
+            weight_sums += weights
+    return Image.fromarray((color_sums / weight_sums[:, :, np.newaxis]).astype(np.uint8))
+
+
+def bilateral_filter_grid(target_image: Image.Image, diameter: int, sigma_color: int,
+                          sigma_space: int) -> Image.Image:
+    """
+    Approximates the bilateral filter of an RGB image with a bilateral grid: the pixels are splatted into a coarse
+    (y, x, luminance) grid whose cells are sigma_space pixels wide and sigma_color / sqrt(3) levels deep, the grid is
+    blurred with a one cell gaussian and the filtered colors are sliced back with trilinear interpolation.
+    The cost depends on the number of cells rather than on the neighborhood size. The luminance stands in for the
+    RGB distance of the exact filter, and the blur is truncated at the diameter, so results differ from it.
+    Tiles are gridded from their own origin, so tiled results differ slightly from whole-image ones.
+    :param target_image: The image to apply the operator to.
+    :param diameter: The diameter of the neighborhood.
+    :param sigma_color: The sigma color value.
+    :param sigma_space: The sigma space value.
+    :return: The filtered image.
+    """
+    image_array = np.asarray(target_image.convert("RGB"), dtype=np.float64)
+    luminance_array = np.asarray(target_image.convert("L"), dtype=np.float64)
+    height, width = luminance_array.shape
+    # A gray step of d levels is an RGB distance of d * sqrt(3)
+    range_sampling: float = sigma_color / math.sqrt(3)
+    spatial_truncate: float = max(1.0, diameter / sigma_space)
+    padding: int = math.ceil(max(spatial_truncate, 4.0)) + 1
+    rows, columns = np.mgrid[0:height, 0:width]
+    coordinates = np.stack([rows / sigma_space + padding, columns / sigma_space + padding,
+                            luminance_array / range_sampling + padding])
+    cells = np.rint(coordinates).astype(np.int64)
+    grid_shape: tuple[int, int, int] = (int(cells[0].max()) + padding + 1, int(cells[1].max()) + padding + 1,
+                                        int(cells[2].max()) + padding + 1)
+    cell_indices = np.ravel_multi_index(tuple(cells.reshape(3, -1)), grid_shape)
+    sliced_channels: list[np.ndarray] = []
+    for channel_array in [image_array[:, :, 0], image_array[:, :, 1], image_array[:, :, 2], None]:
+        # The last grid holds the weights, the homogeneous coordinate the colors are normalized by
+        values = None if channel_array is None else channel_array.ravel()
+        grid = np.bincount(cell_indices, weights=values, minlength=math.prod(grid_shape)).astype(np.float64)
+        grid = grid.reshape(grid_shape)
+        grid = gaussian_filter1d(grid, 1.0, axis=0, mode="constant", truncate=spatial_truncate)
+        grid = gaussian_filter1d(grid, 1.0, axis=1, mode="constant", truncate=spatial_truncate)
+        grid = gaussian_filter1d(grid, 1.0, axis=2, mode="constant", truncate=4.0)
+        sliced_channels.append(map_coordinates(grid, coordinates.reshape(3, -1), order=1).reshape(height, width))
+    weights = np.maximum(sliced_channels[3], 1e-12)
+    # The small offset absorbs the rounding of the normalization, so that flat areas are not truncated a level down
+    result_array = np.stack(sliced_channels[:3], axis=2) / weights[:, :, np.newaxis] + 1e-6
+    return Image.fromarray(np.clip(result_array, 0, 255).astype(np.uint8))
@@ -0,0 +1,433 @@
+import argparse
+import csv
+import json
+import multiprocessing
+import sys
+import tempfile
+from pathlib import Path
+from PIL import Image
+
+CURRENT_POSITION = Path(__file__).parent
+sys.path.append(f"{CURRENT_POSITION}/../")
+from src.core import batch, mapped_image, result_cache, runners, scaling, tiling
+from src.core.benchmark import (BatchReport, BenchmarkRunner, BenchmarkSettings, BenchmarkReport, PipelineReport,
+                                phases)
+from src.core.pipeline import PipelineStep
+
+output_formats: list[str] = ["json", "csv"]
+summary_columns: list[str] = ["mean", "p95", "stdev", "ci_low", "ci_high", "runs", "rejected"]
+
+
+def parse_arguments(arguments: list[str] | None = None) -> argparse.Namespace:
+    """
+    Parses the command line arguments.
+    :param arguments: The arguments to parse, the process ones if None.
+    :return: The parsed arguments.
+    """
+    parser = argparse.ArgumentParser(description="Runs the image processing benchmark without the user interface.")
+    parser.add_argument("images", nargs="*", type=Path,
+                        help="The images to process. With --batch, directories and glob patterns are accepted too.")
+    parser.add_argument("--list", action="store_true", help="Lists the algorithms, sub types and parameters.")
+    parser.add_argument("--algorithm", help="The algorithm type.")
+    parser.add_argument("--step", action="append", default=[], metavar="TYPE|SUB_TYPE|NAME=VALUE,...",
+                        help="A step of a pipeline run fused tile by tile, repeatable and replacing --algorithm. "
+                             "The sub type and the parameters can be omitted.")
+    parser.add_argument("--sub-type", default="", help="The algorithm sub type, the first one if omitted.")
+    parser.add_argument("--param", action="append", default=[], metavar="NAME=VALUE",
+                        help="An algorithm parameter, repeatable. Missing parameters use their default value.")
+    parser.add_argument("--cores", default="all",
+                        help="Comma separated CPU core sets to benchmark, or 'all'. The serial run is always included.")
+    parser.add_argument("--mode", choices=tiling.division_modes, default=tiling.division_modes[0],
+                        help="How the image is divided into tiles.")
+    parser.add_argument("--tiles-per-worker", type=int, default=1,
+                        help="The over-decomposition factor, more than 1 enables dynamic load balancing.")
+    parser.add_argument("--shared-memory", action="store_true",
+                        help="Dispatch tiles through shared memory instead of pickling the sub-images.")
+    parser.add_argument("--out-of-core", nargs="?", const=tempfile.gettempdir(), metavar="DIR",
+                        help="Map the image and the result to files in DIR, the temporary directory if omitted, "
+                             "so that workers only load their tile. Meant for images that do not fit in memory.")
+    parser.add_argument("--batch", action="store_true",
+                        help="Process the images as a single batch and compare the throughput of the inter-image, "
+                             "intra-image and hybrid strategies, instead of benchmarking every image alone.")
+    parser.add_argument("--stream", action="store_true",
+                        help="Stream the image as horizontal bands on the largest core set and write the result to "
+                             "--result-dir band by band, instead of benchmarking every core set.")
+    parser.add_argument("--band-rows", type=int, default=64, help="The rows of every streamed band.")
+    parser.add_argument("--bands-in-flight", type=int,
+                        help="The maximum number of streamed bands in memory, twice the largest core set if omitted.")
+    parser.add_argument("--cache", nargs="?", const=result_cache.default_cache_directory, metavar="DIR",
+                        help="Cache the serial baseline and its result in DIR, a directory of the user cache "
+                             "directory if omitted, and reuse them when the same image, algorithm and parameters are "
+                             "benchmarked again. The parallel configurations are always measured, reused timings "
+                             "are marked as cached.")
+    parser.add_argument("--cache-size", type=int, default=result_cache.default_cache_megabytes, metavar="MB",
+                        help="The size cap of the cache, the least recently used entries are evicted past it.")
+    parser.add_argument("--bypass-cache", action="store_true",
+                        help="Measure the serial baseline again, for measurement runs, while refreshing the cache.")
+    parser.add_argument("--warmups", type=int, default=1, help="The untimed runs of every configuration.")
+    parser.add_argument("--repeats", type=int, default=5,
+                        help="The timed runs of every configuration, summarized by their median.")
+    parser.add_argument("--format", choices=output_formats, default=output_formats[0], help="The output format.")
+    parser.add_argument("--output", type=Path, help="The output file, the standard output if omitted.")
+    parser.add_argument("--result-dir", type=Path, help="Where to save the processed images, not saved if omitted.")
+    return parser.parse_args(arguments)
+
+
+def list_algorithms() -> str:
+    """
+    Describes the available algorithms, their sub types and parameters.
+    :return: The description.
+    """
+    lines: list[str] = []
+    for algorithm_type in runners.implemented_algorithms.keys():
+        lines.append(algorithm_type)
+        for sub_type in runners.get_sub_types(algorithm_type) or [""]:
+            if sub_type:
+                lines.append(f"  {sub_type}")
+            for param, description in runners.get_default_parameters(algorithm_type, sub_type).items():
+                text: str = f"{'    ' if sub_type else '  '}--param {param}=<{description['type'].__name__}>" \
+                            f" (default {description['value']})"
+                if "choices" in description:
+                    text += f" choices: {', '.join(description['choices'])}"
+                lines.append(text)
+    return "\n".join(lines)
+
+
+def resolve_algorithm(algorithm: str, sub_type: str, assignments: list[str]) -> tuple[str, dict[str, object]]:
+    """
+    Validates an algorithm and resolves its sub type and parameters.
+    :param algorithm: The algorithm type.
+    :param sub_type: The algorithm sub type, the first one if empty.
+    :param assignments: The NAME=VALUE parameters, missing parameters use their default value.
+    :return: The sub type, empty if the algorithm has none, and the parameters values.
+    """
+    if algorithm not in runners.implemented_algorithms:
+        raise ValueError(f"Unknown algorithm '{algorithm}', use --list to see the available ones.")
+    sub_types: list[str] = runners.get_sub_types(algorithm)
+    if sub_types and not sub_type:
+        sub_type = sub_types[0]
+    if sub_types and sub_type not in sub_types:
+        raise ValueError(f"Unknown sub type '{sub_type}' for '{algorithm}'.")
+    sub_type = sub_type if sub_types else ""
+    descriptions: dict[str, dict] = runners.get_default_parameters(algorithm, sub_type)
+    params: dict[str, object] = {param: description["value"] for param, description in descriptions.items()}
+    for assignment in assignments:
+        param, _, user_input = assignment.partition("=")
+        if param not in descriptions:
+            raise ValueError(f"Unknown parameter '{param}' for '{sub_type or algorithm}'.")
+        value = runners.parse_parameter(descriptions[param], user_input)
+        if value is None:
+            raise ValueError(f"The value {user_input} is not a valid parameter for '{param}'.")
+        params[param] = value
+    return sub_type, params
+
+
+def parse_steps(steps: list[str]) -> list[PipelineStep]:
+    """
+    Parses the pipeline steps given as TYPE|SUB_TYPE|NAME=VALUE,... texts.
+    :param steps: The steps texts.
+    :return: The pipeline steps.
+    """
+    pipeline_steps: list[PipelineStep] = []
+    for step in steps:
+        algorithm, _, rest = step.partition("|")
+        sub_type, _, assignments = rest.partition("|")
+        sub_type, params = resolve_algorithm(algorithm, sub_type,
+                                             [assignment for assignment in assignments.split(",") if assignment])
+        pipeline_steps.append(PipelineStep(algorithm, sub_type, params))
+    return pipeline_steps
+
+
+def build_settings(arguments: argparse.Namespace) -> BenchmarkSettings:
+    """
+    Builds the benchmark settings out of the command line arguments. The algorithm of a pipeline is named after its
+    steps.
+    :param arguments: The parsed arguments.
+    :return: The benchmark settings.
+    """
+    if arguments.step:
+        algorithm: str = " -> ".join(step.partition("|")[0] for step in arguments.step)
+        sub_type, params = "", {}
+    else:
+        algorithm: str = arguments.algorithm
+        sub_type, params = resolve_algorithm(arguments.algorithm, arguments.sub_type, arguments.param)
+    if arguments.cores == "all":
+        cpu_core_sets: list[int] = list(range(1, multiprocessing.cpu_count() + 1))
+    else:
+        cpu_core_sets: list[int] = [1] + [int(cpu_set) for cpu_set in arguments.cores.split(",")]
+    if min(cpu_core_sets) < 1 or arguments.tiles_per_worker < 1 or arguments.repeats < 1:
+        raise ValueError("Core sets, tiles per worker and repeats must be positive.")
+    if arguments.warmups < 0:
+        raise ValueError("Warm-ups can not be negative.")
+    return BenchmarkSettings(algorithm, sub_type, params, cpu_core_sets, arguments.mode,
+                             arguments.shared_memory, arguments.tiles_per_worker, arguments.warmups, arguments.repeats,
+                             arguments.out_of_core, arguments.bypass_cache)
+
+
+def describe_scaling(timestamps: dict[str, float]) -> dict[str, object]:
+    """
+    Describes the scaling of the benchmarked configurations.
+    :param timestamps: The seconds of every configuration.
+    :return: The scaling rows and the serial fraction fitted by every scaling law.
+    """
+    rows: list[dict[str, object]] = scaling.compute_scaling(timestamps)
+    return {"rows": rows, "serial_fraction": {law: scaling.fit_serial_fraction(rows, law)
+                                              for law in scaling.scaling_laws}}
+
+
+def write_reports(reports: list[tuple[str, BenchmarkReport]], settings: BenchmarkSettings, output_format: str,
+                  output) -> None:
+    """
+    Writes the benchmark reports in a machine-readable format.
+    :param reports: The (image path, benchmark report) pairs.
+    :param settings: The benchmark settings.
+    :param output_format: One of the output formats.
+    :param output: The text stream to write to.
+    :return:
+    """
+    if output_format == "json":
+        json.dump({
+            "settings": settings.describe(),
+            "results": [{"image": image_path, "timestamps": report.timestamps, "statistics": report.statistics,
+                          "phases": report.phases, "scaling": describe_scaling(report.timestamps),
+                          "quality": report.quality, "cache": report.cache, "cached": report.cached,
+                          "details": report.details}
+                        for image_path, report in reports]
+        }, output, indent=2)
+        output.write("\n")
+        return
+    writer = csv.writer(output)
+    writer.writerow(["image", "algorithm_type", "algorithm_sub_type", "division_mode", "shared_memory",
+                     "tiles_per_worker", "configuration", "seconds", *summary_columns,
+                     *[f"{phase.replace(' ', '_')}_seconds" for phase in phases], *scaling.table_columns[3:],
+                     "cached"])
+    for image_path, report in reports:
+        scaling_rows: dict[str, dict[str, object]] = {row["configuration"]: row
+                                                      for row in scaling.compute_scaling(report.timestamps)}
+        for config_label, seconds in report.timestamps.items():
+            summary: dict[str, float] = report.statistics[config_label]
+            writer.writerow([image_path, settings.algorithm_type, settings.algorithm_sub_type, settings.division_mode,
+                             settings.use_shared_memory, settings.tiles_per_worker, config_label, f"{seconds:.6f}",
+                             *[f"{summary[column]:.6f}" if isinstance(summary[column], float) else summary[column]
+                               for column in summary_columns],
+                             *[f"{report.phases[config_label][phase]:.6f}" for phase in phases],
+                             *["" if scaling_rows[config_label][column] is None else
+                               f"{scaling_rows[config_label][column]:.6f}" for column in scaling.table_columns[3:]],
+                             config_label in report.cached])
+
+
+def write_stream_reports(reports: list[tuple[str, str, dict[str, object]]], settings: BenchmarkSettings,
+                         output_format: str, output) -> None:
+    """
+    Writes the streaming reports in a machine-readable format.
+    :param reports: The (image path, result path, streaming report) triples.
+    :param settings: The benchmark settings.
+    :param output_format: One of the output formats.
+    :param output: The text stream to write to.
+    :return:
+    """
+    if output_format == "json":
+        json.dump({
+            "settings": settings.describe(),
+            "results": [{"image": image_path, "result": result_path, **report}
+                        for image_path, result_path, report in reports]
+        }, output, indent=2)
+        output.write("\n")
+        return
+    writer = csv.writer(output)
+    writer.writerow(["image", "result", "algorithm_type", "algorithm_sub_type", "cores", "bands", "first_band_seconds",
+                     "seconds"])
+    for image_path, result_path, report in reports:
+        writer.writerow([image_path, result_path, settings.algorithm_type, settings.algorithm_sub_type,
+                         max(settings.cpu_core_sets), report["bands"], f"{report['first band']:.6f}",
+                         f"{report['seconds']:.6f}"])
+
+
+def write_batch_report(report: BatchReport, settings: BenchmarkSettings, output_format: str, output) -> None:
+    """
+    Writes the batch report in a machine-readable format.
+    :param report: The batch report.
+    :param settings: The benchmark settings.
+    :param output_format: One of the output formats.
+    :param output: The text stream to write to.
+    :return:
+    """
+    if output_format == "json":
+        json.dump({"settings": settings.describe(), "images": report.images, "megapixels": report.megapixels,
+                   "throughput": report.throughput, "details": report.details}, output, indent=2)
+        output.write("\n")
+        return
+    writer = csv.writer(output)
+    writer.writerow(["algorithm_type", "algorithm_sub_type", "images", "megapixels", "configuration", "strategy",
+                     "seconds", "images_per_second", "megapixels_per_second"])
+    for config_label, strategies in report.throughput.items():
+        for strategy, throughput in strategies.items():
+            writer.writerow([settings.algorithm_type, settings.algorithm_sub_type, report.images,
+                             f"{report.megapixels:.6f}", config_label, strategy, f"{throughput['seconds']:.6f}",
+                             f"{throughput['images_per_second']:.6f}", f"{throughput['megapixels_per_second']:.6f}"])
+
+
+def write_pipeline_reports(reports: list[tuple[str, PipelineReport]], steps: list[PipelineStep],
+                           settings: BenchmarkSettings, output_format: str, output) -> None:
+    """
+    Writes the pipeline reports in a machine-readable format.
+    :param reports: The (image path, pipeline report) pairs.
+    :param steps: The pipeline steps.
+    :param settings: The benchmark settings.
+    :param output_format: One of the output formats.
+    :param output: The text stream to write to.
+    :return:
+    """
+    if output_format == "json":
+        json.dump({
+            "settings": settings.describe(),
+            "steps": [step.describe() for step in steps],
+            "results": [{"image": image_path, "fused": report.fused, "naive": report.naive, "stages": report.stages,
+                         "details": report.details}
+                        for image_path, report in reports]
+        }, output, indent=2)
+        output.write("\n")
+        return
+    stage_labels: list[str] = [step.label(index) for index, step in enumerate(steps)]
+    writer = csv.writer(output)
+    writer.writerow(["image", "division_mode", "tiles_per_worker", "configuration", "fused_seconds", "naive_seconds",
+                     "fusion_speedup", *[f"stage_{stage_label}_seconds" for stage_label in stage_labels]])
+    for image_path, report in reports:
+        for config_label, fused_seconds in report.fused.items():
+            naive_seconds: float = report.naive[config_label]
+            writer.writerow([image_path, settings.division_mode, settings.tiles_per_worker, config_label,
+                             f"{fused_seconds:.6f}", f"{naive_seconds:.6f}",
+                             f"{naive_seconds / fused_seconds:.6f}" if fused_seconds > 0 else "",
+                             *[f"{report.stages[config_label][stage_label]:.6f}" for stage_label in stage_labels]])
+
+
+def main(arguments: list[str] | None = None) -> int:
+    """
+    Runs the benchmark described by the command line arguments on every given image.
+    :param arguments: The arguments to parse, the process ones if None.
+    :return: The exit code.
+    """
+    parsed: argparse.Namespace = parse_arguments(arguments)
+    if parsed.list:
+        print(list_algorithms())
+        return 0
+    if not parsed.images or (parsed.algorithm is None and not parsed.step):
+        print("At least an image and --algorithm, or --step, are required, use --help for the usage.",
+              file=sys.stderr)
+        return 2
+    if parsed.step and (parsed.batch or parsed.stream):
+        print("Pipelines can not be run with --batch or --stream.", file=sys.stderr)
+        return 2
+    try:
+        settings: BenchmarkSettings = build_settings(parsed)
+        pipeline_steps: list[PipelineStep] = parse_steps(parsed.step)
+    except ValueError as error:
+        print(error, file=sys.stderr)
+        return 2
+    if parsed.stream and (parsed.result_dir is None or parsed.band_rows < 1 or
+                          (parsed.bands_in_flight is not None and parsed.bands_in_flight < 1)):
+        print("--stream requires --result-dir, and positive band rows and bands in flight.", file=sys.stderr)
+        return 2
+    if settings.out_of_core_directory is not None:
+        # Out-of-core inputs are expected to be larger than the decompression bomb guard
+        Image.MAX_IMAGE_PIXELS = None
+    if parsed.cache_size < 1:
+        print("The cache size must be positive.", file=sys.stderr)
+        return 2
+    try:
+        bench_runner: BenchmarkRunner = BenchmarkRunner(
+            result_cache.ResultCache(parsed.cache, parsed.cache_size * 2 ** 20) if parsed.cache is not None else None)
+    except PermissionError as error:
+        print(error, file=sys.stderr)
+        return 2
+    if parsed.batch:
+        image_paths: list[Path] = batch.collect_images([str(image_path) for image_path in parsed.images])
+        if not image_paths:
+            print("No image found in the given files, directories and patterns.", file=sys.stderr)
+            return 2
+        try:
+            batch_report: BatchReport | None = bench_runner.run_batch(
+                [str(image_path) for image_path in image_paths], settings,
+                lambda text: print(f"batch of {len(image_paths)}: {text}", file=sys.stderr))
+        except KeyboardInterrupt:
+            return 130
+        finally:
+            bench_runner.shutdown()
+        if batch_report is None:
+            return 1
+        if parsed.output is None:
+            write_batch_report(batch_report, settings, parsed.format, sys.stdout)
+        else:
+            with open(parsed.output, "w", newline="") as output:
+                write_batch_report(batch_report, settings, parsed.format, output)
+        return 0
+    reports: list[tuple[str, BenchmarkReport]] = []
+    stream_reports: list[tuple[str, str, dict[str, object]]] = []
+    pipeline_reports: list[tuple[str, PipelineReport]] = []
+    try:
+        for image_path in parsed.images:
+            # The warm worker pool is shared by every image of the batch
+            image: Image.Image = Image.open(image_path)
+            if settings.out_of_core_directory is None:
+                image = image.convert("RGB")
+            if parsed.stream:
+                parsed.result_dir.mkdir(parents=True, exist_ok=True)
+                result_path: Path = parsed.result_dir / f"{image_path.stem}_result.png"
+                stream_report: dict[str, object] | None = bench_runner.stream(
+                    image, settings, str(result_path), parsed.band_rows,
+                    parsed.bands_in_flight or 2 * max(settings.cpu_core_sets),
+                    lambda text: print(f"{image_path.name}: {text}", file=sys.stderr))
+                if stream_report is None:
+                    return 1
+                stream_reports.append((str(image_path), str(result_path), stream_report))
+                continue
+            if pipeline_steps:
+                pipeline_report: PipelineReport | None = bench_runner.run_pipeline(
+                    image, pipeline_steps, settings, lambda text: print(f"{image_path.name}: {text}", file=sys.stderr))
+                if pipeline_report is None:
+                    return 1
+                pipeline_reports.append((str(image_path), pipeline_report))
+                if parsed.result_dir is not None:
+                    parsed.result_dir.mkdir(parents=True, exist_ok=True)
+                    pipeline_report.result_image.save(parsed.result_dir / f"{image_path.stem}_result.png")
+                continue
+            report: BenchmarkReport | None = bench_runner.run(
+                image, settings, lambda text: print(f"{image_path.name}: {text}", file=sys.stderr))
+            if report is None:
+                return 1
+            reports.append((str(image_path), report))
+            if report.result_spec is not None:
+                # The out-of-core result is written out of its mapped file band by band, then the file is removed
+                try:
+                    if parsed.result_dir is not None:
+                        parsed.result_dir.mkdir(parents=True, exist_ok=True)
+                        mapped_image.write_mapped_png(report.result_spec,
+                                                      str(parsed.result_dir / f"{image_path.stem}_result.png"))
+                finally:
+                    mapped_image.release_mapped_image(report.result_spec)
+            elif parsed.result_dir is not None:
+                parsed.result_dir.mkdir(parents=True, exist_ok=True)
+                report.result_image.save(parsed.result_dir / f"{image_path.stem}_result.png")
+    except KeyboardInterrupt:
+        return 130
+    finally:
+        bench_runner.shutdown()
+    if parsed.stream:
+        write_function: callable = lambda output: write_stream_reports(stream_reports, settings, parsed.format, output)
+    elif pipeline_steps:
+        write_function: callable = lambda output: write_pipeline_reports(pipeline_reports, pipeline_steps, settings,
+                                                                         parsed.format, output)
+    else:
+        write_function: callable = lambda output: write_reports(reports, settings, parsed.format, output)
+    if parsed.output is None:
+        write_function(sys.stdout)
+    else:
+        with open(parsed.output, "w", newline="") as output:
+            write_function(output)
+    return 0
+
+
+if __name__ == "__main__":
+    if getattr(sys, 'frozen', False):
+        multiprocessing.freeze_support()
+    sys.exit(main())
@@ -0,0 +1,38 @@
+import glob
+from pathlib import Path
+from PIL import Image
+
+# How the workers share a batch of images: one whole image per task, the tiles of one image at a time, or the tiles
+# of several images queued together so that the next image fills the workers left idle by the previous one
+batch_strategies: list[str] = ["inter-image", "intra-image", "hybrid"]
+image_extensions: list[str] = [".png", ".jpg", ".jpeg", ".bmp", ".tif", ".tiff"]
+
+
+def collect_images(inputs: list[str]) -> list[Path]:
+    """
+    Collects the images of a batch out of files, directories and glob patterns.
+    :param inputs: The files, the directories, whose images are taken, and the glob patterns.
+    :return: The image paths, sorted and without duplicates.
+    """
+    paths: set[Path] = set()
+    for entry in inputs:
+        if any(character in entry for character in "*?["):
+            paths.update(Path(path) for path in glob.glob(entry, recursive=True))
+        elif Path(entry).is_dir():
+            paths.update(path for path in Path(entry).iterdir())
+        else:
+            paths.add(Path(entry))
+    return sorted(path for path in paths if path.suffix.lower() in image_extensions and path.is_file())
+
+
+def run_image_file(benchmark: callable, image_path: str, parameters: tuple) -> Image.Image:
+    """
+    Worker side of the inter-image strategy: loads a whole image from its file and runs the benchmark on it, so that
+    only the path crosses the process boundary on the way in.
+    :param benchmark: The benchmark function, called as benchmark(image, *parameters).
+    :param image_path: The path of the image.
+    :param parameters: The benchmark parameters following the image.
+    :return: The processed image.
+    """
+    with Image.open(image_path) as image:
+        return benchmark(image.convert("RGB"), *parameters)
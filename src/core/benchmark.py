@@ -0,0 +1,861 @@
+import math
+import os
+import time
+import numpy as np
+from PIL import Image
+
+from ..algorithms import convolution
+from . import batch, mapped_image, pipeline, quality, result_cache, runners, shared_image, streaming, tiling, timing
+from .result_cache import ResultCache
+from .worker_pool import WarmWorkerPool, summarize_load_balance
+
+# Phases of a run: the phases between split and merge are the ones of the timed execution, "idle and IPC" being
+# what the other phases leave of it
+phases: list[str] = ["split", "serialize", "compute", "transfer back", "merge", "idle and IPC"]
+
+
+class BenchmarkSettings:
+    algorithm_type: str
+    algorithm_sub_type: str
+    algorithm_params: dict[str, object]
+    cpu_core_sets: list[int]
+    division_mode: str
+    use_shared_memory: bool
+    tiles_per_worker: int
+    warmup_runs: int
+    repeat_runs: int
+    out_of_core_directory: str | None
+    bypass_cache: bool
+
+    def __init__(self, algorithm_type: str, algorithm_sub_type: str = "",
+                 algorithm_params: dict[str, object] | None = None, cpu_core_sets: list[int] | None = None,
+                 division_mode: str = tiling.division_modes[0], use_shared_memory: bool = False,
+                 tiles_per_worker: int = 1, warmup_runs: int = 1, repeat_runs: int = 5,
+                 out_of_core_directory: str | None = None, bypass_cache: bool = False):
+        """
+        Initializes the settings of a benchmark.
+        :param algorithm_type: The algorithm type.
+        :param algorithm_sub_type: The algorithm sub type, empty if the algorithm has none.
+        :param algorithm_params: The algorithm parameters values, keyed by name.
+        :param cpu_core_sets: The CPU core sets to benchmark. 1 is the in-process serial baseline.
+        :param division_mode: One of the tiling division modes.
+        :param use_shared_memory: Whether tiles are dispatched through shared memory instead of being pickled.
+        :param tiles_per_worker: The over-decomposition factor of the parallel configurations.
+        :param warmup_runs: The untimed runs of every configuration, done before the timed ones.
+        :param repeat_runs: The timed runs of every configuration.
+        :param out_of_core_directory: The directory of the memory-mapped source and result files of the out-of-core
+        dispatch, which takes over the other dispatches. None keeps the images in memory.
+        :param bypass_cache: Whether the serial baseline is measured again instead of being read from the result
+        cache, which is still refreshed with the new measurement.
+        """
+        self.algorithm_type = algorithm_type
+        self.algorithm_sub_type = algorithm_sub_type
+        self.algorithm_params = algorithm_params if algorithm_params else {}
+        self.cpu_core_sets = sorted(set(cpu_core_sets)) if cpu_core_sets else [1]
+        self.division_mode = division_mode
+        self.use_shared_memory = use_shared_memory
+        self.tiles_per_worker = tiles_per_worker
+        self.warmup_runs = warmup_runs
+        self.repeat_runs = max(repeat_runs, 1)
+        self.out_of_core_directory = out_of_core_directory
+        self.bypass_cache = bypass_cache
+
+    def describe(self) -> dict[str, object]:
+        """
+        Describes the settings with plain values.
+        :return: The settings, keyed by name.
+        """
+        return {
+            "algorithm_type": self.algorithm_type,
+            "algorithm_sub_type": self.algorithm_sub_type,
+            "algorithm_params": self.algorithm_params,
+            "cpu_core_sets": self.cpu_core_sets,
+            "division_mode": self.division_mode,
+            "use_shared_memory": self.use_shared_memory,
+            "tiles_per_worker": self.tiles_per_worker,
+            "warmup_runs": self.warmup_runs,
+            "repeat_runs": self.repeat_runs,
+            "out_of_core_directory": self.out_of_core_directory,
+            "bypass_cache": self.bypass_cache
+        }
+
+
+class BenchmarkReport:
+    # Median seconds of every configuration
+    timestamps: dict[str, float]
+    # Summary of the repeated runs of every configuration, see timing.summarize_samples
+    statistics: dict[str, dict[str, float]]
+    # Median seconds spent in each phase by every configuration
+    phases: dict[str, dict[str, float]]
+    details: dict[str, str]
+    # PSNR and SSIM of the result against the exact algorithm, only for the approximate sub types
+    quality: dict[str, float]
+    # Hits, misses, evictions, entries and bytes of the result cache, only when the runner has one
+    cache: dict[str, int]
+    # The configurations whose timings were reused from the result cache instead of being measured
+    cached: list[str]
+    # The result image, None for the out-of-core dispatch, whose result stays in its memory-mapped file
+    result_image: Image.Image | None
+    # The memory-mapped result of the out-of-core dispatch, to be released by the caller
+    result_spec: mapped_image.MappedImageSpec | None
+
+    def __init__(self):
+        """
+        Initializes an empty benchmark report.
+        """
+        self.timestamps = {}
+        self.statistics = {}
+        self.phases = {}
+        self.details = {}
+        self.quality = {}
+        self.cache = {}
+        self.cached = []
+        self.result_image = None
+        self.result_spec = None
+
+
+class BatchReport:
+    images: int
+    megapixels: float
+    # Median seconds, images per second and megapixels per second of every strategy of every configuration
+    throughput: dict[str, dict[str, dict[str, float]]]
+    details: dict[str, str]
+
+    def __init__(self):
+        """
+        Initializes an empty batch report.
+        """
+        self.images = 0
+        self.megapixels = 0.0
+        self.throughput = {}
+        self.details = {}
+
+
+class PipelineReport:
+    # Median seconds of every configuration, with the stages fused in the workers and run one by one
+    fused: dict[str, float]
+    naive: dict[str, float]
+    # Median seconds spent in each stage of the fused runs by every configuration
+    stages: dict[str, dict[str, float]]
+    details: dict[str, str]
+    result_image: Image.Image | None
+
+    def __init__(self):
+        """
+        Initializes an empty pipeline report.
+        """
+        self.fused = {}
+        self.naive = {}
+        self.stages = {}
+        self.details = {}
+        self.result_image = None
+
+
+def get_config_label(cpu_set: int) -> str:
+    """
+    Returns the label of a benchmarked configuration.
+    :param cpu_set: The CPU core set.
+    :return: The configuration label.
+    """
+    return "Serial" if cpu_set == 1 else f"P ({cpu_set})"
+
+
+def get_config_cores(config_label: str) -> int:
+    """
+    Returns the CPU core set of a benchmarked configuration.
+    :param config_label: The configuration label, as returned by get_config_label.
+    :return: The CPU core set.
+    """
+    if config_label == "Serial":
+        return 1
+    return int(config_label[config_label.index("(") + 1:config_label.index(")")])
+
+
+class BenchmarkRunner:
+    _worker_pool: WarmWorkerPool | None = None
+    _result_cache: ResultCache | None = None
+    _interrupt_signal: bool = False
+
+    def __init__(self, result_cache: ResultCache | None = None):
+        """
+        Initializes a benchmark runner.
+        :param result_cache: The cache of the serial baseline and its result, None disables it.
+        """
+        self._result_cache = result_cache
+
+    def set_result_cache(self, result_cache: ResultCache | None) -> None:
+        """
+        Sets the cache the serial baseline and its result are reused from.
+        :param result_cache: The result cache, None disables it.
+        :return:
+        """
+        self._result_cache = result_cache
+
+    def interrupt(self) -> None:
+        """
+        Asks the running benchmark to stop as soon as possible.
+        :return:
+        """
+        self._interrupt_signal = True
+
+    def is_interrupting(self) -> bool:
+        """
+        Returns whether an interrupt was requested and the running benchmark has not stopped yet.
+        :return: A boolean value indicating whether the benchmark is being interrupted.
+        """
+        return self._interrupt_signal
+
+    def shutdown(self) -> None:
+        """
+        Stops the warm worker pool, if any.
+        :return:
+        """
+        if self._worker_pool is not None:
+            self._worker_pool.terminate()
+            self._worker_pool = None
+
+    def run(self, image: Image.Image, settings: BenchmarkSettings,
+            on_progress: callable = lambda text: None) -> BenchmarkReport | None:
+        """
+        Runs the benchmark of every configuration of the settings on the given image.
+        :param image: The image to process.
+        :param settings: The benchmark settings.
+        :param on_progress: Called with a status text every time the benchmark moves on.
+        :return: The timings, details and result image, or None if the benchmark was interrupted. The out-of-core
+        result is left in its memory-mapped file instead, whose spec the report carries.
+        """
+        self._interrupt_signal = False
+        report: BenchmarkReport = BenchmarkReport()
+        runners.prepare_algorithm(settings.algorithm_sub_type, settings.algorithm_params)
+        benchmark: callable = runners.get_runner(settings.algorithm_type, settings.algorithm_sub_type)
+        parameters: tuple = runners.get_runner_parameters(settings.algorithm_type, settings.algorithm_sub_type,
+                                                          settings.algorithm_params)
+        halo: int = runners.get_algorithm_halo(settings.algorithm_type, settings.algorithm_sub_type,
+                                               settings.algorithm_params)
+        # Hashing an out-of-core image would load it whole, it is never cached
+        cache: ResultCache | None = self._result_cache if settings.out_of_core_directory is None else None
+        content_parts: tuple = ()
+        if cache is not None:
+            on_progress("Hashing the image...")
+            cache.reset_statistics()
+            content_parts = (result_cache.image_digest(image), result_cache.describe_algorithm(
+                settings.algorithm_type, settings.algorithm_sub_type, settings.algorithm_params))
+        shared_blocks: list = []
+        mapped_specs: list[mapped_image.MappedImageSpec] = []
+        if settings.out_of_core_directory is not None:
+            # The source is decoded once into a mapped file, workers map their tile and write into the result file
+            on_progress("Mapping the image to disk...")
+            source_spec = mapped_image.allocate_mapped_image(image.size, settings.out_of_core_directory, image)
+            result_spec = mapped_image.allocate_mapped_image(image.size, settings.out_of_core_directory)
+            mapped_specs = [source_spec, result_spec]
+            report.details["Dispatch"] = (f"tile coordinates over memory-mapped files in "
+                                          f"{settings.out_of_core_directory}")
+        elif settings.use_shared_memory:
+            # The source image lives once in shared memory for every configuration, workers only get coordinates
+            source_block, source_spec = shared_image.allocate_shared_image(image.size, image)
+            result_block, result_spec = shared_image.allocate_shared_image(image.size)
+            shared_blocks = [source_block, result_block]
+            report.details["Dispatch"] = "tile coordinates over shared memory"
+        else:
+            report.details["Dispatch"] = "pickled sub-images"
+        merged_pass: callable | None = None
+        if mapped_specs and settings.algorithm_sub_type in runners.merged_passes:
+            report.details["Merged pass"] = ("run tile by tile out of core, the image is never loaded whole: "
+                                             "not pixel-identical to a whole-image run")
+        elif settings.algorithm_sub_type in runners.merged_passes:
+            # Tiles stop before the pass reading the whole image, which runs once on the merged result
+            benchmark, merged_pass = runners.get_tile_runner(settings.algorithm_type, settings.algorithm_sub_type)
+            report.details["Merged pass"] = "run once on the merged image in this process, timed as the merge"
+        pool_ready: bool = False
+        try:
+            for index, cpu_set in enumerate(settings.cpu_core_sets):
+                config_label: str = get_config_label(cpu_set)
+                # Out of core, the tiles are bounded so that no process, the serial baseline included, holds the image
+                layout: tiling.TileLayout = self._plan_sub_images(
+                    image, cpu_set, settings, halo, mapped_image.max_tile_pixels if mapped_specs else None)
+                is_last: bool = index == len(settings.cpu_core_sets) - 1
+                if cache is not None and cpu_set == 1:
+                    # Only the serial baseline is reused, the parallel configurations are what the benchmark
+                    # measures and always run. It does not depend on the division mode nor the tiles per worker
+                    config_key: str = cache.make_key("configuration", *content_parts, layout, cpu_set,
+                                                     settings.use_shared_memory, settings.warmup_runs,
+                                                     settings.repeat_runs)
+                    if not settings.bypass_cache and self._load_cached_configuration(
+                            cache, config_key, config_label, content_parts, layout, image.size, is_last, report):
+                        report.cached.append(config_label)
+                        continue
+                if cpu_set > 1 and not pool_ready:
+                    # The warm pool is started once, outside the timings, and reused by every configuration
+                    self._ensure_worker_pool(max(settings.cpu_core_sets), report.details, on_progress)
+                    pool_ready = True
+                if mapped_specs:
+                    task: callable = mapped_image.run_mapped_tile
+                elif settings.use_shared_memory:
+                    task: callable = shared_image.run_shared_tile
+                else:
+                    task: callable = benchmark
+                config_details: dict[str, str] = self._get_bench_details(config_label, settings, layout, halo)
+                report.details.update(config_details)
+                # The clock of a run starts once the arguments are packaged, splitting and merging are timed apart
+                # as phases. Warm-up runs are not timed
+                samples: list[float] = []
+                phase_samples: dict[str, list[float]] = {phase: [] for phase in phases}
+                for run in range(settings.warmup_runs + settings.repeat_runs):
+                    run_label: str = (f"warm-up {run + 1}/{settings.warmup_runs}" if run < settings.warmup_runs else
+                                      f"run {run - settings.warmup_runs + 1}/{settings.repeat_runs}")
+                    on_progress(f"Running benchmark with {cpu_set} CPU core(s), {run_label}...")
+                    if mapped_specs or settings.use_shared_memory:
+                        args, split_time = timing.measure(
+                            lambda: [(benchmark, source_spec, result_spec, box, crop_box, parameters)
+                                     for box, crop_box in layout])
+                    else:
+                        args, split_time = timing.measure(
+                            lambda: [(sub_image, *parameters) for sub_image in tiling.crop_tiles(image, layout)])
+                    results, seconds = timing.measure(lambda: self._execute(task, args, cpu_set, settings))
+                    if self._interrupt_signal:
+                        if results is None:
+                            self._worker_pool = None
+                        return None
+                    if mapped_specs:
+                        # The result is already in place in its file, it is only read back once for the report
+                        result_image, merge_time = None, 0.0
+                    elif settings.use_shared_memory:
+                        result_image, merge_time = timing.measure(lambda: shared_image.read_shared_image(result_spec))
+                    elif len(results) == 1:
+                        result_image, merge_time = results[0], 0.0
+                    else:
+                        result_image, merge_time = timing.measure(
+                            lambda: tiling.merge_tiles(results, layout, image.size))
+                    if merged_pass is not None:
+                        result_image, pass_time = timing.measure(lambda: merged_pass(result_image))
+                        merge_time += pass_time
+                    if run >= settings.warmup_runs:
+                        samples.append(seconds)
+                        run_phases: dict[str, float] = self._get_execution_phases(cpu_set, seconds)
+                        run_phases["split"] = split_time
+                        run_phases["merge"] = merge_time
+                        for phase in phases:
+                            phase_samples[phase].append(run_phases[phase])
+                report.statistics[config_label] = timing.summarize_samples(samples)
+                report.timestamps[config_label] = report.statistics[config_label]["median"]
+                report.phases[config_label] = {phase: float(np.median(phase_samples[phase])) for phase in phases}
+                if cpu_set > 1:
+                    load_balance: dict[str, float] = summarize_load_balance(self._worker_pool.last_task_times,
+                                                                            self._worker_pool.last_busy_times,
+                                                                            seconds, cpu_set)
+                    config_details[f"Load balance {config_label}"] = (
+                        f"{len(args)} tiles, busy {load_balance['busy']:.2f}s, idle {load_balance['idle']:.2f}s, "
+                        f"utilization {load_balance['utilization'] * 100:.0f}%, "
+                        f"{load_balance['static_gain']:.2f}x estimated gain over static partitioning")
+                    report.details[f"Load balance {config_label}"] = config_details[f"Load balance {config_label}"]
+                if cache is not None and cpu_set == 1:
+                    on_progress("Caching the serial baseline...")
+                    cache.store_json(config_key, {"statistics": report.statistics[config_label],
+                                                  "phases": report.phases[config_label], "details": config_details})
+                    for box, crop_box in layout:
+                        cache.store_image(cache.make_key("tile", *content_parts, box, crop_box), result_image.crop(box))
+                if is_last and mapped_specs:
+                    # Loading the result back would need as much memory as the in-core dispatches
+                    report.result_spec = result_spec
+                elif is_last:
+                    report.result_image = result_image
+            if settings.algorithm_sub_type in runners.approximated_sub_types and mapped_specs:
+                report.details["Quality vs exact"] = "not rated out of core, the images are never loaded whole"
+            elif settings.algorithm_sub_type in runners.approximated_sub_types:
+                on_progress("Rating the approximation against the exact algorithm...")
+                quality_key: str = cache.make_key("quality", *content_parts, layout) if cache is not None else ""
+                cached_quality: dict[str, float] | None = (cache.load_json(quality_key)
+                                                           if cache is not None and not settings.bypass_cache else None)
+                report.quality = cached_quality or self._rate_approximation(image, report.result_image, settings)
+                if cache is not None and cached_quality is None:
+                    cache.store_json(quality_key, report.quality)
+                report.details["Quality vs exact"] = (
+                    f"{report.quality['psnr']:.2f} dB PSNR, {report.quality['ssim']:.4f} SSIM against the "
+                    f"{runners.approximated_sub_types[settings.algorithm_sub_type]}")
+            if cache is not None:
+                report.cache = cache.statistics()
+                report.details["Result cache"] = (
+                    f"hits {report.cache['hits']}, misses {report.cache['misses']}, "
+                    f"evictions {report.cache['evictions']}, {report.cache['entries']} entries "
+                    f"({report.cache['bytes'] / 2 ** 20:.1f} MB), " +
+                    ("bypassed for measurement" if settings.bypass_cache else
+                     "serial baseline reused, not measured by this run" if report.cached else
+                     "serial baseline measured by this run"))
+        finally:
+            for shared_block in shared_blocks:
+                shared_image.release_shared_image(shared_block)
+            for mapped_spec in mapped_specs:
+                if mapped_spec is not report.result_spec:
+                    mapped_image.release_mapped_image(mapped_spec)
+            self._interrupt_signal = False
+        return report
+
+    def stream(self, image: Image.Image, settings: BenchmarkSettings, output_path: str, band_rows: int,
+               bands_in_flight: int, on_progress: callable = lambda text: None) -> dict[str, object] | None:
+        """
+        Runs the algorithm on horizontal bands of the image, top to bottom, and writes every finished band to a PNG
+        file as soon as the bands above it are written. At most bands_in_flight bands are cropped, processed or
+        waiting to be written at once, so the memory does not grow with the image and the first rows land early.
+        The bands run on the largest CPU core set of the settings, in this process for a single core.
+        :param image: The image to process.
+        :param settings: The benchmark settings.
+        :param output_path: The path of the PNG file to write.
+        :param band_rows: The rows of every band.
+        :param bands_in_flight: The maximum number of bands in flight.
+        :param on_progress: Called with a status text every time the stream moves on.
+        :return: The "bands", the seconds to the "first band", the total "seconds" and the "details", or None if the
+        stream was interrupted.
+        """
+        self._interrupt_signal = False
+        runners.prepare_algorithm(settings.algorithm_sub_type, settings.algorithm_params)
+        benchmark: callable = runners.get_runner(settings.algorithm_type, settings.algorithm_sub_type)
+        parameters: tuple = runners.get_runner_parameters(settings.algorithm_type, settings.algorithm_sub_type,
+                                                          settings.algorithm_params)
+        halo: int = runners.get_algorithm_halo(settings.algorithm_type, settings.algorithm_sub_type,
+                                               settings.algorithm_params)
+        width, height = image.size
+        layout: tiling.TileLayout = streaming.plan_bands(width, height, band_rows, halo)
+        # Bands are cropped lazily, only when a slot frees up
+        args = ((benchmark, image.crop(crop_box), box, crop_box, parameters) for box, crop_box in layout)
+        cpu_set: int = max(settings.cpu_core_sets)
+        if cpu_set > 1:
+            self._ensure_worker_pool(cpu_set, {}, on_progress)
+            bands = self._worker_pool.imap_bounded(streaming.run_band, args, bands_in_flight, self.is_interrupting)
+        else:
+            bands = (streaming.run_band(*arguments) for arguments in args)
+        first_band_time: float = 0.0
+        written_bands: int = 0
+        completed: bool = False
+        start_time: int = time.perf_counter_ns()
+        try:
+            with open(output_path, "wb") as output:
+                writer: streaming.PngRowWriter = streaming.PngRowWriter(output, width, height)
+                for band_array in bands:
+                    writer.write_rows(band_array)
+                    written_bands += 1
+                    if written_bands == 1:
+                        first_band_time = (time.perf_counter_ns() - start_time) / 1e9
+                    on_progress(f"Streamed band {written_bands}/{len(layout)}...")
+                    if self._interrupt_signal:
+                        break
+                if written_bands == len(layout):
+                    writer.close()
+                    completed = True
+        finally:
+            if self._interrupt_signal and cpu_set > 1:
+                self._worker_pool.terminate()
+                self._worker_pool = None
+            self._interrupt_signal = False
+            if not completed and os.path.exists(output_path):
+                # Interrupted or failed, the partial file is not a valid image
+                os.remove(output_path)
+        if not completed:
+            return None
+        details: dict[str, str] = {}
+        if settings.algorithm_sub_type in runners.merged_passes:
+            # The first bands are written before the last ones exist, a pass over the whole image can not run
+            details["Merged pass"] = "run band by band: not pixel-identical to a whole-image run"
+        return {"bands": len(layout), "first band": first_band_time,
+                "seconds": (time.perf_counter_ns() - start_time) / 1e9, "details": details}
+
+    def run_pipeline(self, image: Image.Image, steps: list[pipeline.PipelineStep], settings: BenchmarkSettings,
+                     on_progress: callable = lambda text: None) -> PipelineReport | None:
+        """
+        Runs a pipeline of steps on the given image for every configuration, twice: fused, every tile carrying the
+        cumulative halo of the steps and going through all of them in one worker, and naive, one split, execution
+        and merge per step. Only the fused stages are timed one by one, in the workers.
+        :param image: The image to process.
+        :param steps: The pipeline steps, in order.
+        :param settings: The benchmark settings, whose algorithm is ignored.
+        :param on_progress: Called with a status text every time the benchmark moves on.
+        :return: The timings of both executions, the stage timings and the fused result, or None if the benchmark
+        was interrupted.
+        """
+        self._interrupt_signal = False
+        report: PipelineReport = PipelineReport()
+        stages, halos = pipeline.prepare_pipeline(steps)
+        stage_labels: list[str] = [step.label(index) for index, step in enumerate(steps)]
+        report.details["Cumulative halo"] = f"{sum(halos)}px ({' + '.join(str(halo) for halo in halos)})"
+        # The naive execution merges every stage, so the stages reading the whole image run their pass there
+        tile_runners: list[tuple[callable, callable | None]] = [
+            runners.get_tile_runner(step.algorithm_type, step.algorithm_sub_type) for step in steps]
+        naive_stages: list[tuple[callable, tuple, callable | None]] = [
+            (tile_runner if merged_pass is not None else benchmark, parameters, merged_pass)
+            for (tile_runner, merged_pass), (benchmark, parameters) in zip(tile_runners, stages)]
+        for stage_label, (_, merged_pass) in zip(stage_labels, tile_runners):
+            if merged_pass is not None:
+                report.details[f"Merged pass {stage_label}"] = (
+                    "run once per stage by the naive execution, tile by tile by the fused one: not pixel-identical "
+                    "to a whole-image run when fused")
+        try:
+            if max(settings.cpu_core_sets) > 1:
+                self._ensure_worker_pool(max(settings.cpu_core_sets), report.details, on_progress)
+            for cpu_set in settings.cpu_core_sets:
+                config_label: str = get_config_label(cpu_set)
+                layout: tiling.TileLayout = self._plan_sub_images(image, cpu_set, settings, sum(halos))
+                fused_samples: list[float] = []
+                naive_samples: list[float] = []
+                stage_samples: dict[str, list[float]] = {stage_label: [] for stage_label in stage_labels}
+                for run in range(settings.warmup_runs + settings.repeat_runs):
+                    run_label: str = (f"warm-up {run + 1}/{settings.warmup_runs}" if run < settings.warmup_runs else
+                                      f"run {run - settings.warmup_runs + 1}/{settings.repeat_runs}")
+                    on_progress(f"Running the pipeline with {cpu_set} CPU core(s), {run_label}...")
+                    fused_image, fused_seconds, stage_times = self._run_fused_pipeline(image, stages, layout, cpu_set,
+                                                                                       settings)
+                    if fused_image is None:
+                        return None
+                    naive_image, naive_seconds = self._run_naive_pipeline(image, naive_stages, halos, cpu_set,
+                                                                          settings)
+                    if naive_image is None:
+                        return None
+                    if run >= settings.warmup_runs:
+                        fused_samples.append(fused_seconds)
+                        naive_samples.append(naive_seconds)
+                        for stage_label, stage_time in zip(stage_labels, stage_times):
+                            stage_samples[stage_label].append(stage_time)
+                report.fused[config_label] = float(np.median(fused_samples))
+                report.naive[config_label] = float(np.median(naive_samples))
+                report.stages[config_label] = {stage_label: float(np.median(stage_samples[stage_label]))
+                                               for stage_label in stage_labels}
+                if len(layout) > 1:
+                    report.details[f"Halo overhead {config_label}"] = (
+                        f"+{tiling.halo_overhead(layout) * 100:.1f}% pixels processed by the fused pipeline")
+                report.details[f"Fused matches naive {config_label}"] = str(np.array_equal(
+                    np.asarray(fused_image.convert("RGB")), np.asarray(naive_image.convert("RGB"))))
+                report.result_image = fused_image
+        finally:
+            self._interrupt_signal = False
+        return report
+
+    def _run_fused_pipeline(self, image: Image.Image, stages: list[pipeline.PreparedStage],
+                            layout: tiling.TileLayout, cpu_set: int,
+                            settings: BenchmarkSettings) -> tuple[Image.Image | None, float, list[float]]:
+        """
+        Runs every stage of a pipeline tile by tile in the workers, with a single split and merge.
+        :param image: The image to process.
+        :param stages: The prepared stages.
+        :param layout: The sub-images layout, with the cumulative halo.
+        :param cpu_set: The CPU core set.
+        :param settings: The benchmark settings.
+        :return: The result, None if interrupted, the seconds and the seconds of every stage, averaged over the
+        active workers.
+        """
+        def execute() -> Image.Image | None:
+            args: list[tuple] = [(stages, sub_image) for sub_image in tiling.crop_tiles(image, layout)]
+            results: list | None = self._execute(pipeline.run_pipeline_tile, args, cpu_set, settings)
+            if results is None:
+                return None
+            stage_times.extend(sum(tile_times) / cpu_set for tile_times in zip(*[times for _, times in results]))
+            if len(results) == 1:
+                return results[0][0]
+            return tiling.merge_tiles([sub_image for sub_image, _ in results], layout, image.size)
+
+        stage_times: list[float] = []
+        result_image, seconds = timing.measure(execute)
+        if result_image is None:
+            self._worker_pool = None
+        return result_image, seconds, stage_times
+
+    def _run_naive_pipeline(self, image: Image.Image, stages: list[tuple], halos: list[int],
+                            cpu_set: int, settings: BenchmarkSettings) -> tuple[Image.Image | None, float]:
+        """
+        Runs the stages of a pipeline one by one, each one with its own split, execution and merge.
+        :param image: The image to process.
+        :param stages: The tile runner, its parameters and the pass to run on the merged image, if any, of every
+        stage.
+        :param halos: The halo of every stage.
+        :param cpu_set: The CPU core set.
+        :param settings: The benchmark settings.
+        :return: The result, None if interrupted, and the seconds.
+        """
+        def execute() -> Image.Image | None:
+            stage_image: Image.Image = image
+            for (benchmark, parameters, merged_pass), halo in zip(stages, halos):
+                layout: tiling.TileLayout = self._plan_sub_images(stage_image, cpu_set, settings, halo)
+                args: list[tuple] = [(sub_image, *parameters)
+                                     for sub_image in tiling.crop_tiles(stage_image, layout)]
+                results: list | None = self._execute(benchmark, args, cpu_set, settings)
+                if results is None:
+                    return None
+                stage_image = results[0] if len(results) == 1 else tiling.merge_tiles(results, layout,
+                                                                                       stage_image.size)
+                if merged_pass is not None:
+                    stage_image = merged_pass(stage_image)
+            return stage_image
+
+        result_image, seconds = timing.measure(execute)
+        if result_image is None:
+            self._worker_pool = None
+        return result_image, seconds
+
+    def run_batch(self, image_paths: list[str], settings: BenchmarkSettings,
+                  on_progress: callable = lambda text: None) -> BatchReport | None:
+        """
+        Runs the algorithm on a batch of images with every batch strategy of every parallel configuration, and the
+        serial baseline, which processes the images one by one in this process. Every run loads the images from
+        their files and ships the results back, as a real batch job does; the results are then dropped.
+        :param image_paths: The paths of the images.
+        :param settings: The benchmark settings. The warm-up runs are not used, as the pool is already warm.
+        :param on_progress: Called with a status text every time the batch moves on.
+        :return: The throughput of every strategy, or None if the batch was interrupted.
+        """
+        self._interrupt_signal = False
+        report: BatchReport = BatchReport()
+        runners.prepare_algorithm(settings.algorithm_sub_type, settings.algorithm_params)
+        benchmark: callable = runners.get_runner(settings.algorithm_type, settings.algorithm_sub_type)
+        parameters: tuple = runners.get_runner_parameters(settings.algorithm_type, settings.algorithm_sub_type,
+                                                          settings.algorithm_params)
+        halo: int = runners.get_algorithm_halo(settings.algorithm_type, settings.algorithm_sub_type,
+                                               settings.algorithm_params)
+        report.images = len(image_paths)
+        for image_path in image_paths:
+            # Only the header is read here
+            with Image.open(image_path) as image:
+                report.megapixels += image.size[0] * image.size[1] / 1e6
+        try:
+            if max(settings.cpu_core_sets) > 1:
+                self._ensure_worker_pool(max(settings.cpu_core_sets), report.details, on_progress)
+            for cpu_set in settings.cpu_core_sets:
+                config_label: str = get_config_label(cpu_set)
+                report.throughput[config_label] = {}
+                # A single core has nothing to share, the serial baseline stands for every strategy
+                for strategy in batch.batch_strategies[:1] if cpu_set == 1 else batch.batch_strategies:
+                    samples: list[float] = []
+                    for run in range(settings.repeat_runs):
+                        on_progress(f"Running the {strategy} strategy with {cpu_set} CPU core(s), "
+                                    f"run {run + 1}/{settings.repeat_runs}...")
+                        completed, seconds = timing.measure(lambda: self._run_batch_strategy(
+                            strategy, image_paths, cpu_set, settings, benchmark, parameters, halo))
+                        if not completed:
+                            if cpu_set > 1:
+                                self._worker_pool = None
+                            return None
+                        samples.append(seconds)
+                    median: float = float(np.median(samples))
+                    report.throughput[config_label][strategy] = {
+                        "seconds": median,
+                        "images_per_second": report.images / median if median > 0 else 0.0,
+                        "megapixels_per_second": report.megapixels / median if median > 0 else 0.0
+                    }
+                if cpu_set > 1:
+                    best_strategy: str = min(report.throughput[config_label],
+                                             key=lambda name: report.throughput[config_label][name]["seconds"])
+                    report.details[f"Best strategy {config_label}"] = best_strategy
+        finally:
+            self._interrupt_signal = False
+        return report
+
+    def _run_batch_strategy(self, strategy: str, image_paths: list[str], cpu_set: int, settings: BenchmarkSettings,
+                            benchmark: callable, parameters: tuple, halo: int) -> bool:
+        """
+        Processes every image of a batch once with the given strategy.
+        :param strategy: One of the batch strategies.
+        :param image_paths: The paths of the images.
+        :param cpu_set: The CPU core set, 1 runs in this process without the pool.
+        :param settings: The benchmark settings.
+        :param benchmark: The benchmark function.
+        :param parameters: The benchmark parameters following the image.
+        :param halo: The halo width in pixels.
+        :return: Whether every image was processed, False if the batch was interrupted.
+        """
+        if cpu_set == 1:
+            for image_path in image_paths:
+                if self._interrupt_signal:
+                    return False
+                batch.run_image_file(benchmark, image_path, parameters)
+            return True
+        if strategy == batch.batch_strategies[0]:
+            return self._worker_pool.starmap(batch.run_image_file,
+                                             [(benchmark, image_path, parameters) for image_path in image_paths],
+                                             cpu_set, self.is_interrupting) is not None
+        # The intra-image strategy waits for each image before the next one, the hybrid one queues the tiles of
+        # as many images as there are cores at once
+        group_size: int = 1 if strategy == batch.batch_strategies[1] else cpu_set
+        tile_runner, merged_pass = runners.get_tile_runner(settings.algorithm_type, settings.algorithm_sub_type)
+        for start in range(0, len(image_paths), group_size):
+            images: list[Image.Image] = []
+            for image_path in image_paths[start:start + group_size]:
+                with Image.open(image_path) as image:
+                    images.append(image.convert("RGB"))
+            layouts: list[tiling.TileLayout] = [self._plan_sub_images(image, cpu_set, settings, halo)
+                                                for image in images]
+            args: list[tuple] = [(sub_image, *parameters) for image, layout in zip(images, layouts)
+                                 for sub_image in tiling.crop_tiles(image, layout)]
+            results: list | None = self._worker_pool.starmap(tile_runner, args, cpu_set, self.is_interrupting,
+                                                             settings.tiles_per_worker > 1)
+            if results is None:
+                return False
+            for image, layout in zip(images, layouts):
+                result_image: Image.Image = tiling.merge_tiles(results[:len(layout)], layout, image.size)
+                if merged_pass is not None:
+                    merged_pass(result_image)
+                results = results[len(layout):]
+        return True
+
+    def _execute(self, task: callable, args: list[tuple], cpu_set: int, settings: BenchmarkSettings) -> list | None:
+        """
+        Runs the task on every arguments package once.
+        :param task: The function to run.
+        :param args: The arguments packages.
+        :param cpu_set: The CPU core set, 1 runs in this process without the pool.
+        :param settings: The benchmark settings.
+        :return: The task results, or None if the pool was interrupted.
+        """
+        if cpu_set == 1:
+            # True serial baseline: runs in this process, no pool involved
+            return [task(*arguments) for arguments in args]
+        return self._worker_pool.starmap(task, args, cpu_set, self.is_interrupting, settings.tiles_per_worker > 1)
+
+    @staticmethod
+    def _load_cached_configuration(cache: ResultCache, config_key: str, config_label: str, content_parts: tuple,
+                                   layout: tiling.TileLayout, size: tuple[int, int], with_result: bool,
+                                   report: BenchmarkReport) -> bool:
+        """
+        Fills the report with the cached timings of a configuration and, when asked, its result assembled out of the
+        cached tiles.
+        :param cache: The result cache.
+        :param config_key: The key of the configuration entry.
+        :param config_label: The label of the configuration.
+        :param content_parts: The image digest and the algorithm description the tile keys depend on.
+        :param layout: The sub-images layout of the configuration.
+        :param size: The (width, height) of the image.
+        :param with_result: Whether the result image is needed.
+        :param report: The report to fill.
+        :return: Whether every needed entry was cached, the report is left untouched otherwise.
+        """
+        entry: dict | None = cache.load_json(config_key)
+        if entry is None:
+            return False
+        result_image: Image.Image | None = None
+        if with_result:
+            for box, crop_box in layout:
+                tile: Image.Image | None = cache.load_image(cache.make_key("tile", *content_parts, box, crop_box))
+                if tile is None:
+                    return False
+                if result_image is None:
+                    result_image = Image.new(tile.mode, size)
+                result_image.paste(tile, box[:2])
+            report.result_image = result_image
+        report.statistics[config_label] = entry["statistics"]
+        report.timestamps[config_label] = entry["statistics"]["median"]
+        report.phases[config_label] = entry["phases"]
+        report.details.update(entry["details"])
+        return True
+
+    def _get_execution_phases(self, cpu_set: int, seconds: float) -> dict[str, float]:
+        """
+        Splits the timed execution of the last run into phases. The worker-side phases are averaged over the active
+        workers, so that they are comparable with the wall-clock time.
+        :param cpu_set: The CPU core set.
+        :param seconds: The wall-clock seconds of the execution.
+        :return: The seconds spent serializing, computing, transferring back and waiting.
+        """
+        if cpu_set == 1:
+            return {"serialize": 0.0, "compute": seconds, "transfer back": 0.0, "idle and IPC": 0.0}
+        pool_phases: dict[str, float] = self._worker_pool.last_phase_times
+        execution_phases: dict[str, float] = {
+            "serialize": pool_phases["serialize"] + pool_phases["deserialize"] / cpu_set,
+            "compute": pool_phases["compute"] / cpu_set,
+            "transfer back": pool_phases["serialize results"] / cpu_set + pool_phases["deserialize results"]
+        }
+        execution_phases["idle and IPC"] = max(0.0, seconds - sum(execution_phases.values()))
+        return execution_phases
+
+    def _ensure_worker_pool(self, processes: int, details: dict[str, str], on_progress: callable) -> None:
+        """
+        Makes sure a warm worker pool with at least the given number of workers is running, reusing the current one
+        when possible. The pool start-up cost is reported in the details.
+        :param processes: The number of workers needed.
+        :param details: The details to add the pool report to.
+        :param on_progress: Called with a status text when a new pool is started.
+        :return:
+        """
+        if self._worker_pool is not None and self._worker_pool.processes >= processes:
+            details["Worker pool"] = f"reused warm pool of {self._worker_pool.processes} workers"
+            return
+        if self._worker_pool is not None:
+            self._worker_pool.close()
+        on_progress(f"Starting a pool of {processes} workers...")
+        self._worker_pool = WarmWorkerPool(processes)
+        details["Worker pool"] = (f"started {processes} workers in {self._worker_pool.startup_time:.2f}s "
+                                  f"(excluded from timings)")
+
+    @staticmethod
+    def _rate_approximation(image: Image.Image, result_image: Image.Image,
+                            settings: BenchmarkSettings) -> dict[str, float]:
+        """
+        Rates the result of an approximate algorithm against the one of its exact sub type, run on the whole image
+        outside the timings.
+        :param image: The processed image.
+        :param result_image: The result of the approximate algorithm.
+        :param settings: The benchmark settings.
+        :return: The "psnr" in dB and the "ssim".
+        """
+        exact_sub_type: str = runners.approximated_sub_types[settings.algorithm_sub_type]
+        exact_runner: callable = runners.get_runner(settings.algorithm_type, exact_sub_type)
+        exact_image: Image.Image = exact_runner(image, *runners.get_runner_parameters(
+            settings.algorithm_type, exact_sub_type, settings.algorithm_params))
+        return {"psnr": quality.psnr(exact_image, result_image), "ssim": quality.ssim(exact_image, result_image)}
+
+    @staticmethod
+    def _plan_sub_images(image: Image.Image, cpu_set: int, settings: BenchmarkSettings, halo: int,
+                         max_tile_pixels: int | None = None) -> tiling.TileLayout:
+        """
+        Plans the sub-images layout: the tiles for the given CPU core set, over-decomposed by the tiles per worker
+        factor, each one with the halo the algorithm reads.
+        :param image: The image to divide.
+        :param cpu_set: The CPU core set.
+        :param settings: The benchmark settings.
+        :param halo: The halo width in pixels.
+        :param max_tile_pixels: The maximum pixels of a tile, more tiles are planned when needed, even for the serial
+        baseline. None leaves the tiles unbounded and the serial baseline on the whole image.
+        :return: The (tile box, cropped box with halo) pairs.
+        """
+        width, height = image.size
+        parts: int = 1 if cpu_set == 1 else cpu_set * settings.tiles_per_worker
+        if max_tile_pixels is not None:
+            parts = max(parts, math.ceil(width * height / max_tile_pixels))
+        if parts == 1:
+            return [((0, 0, width, height),) * 2]
+        boxes: list[tiling.Box] = tiling.plan_tiles(width, height, parts, settings.division_mode)
+        return tiling.add_halo(boxes, halo, width, height)
+
+    @staticmethod
+    def _get_bench_details(config_label: str, settings: BenchmarkSettings, layout: tiling.TileLayout,
+                           halo: int) -> dict[str, str]:
+        """
+        Returns the details describing how the algorithm is executed in a configuration.
+        :param config_label: The label of the benchmarked configuration.
+        :param settings: The benchmark settings.
+        :param layout: The sub-images layout of the configuration.
+        :param halo: The halo width in pixels.
+        :return: The details of the configuration.
+        """
+        details: dict[str, str] = {}
+        if len(layout) > 1:
+            halo_overhead: float = tiling.halo_overhead(layout)
+            details[f"Halo overhead {config_label}"] = f"{halo}px, +{halo_overhead * 100:.1f}% pixels processed"
+        if settings.algorithm_type in runners.convolution_engines:
+            # The SciPy engine picks its path per tile size, edge tiles may take another path than the others
+            kernel: list[list[float]] = convolution.convolution_kernels[settings.algorithm_sub_type]
+            path_tiles: dict[str, int] = {}
+            crossovers: set[int | None] = set()
+            for _, crop_box in layout:
+                tile_size: tuple[int, int] = (crop_box[2] - crop_box[0], crop_box[3] - crop_box[1])
+                if settings.algorithm_type == convolution.name_lib:
+                    path: str = convolution.select_convolution_path(kernel, tile_size)
+                    crossovers.add(convolution.fft_crossover_kernel_size(tile_size))
+                else:
+                    path: str = convolution.describe_convolution_path(settings.algorithm_type, kernel)
+                path_tiles[path] = path_tiles.get(path, 0) + 1
+            descriptions: list[str] = [path if len(layout) == 1 else f"{path} on {tiles}/{len(layout)} tiles"
+                                       for path, tiles in path_tiles.items()]
+            known_crossovers: list[int] = sorted(crossover for crossover in crossovers if crossover is not None)
+            if known_crossovers:
+                descriptions.append(f"FFT beats direct from {known_crossovers[0]}x{known_crossovers[0]}" +
+                                    (f" to {known_crossovers[-1]}x{known_crossovers[-1]} depending on the tile"
+                                     if len(known_crossovers) > 1 else ""))
+            if None in crossovers:
+                descriptions.append("direct always beats FFT" + (" on some tiles" if known_crossovers else ""))
+            details[f"Convolution path {config_label}"] = ", ".join(descriptions)
+        return details
@@ -0,0 +1,110 @@
+import os
+import tempfile
+import numpy as np
+from PIL import Image
+
+from .streaming import PngRowWriter
+from .tiling import Box
+
+# (path of the .npy file, (height, width, channels)) of an RGB image living in a memory-mapped file
+MappedImageSpec = tuple[str, tuple[int, int, int]]
+
+# Rows copied at once when an image is written into a mapped file, so that no second full copy is made
+copy_band_rows: int = 256
+# Pixels of the largest tile of the out-of-core dispatch, whatever the CPU core set, serial baseline included
+max_tile_pixels: int = 2 ** 22
+
+
+def allocate_mapped_image(size: tuple[int, int], directory: str | None = None,
+                          image: Image.Image | None = None) -> MappedImageSpec:
+    """
+    Allocates an RGB image in a memory-mapped .npy file, optionally filled with the given image band by band.
+    :param size: The (width, height) of the image.
+    :param directory: The directory of the file, the system temporary directory when missing.
+    :param image: The image to copy into the file. The file is zeroed when missing.
+    :return: The spec workers use to map the file, to be released by the caller.
+    """
+    width, height = size
+    shape: tuple[int, int, int] = (height, width, 3)
+    file_descriptor, path = tempfile.mkstemp(suffix=".npy", dir=directory)
+    os.close(file_descriptor)
+    mapped_array = np.lib.format.open_memmap(path, mode="w+", dtype=np.uint8, shape=shape)
+    if image is not None:
+        for upper in range(0, height, copy_band_rows):
+            lower: int = min(height, upper + copy_band_rows)
+            mapped_array[upper:lower] = np.asarray(image.crop((0, upper, width, lower)).convert("RGB"))
+    mapped_array.flush()
+    del mapped_array
+    return path, shape
+
+
+def read_mapped_preview(spec: MappedImageSpec, max_side: int = 1024) -> Image.Image:
+    """
+    Builds a downsampled preview of an image living in a memory-mapped file. Pixels are picked with a stride, so
+    only the rows of the preview are read and the whole image is never held in memory.
+    :param spec: The spec of the mapped image.
+    :param max_side: The maximum width and height of the preview.
+    :return: The preview.
+    """
+    height, width, _ = spec[1]
+    stride: int = max(1, -(-max(width, height) // max_side))
+    mapped_array = np.load(spec[0], mmap_mode="r")
+    preview: Image.Image = Image.fromarray(np.ascontiguousarray(mapped_array[::stride, ::stride]))
+    del mapped_array
+    return preview
+
+
+def write_mapped_png(spec: MappedImageSpec, output_path: str) -> None:
+    """
+    Writes an image living in a memory-mapped file to a PNG file, a band of rows at a time.
+    :param spec: The spec of the mapped image.
+    :param output_path: The path of the PNG file.
+    :return:
+    """
+    height, width, _ = spec[1]
+    mapped_array = np.load(spec[0], mmap_mode="r")
+    with open(output_path, "wb") as output:
+        writer: PngRowWriter = PngRowWriter(output, width, height)
+        for upper in range(0, height, copy_band_rows):
+            writer.write_rows(np.asarray(mapped_array[upper:upper + copy_band_rows]))
+        writer.close()
+    del mapped_array
+
+
+def release_mapped_image(spec: MappedImageSpec) -> None:
+    """
+    Deletes the file of an image allocated by allocate_mapped_image.
+    :param spec: The spec of the mapped image.
+    :return:
+    """
+    if os.path.exists(spec[0]):
+        os.remove(spec[0])
+
+
+def run_mapped_tile(benchmark: callable, source_spec: MappedImageSpec, result_spec: MappedImageSpec, box: Box,
+                    crop_box: Box, parameters: tuple) -> None:
+    """
+    Worker side of the out-of-core dispatch: maps the source file, reads the tile plus its halo only, runs the
+    benchmark on it and writes the trimmed result straight into the mapped result file. Only coordinates cross the
+    process boundary and the worker memory is proportional to the tile, not to the image.
+    :param benchmark: The benchmark function, called as benchmark(sub_image, *parameters).
+    :param source_spec: The spec of the mapped source image.
+    :param result_spec: The spec of the mapped result image.
+    :param box: The tile box.
+    :param crop_box: The tile box extended by the halo.
+    :param parameters: The benchmark parameters following the sub-image.
+    :return:
+    """
+    source_array = np.load(source_spec[0], mmap_mode="r")
+    sub_image: Image.Image = Image.fromarray(np.ascontiguousarray(
+        source_array[crop_box[1]:crop_box[3], crop_box[0]:crop_box[2]]))
+    del source_array
+    result_array = np.asarray(benchmark(sub_image, *parameters).convert("RGB"))
+    left, upper, right, lower = box
+    trim_left: int = left - crop_box[0]
+    trim_upper: int = upper - crop_box[1]
+    mapped_result_array = np.load(result_spec[0], mmap_mode="r+")
+    mapped_result_array[upper:lower, left:right] = result_array[trim_upper:trim_upper + lower - upper,
+                                                                trim_left:trim_left + right - left]
+    mapped_result_array.flush()
+    del mapped_result_array
@@ -0,0 +1,79 @@
+import time
+from PIL import Image
+
+from . import runners
+
+# (benchmark function, benchmark parameters) of a prepared pipeline stage, as shipped to the workers
+PreparedStage = tuple[callable, tuple]
+
+
+class PipelineStep:
+    algorithm_type: str
+    algorithm_sub_type: str
+    algorithm_params: dict[str, object]
+
+    def __init__(self, algorithm_type: str, algorithm_sub_type: str = "",
+                 algorithm_params: dict[str, object] | None = None):
+        """
+        Initializes a step of an operations pipeline.
+        :param algorithm_type: The algorithm type.
+        :param algorithm_sub_type: The algorithm sub type, empty if the algorithm has none.
+        :param algorithm_params: The algorithm parameters values, keyed by name.
+        """
+        self.algorithm_type = algorithm_type
+        self.algorithm_sub_type = algorithm_sub_type
+        self.algorithm_params = algorithm_params if algorithm_params else {}
+
+    def label(self, index: int) -> str:
+        """
+        Returns the label of the step in its pipeline.
+        :param index: The position of the step in the pipeline.
+        :return: The step label.
+        """
+        return f"{index + 1}. {self.algorithm_sub_type or self.algorithm_type}"
+
+    def describe(self) -> dict[str, object]:
+        """
+        Describes the step with plain values.
+        :return: The step, keyed by name.
+        """
+        return {
+            "algorithm_type": self.algorithm_type,
+            "algorithm_sub_type": self.algorithm_sub_type,
+            "algorithm_params": self.algorithm_params
+        }
+
+
+def prepare_pipeline(steps: list[PipelineStep]) -> tuple[list[PreparedStage], list[int]]:
+    """
+    Prepares every step of a pipeline, in order, so that each one captures its own parameterized kernel.
+    :param steps: The pipeline steps.
+    :return: The prepared stages and the halo of every stage.
+    """
+    stages: list[PreparedStage] = []
+    halos: list[int] = []
+    for step in steps:
+        runners.prepare_algorithm(step.algorithm_sub_type, step.algorithm_params)
+        stages.append((runners.get_runner(step.algorithm_type, step.algorithm_sub_type),
+                       runners.get_runner_parameters(step.algorithm_type, step.algorithm_sub_type,
+                                                     step.algorithm_params)))
+        halos.append(runners.get_algorithm_halo(step.algorithm_type, step.algorithm_sub_type,
+                                                step.algorithm_params))
+    return stages, halos
+
+
+def run_pipeline_tile(stages: list[PreparedStage], sub_image: Image.Image) -> tuple[Image.Image, list[float]]:
+    """
+    Worker side of a fused pipeline: runs every stage on the same tile, the intermediate tiles never leave the
+    worker. The tile carries the halo of every stage: each stage spoils the border its own halo wide, which the
+    following stages do not read from.
+    :param stages: The prepared stages.
+    :param sub_image: The tile, with the cumulative halo.
+    :return: The processed tile and the seconds of every stage.
+    """
+    stage_times: list[float] = []
+    for benchmark, parameters in stages:
+        start_time: float = time.perf_counter()
+        sub_image = benchmark(sub_image, *parameters)
+        stage_times.append(time.perf_counter() - start_time)
+    return sub_image, stage_times
@@ -0,0 +1,54 @@
+import math
+import numpy as np
+from PIL import Image
+from scipy.ndimage import gaussian_filter
+
+# SSIM constants of Wang et al.: the gaussian window and the stabilizers of the 8-bit dynamic range
+ssim_window_sigma: float = 1.5
+ssim_constants: tuple[float, float] = ((0.01 * 255) ** 2, (0.03 * 255) ** 2)
+
+
+def _to_array(image: Image.Image) -> np.ndarray:
+    """
+    Converts an image to a float64 RGB array.
+    :param image: The image to convert.
+    :return: The (height, width, 3) array.
+    """
+    return np.asarray(image.convert("RGB"), dtype=np.float64)
+
+
+def psnr(reference_image: Image.Image, image: Image.Image) -> float:
+    """
+    Computes the peak signal-to-noise ratio of an image against a reference, over every channel.
+    :param reference_image: The reference image.
+    :param image: The image to rate, of the same size.
+    :return: The PSNR in dB, infinite if the images are identical.
+    """
+    mean_squared_error: float = float(np.mean((_to_array(reference_image) - _to_array(image)) ** 2))
+    if mean_squared_error == 0:
+        return math.inf
+    return 10 * math.log10(255 ** 2 / mean_squared_error)
+
+
+def ssim(reference_image: Image.Image, image: Image.Image) -> float:
+    """
+    Computes the structural similarity of an image against a reference with a gaussian window, averaged over the
+    pixels and the channels.
+    :param reference_image: The reference image.
+    :param image: The image to rate, of the same size.
+    :return: The SSIM, 1 if the images are identical.
+    """
+    reference_array = _to_array(reference_image)
+    image_array = _to_array(image)
+    # The window is not spread across the channels
+    sigma: tuple[float, float, float] = (ssim_window_sigma, ssim_window_sigma, 0)
+    reference_mean = gaussian_filter(reference_array, sigma)
+    image_mean = gaussian_filter(image_array, sigma)
+    reference_variance = gaussian_filter(reference_array ** 2, sigma) - reference_mean ** 2
+    image_variance = gaussian_filter(image_array ** 2, sigma) - image_mean ** 2
+    covariance = gaussian_filter(reference_array * image_array, sigma) - reference_mean * image_mean
+    luminance_constant, contrast_constant = ssim_constants
+    ssim_map = (((2 * reference_mean * image_mean + luminance_constant) * (2 * covariance + contrast_constant)) /
+                ((reference_mean ** 2 + image_mean ** 2 + luminance_constant) *
+                 (reference_variance + image_variance + contrast_constant)))
+    return float(np.mean(ssim_map))
@@ -0,0 +1,189 @@
+import hashlib
+import json
+import os
+import stat
+import tempfile
+from pathlib import Path
+import numpy as np
+from PIL import Image
+
+from ..algorithms import convolution
+from . import runners
+
+# Per user, so that no other user can plant entries in it
+default_cache_directory: str = os.path.join(os.environ.get("XDG_CACHE_HOME", os.path.join(Path.home(), ".cache")),
+                                            "image_processing_bench")
+default_cache_megabytes: int = 512
+# Entries are plain data: timings as JSON and tiles as .npy arrays, loaded without pickle
+_json_suffix: str = ".json"
+_array_suffix: str = ".npy"
+
+
+def image_digest(image: Image.Image) -> str:
+    """
+    Hashes the content of an image: its mode, size and pixels, so that the same image loaded twice from different
+    files shares its cache entries.
+    :param image: The image to hash.
+    :return: The hexadecimal SHA-256 digest.
+    """
+    digest = hashlib.sha256(f"{image.mode} {image.size}".encode())
+    digest.update(image.tobytes())
+    return digest.hexdigest()
+
+
+def describe_algorithm(algorithm_type: str, algorithm_sub_type: str, params: dict[str, object]) -> tuple:
+    """
+    Describes everything an algorithm result depends on: the parameters of the benchmark call, which carry the
+    structural elements and the parameterized kernels, and the kernel the convolution engines resolve by sub type.
+    The algorithm must have been prepared.
+    :param algorithm_type: The algorithm type.
+    :param algorithm_sub_type: The algorithm sub type.
+    :param params: The algorithm parameters values.
+    :return: The algorithm description, made of plain values.
+    """
+    kernel: list | None = None
+    if algorithm_type in runners.convolution_engines:
+        kernel = convolution.convolution_kernels[algorithm_sub_type]
+    return (algorithm_type, algorithm_sub_type,
+            runners.get_runner_parameters(algorithm_type, algorithm_sub_type, params), kernel)
+
+
+class ResultCache:
+    _directory: Path
+    _max_bytes: int
+    _hits: int = 0
+    _misses: int = 0
+    _evictions: int = 0
+
+    def __init__(self, directory: str = default_cache_directory, max_bytes: int = default_cache_megabytes * 2 ** 20):
+        """
+        Opens an on-disk cache of benchmark results. Entries are addressed by the hash of what they depend on, so
+        they never need to be invalidated, and the least recently used ones are evicted past the size cap.
+        The directory is created private to the current user, and refused if another user owns it.
+        :param directory: The directory of the entries, created if missing.
+        :param max_bytes: The size cap of the entries.
+        """
+        self._directory = Path(directory)
+        self._directory.mkdir(mode=0o700, parents=True, exist_ok=True)
+        directory_stat: os.stat_result = self._directory.stat()
+        if hasattr(os, "getuid"):
+            if directory_stat.st_uid != os.getuid():
+                raise PermissionError(f"The result cache directory {self._directory} is owned by another user")
+            if stat.S_IMODE(directory_stat.st_mode) & 0o077:
+                os.chmod(self._directory, 0o700)
+        self._max_bytes = max_bytes
+
+    @staticmethod
+    def make_key(*parts) -> str:
+        """
+        Returns the key of an entry.
+        :param parts: What the entry depends on, plain values whose repr is stable.
+        :return: The hexadecimal SHA-256 digest of the parts.
+        """
+        return hashlib.sha256(repr(parts).encode()).hexdigest()
+
+    def load_json(self, key: str) -> object | None:
+        """
+        Loads a JSON entry and marks it as the most recently used one.
+        :param key: The entry key.
+        :return: The entry value, or None on a miss.
+        """
+        path: Path = self._directory / f"{key}{_json_suffix}"
+        try:
+            with open(path) as entry_file:
+                value: object = json.load(entry_file)
+            os.utime(path)
+        except (OSError, ValueError):
+            # Missing, evicted meanwhile by another process, or truncated
+            self._misses += 1
+            return None
+        self._hits += 1
+        return value
+
+    def store_json(self, key: str, value: object) -> None:
+        """
+        Stores a JSON entry, then evicts the least recently used entries past the size cap.
+        :param key: The entry key.
+        :param value: The entry value, made of JSON types.
+        :return:
+        """
+        self._store(key, _json_suffix, lambda entry_file: entry_file.write(json.dumps(value).encode()))
+
+    def load_image(self, key: str) -> Image.Image | None:
+        """
+        Loads an image entry and marks it as the most recently used one.
+        :param key: The entry key.
+        :return: The image, or None on a miss.
+        """
+        path: Path = self._directory / f"{key}{_array_suffix}"
+        try:
+            image: Image.Image = Image.fromarray(np.load(path, allow_pickle=False))
+            os.utime(path)
+        except (OSError, ValueError, TypeError):
+            self._misses += 1
+            return None
+        self._hits += 1
+        return image
+
+    def store_image(self, key: str, image: Image.Image) -> None:
+        """
+        Stores an image entry, then evicts the least recently used entries past the size cap.
+        :param key: The entry key.
+        :param image: The image.
+        :return:
+        """
+        self._store(key, _array_suffix, lambda entry_file: np.save(entry_file, np.asarray(image), allow_pickle=False))
+
+    def reset_statistics(self) -> None:
+        """
+        Resets the hits, misses and evictions counters.
+        :return:
+        """
+        self._hits, self._misses, self._evictions = 0, 0, 0
+
+    def statistics(self) -> dict[str, int]:
+        """
+        Returns the statistics of the cache since the last reset.
+        :return: The "hits", "misses" and "evictions" counters, and the "entries" and "bytes" on disk.
+        """
+        entries: list[tuple[float, int, Path]] = self._list_entries()
+        return {"hits": self._hits, "misses": self._misses, "evictions": self._evictions, "entries": len(entries),
+                "bytes": sum(size for _, size, _ in entries)}
+
+    def _store(self, key: str, suffix: str, write: callable) -> None:
+        """
+        Writes an entry aside and renames it, so that concurrent readers never see it partially written, then
+        evicts the least recently used entries until the cache fits its size cap.
+        :param key: The entry key.
+        :param suffix: The entry file suffix.
+        :param write: Called with the binary file to write the entry to.
+        :return:
+        """
+        file_descriptor, temporary_path = tempfile.mkstemp(suffix=".tmp", dir=self._directory)
+        with os.fdopen(file_descriptor, "wb") as entry_file:
+            write(entry_file)
+        os.replace(temporary_path, self._directory / f"{key}{suffix}")
+        entries: list[tuple[float, int, Path]] = self._list_entries()
+        total_bytes: int = sum(size for _, size, _ in entries)
+        for _, size, path in sorted(entries):
+            if total_bytes <= self._max_bytes:
+                break
+            path.unlink(missing_ok=True)
+            total_bytes -= size
+            self._evictions += 1
+
+    def _list_entries(self) -> list[tuple[float, int, Path]]:
+        """
+        Lists the entries of the cache.
+        :return: The (modification time, size, path) of every entry.
+        """
+        entries: list[tuple[float, int, Path]] = []
+        for path in self._directory.iterdir():
+            if path.suffix not in (_json_suffix, _array_suffix):
+                continue
+            try:
+                entry_stat: os.stat_result = path.stat()
+            except OSError:
+                continue
+            entries.append((entry_stat.st_mtime, entry_stat.st_size, path))
+        return entries
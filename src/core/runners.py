@@ -0,0 +1,268 @@
+from PIL import Image
+
+from ..algorithms import morphological_operators, convolution, noise_reduction, canny
+
+
+def generic_benchmark(target_image: Image.Image, selected_algorithm_type: str,
+                      selected_algorithm_sub_type: str) -> Image.Image:
+    if selected_algorithm_type == convolution.name_native:
+        return convolution.convolve_native(target_image,
+                                           convolution.convolution_kernels[selected_algorithm_sub_type],
+                                           "edge_detection" in selected_algorithm_sub_type)
+    elif selected_algorithm_type == convolution.name_lib:
+        return convolution.convolve_lib(target_image, convolution.convolution_kernels[selected_algorithm_sub_type],
+                                        "edge_detection" in selected_algorithm_sub_type)
+    elif selected_algorithm_type == convolution.name_numpy:
+        return convolution.convolve_numpy(target_image,
+                                          convolution.convolution_kernels[selected_algorithm_sub_type],
+                                          "edge_detection" in selected_algorithm_sub_type)
+    else:
+        raise ValueError(f"Invalid algorithm type: {selected_algorithm_type}")
+
+
+def one_parameter_benchmark(target_image: Image.Image, algorithm: str, parameter) -> Image.Image:
+    if algorithm == noise_reduction.noise_reduction_sub_types[0]:
+        return noise_reduction.mean_filter(target_image, parameter)
+    elif algorithm == noise_reduction.noise_reduction_sub_types[2]:
+        return noise_reduction.mean_filter_integral(target_image, parameter)
+    elif algorithm == convolution.name_native:
+        return convolution.convolve_native(target_image, parameter)
+    elif algorithm == convolution.name_lib:
+        return convolution.convolve_lib(target_image, parameter)
+    elif algorithm == convolution.name_numpy:
+        return convolution.convolve_numpy(target_image, parameter)
+
+
+def two_parameter_benchmark(target_image: Image.Image, algorithm: str, parameter_1, parameter_2) -> Image.Image:
+    if algorithm == morphological_operators.name:
+        return morphological_operators.morphological_operate(target_image, parameter_1, parameter_2)
+    elif algorithm == morphological_operators.name_numpy:
+        return morphological_operators.morphological_operate_numpy(target_image, parameter_1, parameter_2)
+
+
+def three_parameters_benchmark(target_image: Image.Image,
+                               algorithm: str, parameter_1, parameter_2,
+                               parameter_3) -> Image.Image:
+    if algorithm == noise_reduction.noise_reduction_sub_types[1]:
+        return noise_reduction.bilateral_filter(target_image, parameter_1, parameter_2, parameter_3)
+    elif algorithm == noise_reduction.noise_reduction_sub_types[3]:
+        return noise_reduction.bilateral_filter_lut(target_image, parameter_1, parameter_2, parameter_3)
+    elif algorithm == noise_reduction.noise_reduction_sub_types[4]:
+        return noise_reduction.bilateral_filter_grid(target_image, parameter_1, parameter_2, parameter_3)
+
+
+def four_parameters_benchmark(target_image: Image.Image,
+                              algorithm: str, parameter_1, parameter_2,
+                              parameter_3, parameter_4) -> Image.Image:
+    if algorithm in canny.canny_sub_types:
+        return canny.canny_edge_detector(target_image, parameter_1, parameter_2, parameter_3, parameter_4, algorithm)
+
+
+def edge_map_benchmark(target_image: Image.Image,
+                       algorithm: str, parameter_1, parameter_2,
+                       parameter_3, parameter_4) -> Image.Image:
+    if algorithm in canny.canny_sub_types:
+        return canny.canny_edge_detector(target_image, parameter_1, parameter_2, parameter_3, parameter_4, algorithm,
+                                         False)
+
+
+# Implemented algorithms (Name, HasSubTypes)
+implemented_algorithms: dict[str, bool] = {
+    convolution.name_native: True,
+    convolution.name_lib: True,
+    convolution.name_numpy: True,
+    morphological_operators.name: True,
+    morphological_operators.name_numpy: True,
+    noise_reduction.name: True,
+    canny.name: True
+}
+
+convolution_engines: list[str] = [convolution.name_native, convolution.name_lib, convolution.name_numpy]
+morphological_engines: list[str] = [morphological_operators.name, morphological_operators.name_numpy]
+
+specialized_runners: dict[str, callable] = {
+    convolution.parameterized_kernel_list[0]: one_parameter_benchmark,
+    noise_reduction.noise_reduction_sub_types[0]: one_parameter_benchmark,
+    noise_reduction.noise_reduction_sub_types[1]: three_parameters_benchmark,
+    noise_reduction.noise_reduction_sub_types[2]: one_parameter_benchmark,
+    noise_reduction.noise_reduction_sub_types[3]: three_parameters_benchmark,
+    noise_reduction.noise_reduction_sub_types[4]: three_parameters_benchmark,
+    canny.canny_sub_types[0]: four_parameters_benchmark,
+    canny.canny_sub_types[1]: four_parameters_benchmark,
+    **{sub_type: two_parameter_benchmark for sub_type in morphological_operators.morphological_sub_types}
+}
+
+# Sub types whose last pass reads the whole image: tiles run the tile runner, which stops before that pass, and the
+# pass runs once on the merged image
+merged_passes: dict[str, tuple[callable, callable]] = {
+    canny.canny_sub_types[0]: (edge_map_benchmark, canny.link_edge_map),
+    canny.canny_sub_types[1]: (edge_map_benchmark, canny.link_edge_map)
+}
+
+# Approximate sub types and the exact sub type their results are rated against. The lookup table bilateral filter
+# stands in for the native one, which it matches within one level, as the native one takes minutes on large images
+approximated_sub_types: dict[str, str] = {
+    noise_reduction.noise_reduction_sub_types[4]: noise_reduction.noise_reduction_sub_types[3]
+}
+
+
+def get_sub_types(algorithm_type: str) -> list[str]:
+    """
+    Returns the sub types of the given algorithm type.
+    :param algorithm_type: The algorithm type.
+    :return: The sub types, empty if the algorithm has none.
+    """
+    if algorithm_type in convolution_engines:
+        values = list(convolution.convolution_kernels.keys())
+        for parameterized_kernel in convolution.parameterized_kernel_list:
+            if parameterized_kernel not in values:
+                values.append(parameterized_kernel)
+        return values
+    elif algorithm_type in morphological_engines:
+        return morphological_operators.morphological_sub_types
+    elif algorithm_type == noise_reduction.name:
+        return noise_reduction.noise_reduction_sub_types
+    elif algorithm_type == canny.name:
+        return canny.canny_sub_types
+    elif algorithm_type in implemented_algorithms and not implemented_algorithms[algorithm_type]:
+        return []
+    raise NotImplementedError(f"Algorithm type {algorithm_type} has not sub types implemented yet.")
+
+
+def get_default_parameters(algorithm_type: str, algorithm_sub_type: str) -> dict[str, dict]:
+    """
+    Returns the parameters the given algorithm accepts, with their default value, type and choices.
+    :param algorithm_type: The algorithm type.
+    :param algorithm_sub_type: The algorithm sub type.
+    :return: The parameters descriptions, keyed by name.
+    """
+    if algorithm_type == canny.name:
+        return {
+            "gauss_size": {"value": 3, "type": int},
+            "sigma": {"value": 1, "type": float},
+            "low_threshold": {"value": 20, "type": int},
+            "high_threshold": {"value": 40, "type": int}
+        }
+    elif algorithm_sub_type in morphological_operators.morphological_sub_types:
+        return {
+            "structural_element": {"value": "square", "type": str,
+                                   "choices": list(morphological_operators.structural_elements.keys())},
+        }
+    elif algorithm_sub_type in noise_reduction.mean_filter_sub_types:
+        return {"kernel_size": {"value": 3, "type": int}}
+    elif algorithm_sub_type in noise_reduction.bilateral_filter_sub_types:
+        return {
+            "diameter": {"value": 5, "type": int},
+            "sigma_color": {"value": 10, "type": int},
+            "sigma_space": {"value": 15, "type": int}
+        }
+    elif algorithm_sub_type == convolution.parameterized_kernel_list[0]:
+        return {
+            "kernel_size": {"value": 3, "type": int},
+            "sigma": {"value": 1, "type": int}
+        }
+    return {}
+
+
+def parse_parameter(description: dict, user_input: str | None) -> object | None:
+    """
+    Parses a user given value for a parameter: choices must match, numbers must be positive integers.
+    :param description: The parameter description, as returned by get_default_parameters.
+    :param user_input: The user given value.
+    :return: The parsed value, or None if the value is not valid.
+    """
+    if user_input is None:
+        return None
+    if description["type"] == str:
+        return user_input if user_input in description["choices"] else None
+    if not user_input.isdecimal() or int(user_input) <= 0:
+        return None
+    return description["type"](user_input)
+
+
+def prepare_algorithm(algorithm_sub_type: str, params: dict[str, object]) -> None:
+    """
+    Prepares the module state the given algorithm relies on, such as the parameterized kernels.
+    :param algorithm_sub_type: The algorithm sub type.
+    :param params: The algorithm parameters values.
+    :return:
+    """
+    if algorithm_sub_type == convolution.parameterized_kernel_list[0]:
+        convolution.convolution_kernels[algorithm_sub_type] = convolution.generate_gauss_kernel(
+            params["kernel_size"], params["sigma"])
+
+
+def get_runner(algorithm_type: str, algorithm_sub_type: str) -> callable:
+    """
+    Returns the benchmark function running the given algorithm.
+    :param algorithm_type: The algorithm type.
+    :param algorithm_sub_type: The algorithm sub type.
+    :return: The benchmark function, called as runner(sub_image, *parameters).
+    """
+    algorithm: str = algorithm_sub_type if algorithm_sub_type else algorithm_type
+    return specialized_runners.get(algorithm, generic_benchmark)
+
+
+def get_tile_runner(algorithm_type: str, algorithm_sub_type: str) -> tuple:
+    """
+    Returns the benchmark function running the given algorithm on a tile whose result is merged with the others.
+    :param algorithm_type: The algorithm type.
+    :param algorithm_sub_type: The algorithm sub type.
+    :return: The benchmark function, called as the one of get_runner, and the pass to run once on the merged image,
+    None if the tiles are complete.
+    """
+    algorithm: str = algorithm_sub_type if algorithm_sub_type else algorithm_type
+    if algorithm in merged_passes:
+        return merged_passes[algorithm]
+    return get_runner(algorithm_type, algorithm_sub_type), None
+
+
+def get_runner_parameters(algorithm_type: str, algorithm_sub_type: str, params: dict[str, object]) -> tuple:
+    """
+    Returns the parameters that follow the sub-image in the benchmark function call.
+    :param algorithm_type: The algorithm type.
+    :param algorithm_sub_type: The algorithm sub type.
+    :param params: The algorithm parameters values.
+    :return: The benchmark parameters.
+    """
+    algorithm: str = algorithm_sub_type if algorithm_sub_type else algorithm_type
+    if algorithm not in specialized_runners:
+        return algorithm_type, algorithm_sub_type
+    elif algorithm in noise_reduction.mean_filter_sub_types:
+        return algorithm_sub_type, params["kernel_size"]
+    elif algorithm in noise_reduction.bilateral_filter_sub_types:
+        return algorithm_sub_type, params["diameter"], params["sigma_color"], params["sigma_space"]
+    elif algorithm in canny.canny_sub_types:
+        return (algorithm_sub_type, params["gauss_size"], params["sigma"], params["low_threshold"],
+                params["high_threshold"])
+    elif algorithm == convolution.parameterized_kernel_list[0]:
+        return algorithm_type, convolution.convolution_kernels[algorithm_sub_type]
+    elif algorithm in morphological_operators.morphological_sub_types:
+        return (algorithm_type, algorithm_sub_type,
+                morphological_operators.structural_elements[params["structural_element"]])
+    else:
+        raise NotImplementedError("This algorithm has not pickle arguments implemented yet.")
+
+
+def get_algorithm_halo(algorithm_type: str, algorithm_sub_type: str, params: dict[str, object]) -> int:
+    """
+    Returns how many pixels around a sub-image the given algorithm reads.
+    :param algorithm_type: The algorithm type.
+    :param algorithm_sub_type: The algorithm sub type.
+    :param params: The algorithm parameters values.
+    :return: The halo width in pixels.
+    """
+    if algorithm_type in convolution_engines:
+        return convolution.kernel_halo(convolution.convolution_kernels[algorithm_sub_type])
+    elif algorithm_type == canny.name:
+        return canny.canny_halo(params["gauss_size"])
+    elif algorithm_sub_type in morphological_operators.morphological_sub_types:
+        return morphological_operators.structural_element_halo(
+            morphological_operators.structural_elements[params["structural_element"]], algorithm_sub_type)
+    elif algorithm_sub_type in noise_reduction.mean_filter_sub_types:
+        return noise_reduction.mean_filter_halo(params["kernel_size"])
+    elif algorithm_sub_type == noise_reduction.noise_reduction_sub_types[4]:
+        return noise_reduction.bilateral_grid_halo(params["diameter"], params["sigma_space"])
+    elif algorithm_sub_type in noise_reduction.bilateral_filter_sub_types:
+        return noise_reduction.bilateral_filter_halo(params["diameter"])
+    return 0
@@ -0,0 +1,87 @@
+import csv
+import io
+
+from .benchmark import get_config_cores
+
+scaling_laws: list[str] = ["Amdahl", "Gustafson"]
+table_columns: list[str] = ["configuration", "cores", "seconds", "speedup", "efficiency", "karp_flatt"]
+
+
+def compute_scaling(timestamps: dict[str, float]) -> list[dict[str, object]]:
+    """
+    Computes the scaling metrics of every configuration relative to the serial one: speedup, parallel efficiency and
+    the Karp-Flatt experimentally determined serial fraction, undefined with a single core.
+    :param timestamps: The seconds of every configuration, the serial one included.
+    :return: One row per configuration, sorted by cores, with the table columns.
+    """
+    serial_time: float = timestamps["Serial"]
+    rows: list[dict[str, object]] = []
+    for config_label, seconds in timestamps.items():
+        cores: int = get_config_cores(config_label)
+        speedup: float = serial_time / seconds if seconds > 0 else 0.0
+        karp_flatt: float | None = None
+        if cores > 1 and speedup > 0:
+            karp_flatt = (1 / speedup - 1 / cores) / (1 - 1 / cores)
+        rows.append({"configuration": config_label, "cores": cores, "seconds": seconds, "speedup": speedup,
+                     "efficiency": speedup / cores, "karp_flatt": karp_flatt})
+    return sorted(rows, key=lambda row: row["cores"])
+
+
+def fit_serial_fraction(rows: list[dict[str, object]], law: str) -> float:
+    """
+    Fits the serial fraction of a scaling law to the measured speedups with least squares, clamped to [0, 1].
+    Amdahl is fitted on 1 / speedup, which is linear in the fraction: 1 / S = f (1 - 1 / p) + 1 / p.
+    Gustafson is fitted on the speedup itself: S = p - a (p - 1). Both assume the serial run is exact.
+    :param rows: The scaling rows, as returned by compute_scaling.
+    :param law: One of the scaling laws.
+    :return: The serial fraction.
+    """
+    numerator: float = 0.0
+    denominator: float = 0.0
+    for row in rows:
+        cores: int = row["cores"]
+        if cores == 1 or row["speedup"] <= 0:
+            continue
+        if law == scaling_laws[0]:
+            x: float = 1 - 1 / cores
+            y: float = 1 / row["speedup"] - 1 / cores
+        elif law == scaling_laws[1]:
+            x: float = cores - 1
+            y: float = cores - row["speedup"]
+        else:
+            raise ValueError(f"Invalid scaling law: {law}")
+        numerator += x * y
+        denominator += x * x
+    if denominator == 0:
+        return 0.0
+    return min(1.0, max(0.0, numerator / denominator))
+
+
+def predict_speedup(law: str, serial_fraction: float, cores: int) -> float:
+    """
+    Predicts the speedup on a number of cores with a fitted scaling law.
+    :param law: One of the scaling laws.
+    :param serial_fraction: The fitted serial fraction.
+    :param cores: The number of cores.
+    :return: The predicted speedup.
+    """
+    if law == scaling_laws[0]:
+        return 1 / (serial_fraction + (1 - serial_fraction) / cores)
+    elif law == scaling_laws[1]:
+        return cores - serial_fraction * (cores - 1)
+    raise ValueError(f"Invalid scaling law: {law}")
+
+
+def format_scaling_table(rows: list[dict[str, object]]) -> str:
+    """
+    Formats the scaling rows as CSV.
+    :param rows: The scaling rows, as returned by compute_scaling.
+    :return: The CSV text, header included.
+    """
+    output = io.StringIO()
+    writer = csv.writer(output)
+    writer.writerow(table_columns)
+    for row in rows:
+        writer.writerow([row["configuration"], row["cores"], *[
+            "" if row[column] is None else f"{row[column]:.6f}" for column in table_columns[2:]]])
+    return output.getvalue()
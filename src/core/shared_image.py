@@ -0,0 +1,103 @@
+import sys
+from multiprocessing import resource_tracker
+from multiprocessing.shared_memory import SharedMemory
+import numpy as np
+from PIL import Image
+
+from .tiling import Box
+
+# (shared memory block name, (height, width, channels)) of an RGB image living in shared memory
+SharedImageSpec = tuple[str, tuple[int, int, int]]
+
+
+def _attach_shared_block(name: str) -> SharedMemory:
+    """
+    Attaches to an existing shared memory block without tracking it, so that only the process which created the
+    block unlinks it. Before Python 3.13 attaching always registers the block with the resource tracker, which warns
+    about leaked blocks and unlinks them a second time at shutdown, so the registration is withdrawn right away.
+    :param name: The name of the shared memory block.
+    :return: The attached block, to be closed by the caller.
+    """
+    if sys.version_info >= (3, 13):
+        return SharedMemory(name=name, track=False)
+    shared_block = SharedMemory(name=name)
+    resource_tracker.unregister(shared_block._name, "shared_memory")
+    return shared_block
+
+
+def allocate_shared_image(size: tuple[int, int],
+                          image: Image.Image | None = None) -> tuple[SharedMemory, SharedImageSpec]:
+    """
+    Allocates an RGB image buffer in shared memory, optionally filled with the given image.
+    :param size: The (width, height) of the image.
+    :param image: The image to copy into the buffer. The buffer is zeroed when missing.
+    :return: The shared memory block, to be released by the caller, and the spec workers use to attach to it.
+    """
+    width, height = size
+    shape: tuple[int, int, int] = (height, width, 3)
+    shared_block = SharedMemory(create=True, size=height * width * 3)
+    buffer_array = np.ndarray(shape, dtype=np.uint8, buffer=shared_block.buf)
+    if image is None:
+        buffer_array.fill(0)
+    else:
+        buffer_array[:] = np.asarray(image.convert("RGB"))
+    del buffer_array
+    return shared_block, (shared_block.name, shape)
+
+
+def read_shared_image(spec: SharedImageSpec) -> Image.Image:
+    """
+    Copies an image out of shared memory.
+    :param spec: The spec of the shared image.
+    :return: A private copy of the image.
+    """
+    shared_block = _attach_shared_block(spec[0])
+    buffer_array = np.ndarray(spec[1], dtype=np.uint8, buffer=shared_block.buf)
+    image: Image.Image = Image.fromarray(buffer_array.copy())
+    del buffer_array
+    shared_block.close()
+    return image
+
+
+def release_shared_image(shared_block: SharedMemory) -> None:
+    """
+    Closes and destroys a shared memory block created by allocate_shared_image.
+    :param shared_block: The shared memory block.
+    :return:
+    """
+    shared_block.close()
+    if sys.version_info < (3, 13):
+        # Workers share the resource tracker of this process, their attachments withdrew its registration too
+        resource_tracker.register(shared_block._name, "shared_memory")
+    shared_block.unlink()
+
+
+def run_shared_tile(benchmark: callable, source_spec: SharedImageSpec, result_spec: SharedImageSpec, box: Box,
+                    crop_box: Box, parameters: tuple) -> None:
+    """
+    Worker side of the shared memory dispatch: reads the tile plus its halo from the source image, runs the
+    benchmark on it and writes the trimmed result straight into the result image. Only coordinates cross the
+    process boundary.
+    :param benchmark: The benchmark function, called as benchmark(sub_image, *parameters).
+    :param source_spec: The spec of the shared source image.
+    :param result_spec: The spec of the shared result image.
+    :param box: The tile box.
+    :param crop_box: The tile box extended by the halo.
+    :param parameters: The benchmark parameters following the sub-image.
+    :return:
+    """
+    source_block = _attach_shared_block(source_spec[0])
+    source_array = np.ndarray(source_spec[1], dtype=np.uint8, buffer=source_block.buf)
+    sub_image: Image.Image = Image.fromarray(source_array[crop_box[1]:crop_box[3], crop_box[0]:crop_box[2]].copy())
+    del source_array
+    source_block.close()
+    result_array = np.asarray(benchmark(sub_image, *parameters).convert("RGB"))
+    left, upper, right, lower = box
+    trim_left: int = left - crop_box[0]
+    trim_upper: int = upper - crop_box[1]
+    result_block = _attach_shared_block(result_spec[0])
+    shared_result_array = np.ndarray(result_spec[1], dtype=np.uint8, buffer=result_block.buf)
+    shared_result_array[upper:lower, left:right] = result_array[trim_upper:trim_upper + lower - upper,
+                                                                trim_left:trim_left + right - left]
+    del shared_result_array
+    result_block.close()
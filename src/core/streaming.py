@@ -0,0 +1,99 @@
+import struct
+import zlib
+from typing import BinaryIO
+import numpy as np
+from PIL import Image
+
+from . import tiling
+
+_png_signature: bytes = b"\x89PNG\r\n\x1a\n"
+
+
+class PngRowWriter:
+    _output: BinaryIO
+    _width: int
+    _rows_left: int
+    _compressor: object
+
+    def __init__(self, output: BinaryIO, width: int, height: int):
+        """
+        Starts writing an 8-bit RGB PNG whose rows are given in order, a band at a time, so that the image is never
+        held whole in memory. Every band is compressed and written as soon as it is given.
+        :param output: The binary stream to write to.
+        :param width: The width of the image.
+        :param height: The height of the image.
+        """
+        self._output = output
+        self._width = width
+        self._rows_left = height
+        self._compressor = zlib.compressobj(6)
+        self._output.write(_png_signature)
+        # 8 bits per channel, truecolor, default compression and filter methods, not interlaced
+        self._write_chunk(b"IHDR", struct.pack(">IIBBBBB", width, height, 8, 2, 0, 0, 0))
+
+    def write_rows(self, rows_array: np.ndarray) -> None:
+        """
+        Writes the next rows of the image.
+        :param rows_array: The (rows, width, 3) uint8 array of the rows.
+        :return:
+        """
+        rows: int = rows_array.shape[0]
+        if rows_array.shape[1:] != (self._width, 3) or rows > self._rows_left:
+            raise ValueError(f"Invalid rows of shape {rows_array.shape}, {self._rows_left} rows left")
+        # Each row starts with its filter type, 0 leaves it unfiltered
+        scanlines = np.zeros((rows, self._width * 3 + 1), dtype=np.uint8)
+        scanlines[:, 1:] = rows_array.reshape(rows, -1)
+        compressed: bytes = self._compressor.compress(scanlines.tobytes())
+        if compressed:
+            self._write_chunk(b"IDAT", compressed)
+        self._rows_left -= rows
+
+    def close(self) -> None:
+        """
+        Flushes the compressed rows and ends the image. Every row must have been written.
+        :return:
+        """
+        if self._rows_left:
+            raise ValueError(f"The image is missing {self._rows_left} rows")
+        self._write_chunk(b"IDAT", self._compressor.flush())
+        self._write_chunk(b"IEND", b"")
+
+    def _write_chunk(self, chunk_type: bytes, data: bytes) -> None:
+        """
+        Writes a PNG chunk: its length, type, data and CRC.
+        :param chunk_type: The four letters chunk type.
+        :param data: The chunk data.
+        :return:
+        """
+        self._output.write(struct.pack(">I", len(data)) + chunk_type + data +
+                           struct.pack(">I", zlib.crc32(chunk_type + data)))
+
+
+def plan_bands(width: int, height: int, band_rows: int, halo: int) -> tiling.TileLayout:
+    """
+    Plans the full-width horizontal bands an image is streamed as, top to bottom.
+    :param width: The width of the image.
+    :param height: The height of the image.
+    :param band_rows: The rows of every band, the last one may be shorter.
+    :param halo: The halo width in pixels.
+    :return: The (band box, cropped box with halo) pairs.
+    """
+    boxes: list[tiling.Box] = [(0, upper, width, min(height, upper + band_rows))
+                               for upper in range(0, height, band_rows)]
+    return tiling.add_halo(boxes, halo, width, height)
+
+
+def run_band(benchmark: callable, band_image: Image.Image, box: tiling.Box, crop_box: tiling.Box,
+             parameters: tuple) -> np.ndarray:
+    """
+    Runs the benchmark on a band plus its halo and trims the halo off.
+    :param benchmark: The benchmark function, called as benchmark(sub_image, *parameters).
+    :param band_image: The band, halo included.
+    :param box: The band box.
+    :param crop_box: The band box extended by the halo.
+    :param parameters: The benchmark parameters following the sub-image.
+    :return: The (rows, width, 3) uint8 array of the band.
+    """
+    result_array = np.asarray(benchmark(band_image, *parameters).convert("RGB"))
+    trim_upper: int = box[1] - crop_box[1]
+    return result_array[trim_upper:trim_upper + box[3] - box[1]]
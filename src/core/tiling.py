@@ -0,0 +1,121 @@
+from PIL import Image
+
+# (left, upper, right, lower) box, as used by PIL
+Box = tuple[int, int, int, int]
+# (tile box, cropped box with halo) pairs
+TileLayout = list[tuple[Box, Box]]
+
+division_modes: list[str] = ["lines", "grid"]
+
+
+def _split_axis(length: int, parts: int) -> list[int]:
+    """
+    Splits an axis into parts whose lengths differ by one pixel at most.
+    :param length: The length of the axis.
+    :param parts: The number of parts.
+    :return: The parts boundaries, from 0 to length included.
+    """
+    return [round(index * length / parts) for index in range(parts + 1)]
+
+
+def _plan_grid_shape(width: int, height: int, parts: int) -> tuple[int, int]:
+    """
+    Picks the rows x columns factorization of parts whose tiles are the closest to squares.
+    Prime part counts fall back to bands along the longest side of the image.
+    :param width: The width of the image.
+    :param height: The height of the image.
+    :param parts: The number of tiles.
+    :return: The (rows, columns) of the grid.
+    """
+    best_shape: tuple[int, int] = (1, parts) if width >= height else (parts, 1)
+    best_score: float = float("inf")
+    for rows in range(1, parts + 1):
+        if parts % rows != 0:
+            continue
+        columns: int = parts // rows
+        if rows > height or columns > width:
+            continue
+        tile_width: float = width / columns
+        tile_height: float = height / rows
+        score: float = max(tile_width / tile_height, tile_height / tile_width)
+        if score < best_score:
+            best_shape, best_score = (rows, columns), score
+    return best_shape
+
+
+def plan_tiles(width: int, height: int, parts: int, mode: str) -> list[Box]:
+    """
+    Plans the tiles an image is divided into. The tiles cover every pixel and their pixel counts are balanced.
+    :param width: The width of the image.
+    :param height: The height of the image.
+    :param parts: The number of tiles, usually the number of worker cores.
+    :param mode: One of the division modes: vertical lines or a rows x columns grid.
+    :return: The (left, upper, right, lower) boxes of the tiles, row by row.
+    """
+    if mode == division_modes[0]:
+        rows, columns = 1, min(parts, width)
+    elif mode == division_modes[1]:
+        rows, columns = _plan_grid_shape(width, height, parts)
+        rows, columns = min(rows, height), min(columns, width)
+    else:
+        raise ValueError(f"Invalid division mode: {mode}")
+    x_bounds: list[int] = _split_axis(width, columns)
+    y_bounds: list[int] = _split_axis(height, rows)
+    return [(x_bounds[column], y_bounds[row], x_bounds[column + 1], y_bounds[row + 1])
+            for row in range(rows) for column in range(columns)]
+
+
+def add_halo(boxes: list[Box], halo: int, width: int, height: int) -> TileLayout:
+    """
+    Extends the given tiles by a halo, clamped to the image borders.
+    :param boxes: The tiles boxes.
+    :param halo: The halo width in pixels.
+    :param width: The width of the image.
+    :param height: The height of the image.
+    :return: The (tile box, cropped box with halo) pairs.
+    """
+    return [((left, upper, right, lower),
+             (max(0, left - halo), max(0, upper - halo), min(width, right + halo), min(height, lower + halo)))
+            for left, upper, right, lower in boxes]
+
+
+def halo_overhead(layout: TileLayout) -> float:
+    """
+    Returns the share of extra pixels processed because of the halo.
+    :param layout: The (tile box, cropped box with halo) pairs.
+    :return: The ratio between the halo pixels and the image pixels.
+    """
+    core_pixels: int = 0
+    cropped_pixels: int = 0
+    for box, crop_box in layout:
+        core_pixels += (box[2] - box[0]) * (box[3] - box[1])
+        cropped_pixels += (crop_box[2] - crop_box[0]) * (crop_box[3] - crop_box[1])
+    return cropped_pixels / core_pixels - 1
+
+
+def crop_tiles(image: Image.Image, layout: TileLayout) -> list[Image.Image]:
+    """
+    Crops the tiles, halo included, out of the image.
+    :param image: The image to divide.
+    :param layout: The (tile box, cropped box with halo) pairs.
+    :return: The sub-images.
+    """
+    return [image.crop(crop_box) for _, crop_box in layout]
+
+
+def merge_tiles(sub_images: list[Image.Image], layout: TileLayout, size: tuple[int, int]) -> Image.Image:
+    """
+    Trims the halo of the processed sub-images and pastes them into one image.
+    :param sub_images: The processed sub-images, in the layout order.
+    :param layout: The (tile box, cropped box with halo) pairs.
+    :param size: The size of the merged image.
+    :return: The merged image.
+    """
+    merged_image = Image.new("RGBA", size)
+    for sub_image, (box, crop_box) in zip(sub_images, layout):
+        left, upper, right, lower = box
+        trim_left: int = left - crop_box[0]
+        trim_upper: int = upper - crop_box[1]
+        merged_image.paste(sub_image.crop((trim_left, trim_upper, trim_left + right - left,
+                                           trim_upper + lower - upper)), (left, upper))
+    return merged_image
@@ -0,0 +1,84 @@
+import time
+import numpy as np
+
+# Tukey fences: samples farther than this many interquartile ranges from the quartiles are rejected as outliers
+outlier_fence: float = 1.5
+confidence_level: float = 0.95
+bootstrap_resamples: int = 2000
+
+
+def measure(task: callable) -> tuple[object, float]:
+    """
+    Runs the task and measures it with the monotonic high resolution clock.
+    :param task: The function to run, without arguments.
+    :return: The task result and the elapsed seconds.
+    """
+    start_time: int = time.perf_counter_ns()
+    result = task()
+    return result, (time.perf_counter_ns() - start_time) / 1e9
+
+
+def reject_outliers(samples: list[float]) -> tuple[list[float], list[float]]:
+    """
+    Splits the samples using Tukey fences. Too few samples to estimate the quartiles are all kept.
+    :param samples: The measured samples.
+    :return: The kept samples and the rejected ones.
+    """
+    if len(samples) < 4:
+        return list(samples), []
+    first_quartile, third_quartile = np.percentile(samples, [25, 75])
+    fence: float = outlier_fence * (third_quartile - first_quartile)
+    kept: list[float] = [sample for sample in samples if first_quartile - fence <= sample <= third_quartile + fence]
+    rejected: list[float] = [sample for sample in samples if sample not in kept]
+    return kept, rejected
+
+
+def bootstrap_median_interval(samples: list[float], seed: int = 0) -> tuple[float, float]:
+    """
+    Estimates the confidence interval of the median by resampling the samples with replacement.
+    :param samples: The samples.
+    :param seed: The seed of the resampling, fixed so that the same samples give the same interval.
+    :return: The lower and upper bounds of the interval.
+    """
+    values: np.ndarray = np.asarray(samples, dtype=np.float64)
+    if values.size == 1:
+        return float(values[0]), float(values[0])
+    indexes: np.ndarray = np.random.default_rng(seed).integers(0, values.size, (bootstrap_resamples, values.size))
+    medians: np.ndarray = np.median(values[indexes], axis=1)
+    tail: float = (1 - confidence_level) / 2 * 100
+    lower, upper = np.percentile(medians, [tail, 100 - tail])
+    return float(lower), float(upper)
+
+
+def summarize_samples(samples: list[float]) -> dict[str, float]:
+    """
+    Summarizes the repeated measures of a configuration. The median, standard deviation and confidence interval are
+    computed once the outliers are rejected, the 95th percentile on every sample since it describes the tail.
+    :param samples: The measured seconds, one per repetition.
+    :return: The summary: median, mean, p95, stdev, ci_low, ci_high, runs and rejected.
+    """
+    kept, rejected = reject_outliers(samples)
+    ci_low, ci_high = bootstrap_median_interval(kept)
+    return {
+        "median": float(np.median(kept)),
+        "mean": float(np.mean(kept)),
+        "p95": float(np.percentile(samples, 95)),
+        "stdev": float(np.std(kept, ddof=1)) if len(kept) > 1 else 0.0,
+        "ci_low": ci_low,
+        "ci_high": ci_high,
+        "runs": len(samples),
+        "rejected": len(rejected)
+    }
+
+
+def describe_summary(summary: dict[str, float]) -> str:
+    """
+    Describes a samples summary in a human-readable way.
+    :param summary: The summary, as returned by summarize_samples.
+    :return: The description.
+    """
+    if summary["runs"] == 1:
+        return f"{summary['median']:.4f}s (single run)"
+    return (f"{summary['median']:.4f}s median of {summary['runs']} runs, "
+            f"{confidence_level * 100:.0f}% CI {summary['ci_low']:.4f}-{summary['ci_high']:.4f}s, "
+            f"p95 {summary['p95']:.4f}s, stdev {summary['stdev']:.4f}s, {summary['rejected']} outlier(s) rejected")
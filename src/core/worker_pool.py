@@ -0,0 +1,250 @@
+import heapq
+import math
+import os
+import pickle
+import threading
+import time
+from collections import deque
+from collections.abc import Iterable, Iterator
+from multiprocessing import Pool
+from multiprocessing.pool import Pool as PoolType
+
+
+def _warm_up_worker() -> None:
+    """
+    Pool initializer: imports the algorithm modules, and with them PIL, NumPy and SciPy, and takes the host
+    measurements the algorithms rely on, before any task arrives.
+    :return:
+    """
+    from ..algorithms import morphological_operators, convolution, noise_reduction, canny
+    convolution.calibrate_convolution_costs()
+
+
+def _ping(_: int) -> None:
+    """
+    No-op task used to wait for every worker to be up.
+    :return:
+    """
+    return None
+
+
+def _run_timed_chunk(task: callable, payload: bytes) -> tuple[int, float, float, bytes]:
+    """
+    Worker side of a chunk: unpickles the arguments, runs the task on every arguments tuple, timing each one, and
+    pickles the results. Pickling is done explicitly on both sides so that its cost can be measured.
+    :param task: The function to run.
+    :param payload: The pickled arguments tuples of the chunk.
+    :return: The worker pid, the seconds spent unpickling the arguments and pickling the results, and the pickled
+    (result, seconds) of every task.
+    """
+    start_time: float = time.perf_counter()
+    chunk_args: list[tuple] = pickle.loads(payload)
+    deserialize_time: float = time.perf_counter() - start_time
+    outputs: list[tuple] = []
+    for arguments in chunk_args:
+        start_time = time.perf_counter()
+        result = task(*arguments)
+        outputs.append((result, time.perf_counter() - start_time))
+    start_time = time.perf_counter()
+    packed_outputs: bytes = pickle.dumps(outputs, protocol=pickle.HIGHEST_PROTOCOL)
+    return os.getpid(), deserialize_time, time.perf_counter() - start_time, packed_outputs
+
+
+def summarize_load_balance(task_times: list[float], busy_times: dict[int, float], wall_time: float,
+                           active_workers: int) -> dict[str, float]:
+    """
+    Summarizes how well the work of a run was spread over the workers.
+    The gain over static partitioning compares two makespans estimated from the measured task times: one giving
+    each worker a contiguous group of tasks, as a static split does, and one handing the next task to the first
+    free worker, as the dynamic dispatch does.
+    :param task_times: The seconds each task took.
+    :param busy_times: The seconds each worker spent running tasks.
+    :param wall_time: The wall-clock seconds of the run.
+    :param active_workers: The number of workers the run could use.
+    :return: The total busy and idle seconds, the workers utilization and the estimated gain over a static split.
+    """
+    busy: float = sum(busy_times.values())
+    group_size: int = math.ceil(len(task_times) / active_workers)
+    static_makespan: float = max(sum(task_times[start:start + group_size])
+                                 for start in range(0, len(task_times), group_size))
+    worker_finish_times: list[float] = [0.0] * active_workers
+    for task_time in task_times:
+        heapq.heapreplace(worker_finish_times, worker_finish_times[0] + task_time)
+    dynamic_makespan: float = max(worker_finish_times)
+    return {
+        "busy": busy,
+        "idle": max(0.0, active_workers * wall_time - busy),
+        "utilization": busy / (active_workers * wall_time) if wall_time > 0 else 0.0,
+        "static_gain": static_makespan / dynamic_makespan if dynamic_makespan > 0 else 1.0
+    }
+
+
+class WarmWorkerPool:
+    _pool: PoolType
+    _processes: int
+    _startup_time: float
+    _last_task_times: list[float] = []
+    _last_busy_times: dict[int, float] = {}
+    _last_phase_times: dict[str, float] = {}
+
+    def __init__(self, processes: int):
+        """
+        Starts a pool of warm workers and waits for them to be ready, measuring the start-up cost.
+        :param processes: The number of worker processes.
+        """
+        start_time: float = time.perf_counter()
+        # Warming up the parent first lets forked workers inherit its imports and measurements
+        _warm_up_worker()
+        self._pool = Pool(processes, initializer=_warm_up_worker)
+        self._pool.map(_ping, range(processes), chunksize=1)
+        self._startup_time = time.perf_counter() - start_time
+        self._processes = processes
+
+    @property
+    def processes(self) -> int:
+        """
+        The number of worker processes.
+        """
+        return self._processes
+
+    @property
+    def startup_time(self) -> float:
+        """
+        The seconds spent starting the pool and importing the algorithm modules in every worker.
+        """
+        return self._startup_time
+
+    @property
+    def last_task_times(self) -> list[float]:
+        """
+        The worker-side seconds each task of the last run took, in the arguments order.
+        """
+        return self._last_task_times
+
+    @property
+    def last_busy_times(self) -> dict[int, float]:
+        """
+        The worker-side seconds each worker process, by pid, spent running tasks in the last run.
+        """
+        return self._last_busy_times
+
+    @property
+    def last_phase_times(self) -> dict[str, float]:
+        """
+        The seconds the last run spent in each phase: "serialize" and "deserialize results" are measured in this
+        process, "deserialize", "compute" and "serialize results" are summed over the workers.
+        """
+        return self._last_phase_times
+
+    def starmap(self, task: callable, args: list[tuple], active_workers: int, should_stop: callable,
+                guided: bool = False) -> list | None:
+        """
+        Runs task(*arguments) for every arguments tuple, keeping at most active_workers chunks in flight so that a
+        configuration with N cores never uses more than N workers of the pool. Chunks are handed out as workers
+        free up, so faster workers take more of them.
+        :param task: The function to run.
+        :param args: The arguments tuples.
+        :param active_workers: The maximum number of chunks running at the same time.
+        :param should_stop: Called while waiting, the pool is terminated as soon as it returns True.
+        :param guided: Whether chunks shrink as the remaining tasks decrease (guided self-scheduling) instead of
+        holding a single task each.
+        :return: The results in the arguments order, or None if the run was stopped.
+        """
+        results: list = [None] * len(args)
+        self._last_task_times = [0.0] * len(args)
+        self._last_busy_times = {}
+        self._last_phase_times = {"serialize": 0.0, "deserialize": 0.0, "compute": 0.0, "serialize results": 0.0,
+                                  "deserialize results": 0.0}
+        next_index: int = 0
+        in_flight: dict = {}
+        finished: list[int] = []
+        condition = threading.Condition()
+
+        def on_finished(chunk_start: int) -> None:
+            with condition:
+                finished.append(chunk_start)
+                condition.notify()
+
+        while next_index < len(args) or in_flight:
+            while next_index < len(args) and len(in_flight) < active_workers:
+                chunk_size: int = 1
+                if guided:
+                    chunk_size = math.ceil((len(args) - next_index) / (2 * active_workers))
+                indices: range = range(next_index, next_index + chunk_size)
+                start_time: float = time.perf_counter()
+                payload: bytes = pickle.dumps([args[index] for index in indices], protocol=pickle.HIGHEST_PROTOCOL)
+                self._last_phase_times["serialize"] += time.perf_counter() - start_time
+                in_flight[next_index] = (self._pool.apply_async(
+                    _run_timed_chunk, (task, payload),
+                    callback=lambda _, i=next_index: on_finished(i),
+                    error_callback=lambda _, i=next_index: on_finished(i)), indices)
+                next_index += chunk_size
+            with condition:
+                while not finished:
+                    if should_stop():
+                        self.terminate()
+                        return None
+                    condition.wait(0.05)
+                done: list[int] = finished.copy()
+                finished.clear()
+            for chunk_start in done:
+                async_handler, indices = in_flight.pop(chunk_start)
+                pid, deserialize_time, serialize_time, packed_outputs = async_handler.get()
+                start_time: float = time.perf_counter()
+                outputs: list[tuple] = pickle.loads(packed_outputs)
+                self._last_phase_times["deserialize results"] += time.perf_counter() - start_time
+                self._last_phase_times["deserialize"] += deserialize_time
+                self._last_phase_times["serialize results"] += serialize_time
+                for index, (result, elapsed) in zip(indices, outputs):
+                    self._last_phase_times["compute"] += elapsed
+                    results[index] = result
+                    self._last_task_times[index] = elapsed
+                    self._last_busy_times[pid] = self._last_busy_times.get(pid, 0.0) + elapsed
+        return results
+
+    def imap_bounded(self, task: callable, args: Iterable[tuple], max_in_flight: int,
+                     should_stop: callable) -> Iterator:
+        """
+        Runs task(*arguments) for every arguments tuple and yields the results in the arguments order. The arguments
+        are only drawn from the iterable when fewer than max_in_flight tasks are submitted and not yet yielded, so
+        that the memory held by the arguments and the results stays bounded.
+        :param task: The function to run.
+        :param args: The arguments tuples, possibly a generator.
+        :param max_in_flight: The maximum number of submitted tasks whose result has not been yielded yet.
+        :param should_stop: Called while waiting, the pool is terminated and the iteration ends as soon as it
+        returns True.
+        :return: The results, in order.
+        """
+        pending: deque = deque()
+        args_iterator: Iterator[tuple] = iter(args)
+        exhausted: bool = False
+        while True:
+            while not exhausted and len(pending) < max_in_flight:
+                arguments: tuple | None = next(args_iterator, None)
+                if arguments is None:
+                    exhausted = True
+                else:
+                    pending.append(self._pool.apply_async(task, arguments))
+            if not pending:
+                return
+            async_handler = pending.popleft()
+            while not async_handler.ready():
+                if should_stop():
+                    self.terminate()
+                    return
+                async_handler.wait(0.05)
+            yield async_handler.get()
+
+    def terminate(self) -> None:
+        """
+        Stops the workers immediately.
+        :return:
+        """
+        self._pool.terminate()
+
+    def close(self) -> None:
+        """
+        Lets the workers exit once idle.
+        :return:
+        """
+        self._pool.close()
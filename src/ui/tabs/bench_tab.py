@@ -1,8 +1,14 @@
 import customtkinter
 import io
+import sys
 import matplotlib.pyplot as plt
+from pathlib import Path
 from PIL import Image
+from customtkinter import filedialog
 
+CURRENT_POSITION = Path(__file__).parent
+sys.path.append(f"{CURRENT_POSITION}/../../../")
+from src.core import scaling, timing
 from ..components.image_viewer_top_level import ImageViewerTopLevel
 
 
@@ -16,12 +22,27 @@ class BenchTab:
     _result_bench_plot_thumbnail: customtkinter.CTkImage
     _result_bench_plot_viewer: customtkinter.CTkLabel
     _result_bench_plot_viewer_text: str = "Performance Plot"
+    _phase_plot_thumbnail: customtkinter.CTkImage
+    _phase_plot_viewer: customtkinter.CTkLabel
+    _phase_plot_viewer_text: str = "Phase Breakdown"
+    _scaling_plot_thumbnail: customtkinter.CTkImage
+    _scaling_plot_viewer: customtkinter.CTkLabel
+    _scaling_plot_viewer_text: str = "Scaling Analysis"
+    _scaling_title: customtkinter.CTkLabel
+    _scaling_label_frame: customtkinter.CTkFrame
+    _scaling_text: customtkinter.CTkLabel
+    _scaling_export_btn: customtkinter.CTkButton
     _top_level_image_viewer: ImageViewerTopLevel | None = None
     _timestamp_title: customtkinter.CTkLabel
     _timestamp_label_frame: customtkinter.CTkFrame
     _timestamp_text: customtkinter.CTkLabel
+    _details_text: customtkinter.CTkLabel
     _result_image: Image.Image | None = None
     _plot_image: Image.Image | None = None
+    _phase_plot_image: Image.Image | None = None
+    _scaling_plot_image: Image.Image | None = None
+    _scaling_rows: list[dict[str, object]] = []
+    _phase_colors: list[str] = ["#3B8ED0", "#E8A33D", "#2CC985", "#9B59B6", "#D35B58", "#A0A0A0"]
 
     def __init__(self, container: customtkinter.CTkTabview):
         """
@@ -70,6 +91,45 @@ class BenchTab:
         self._timestamp_text = customtkinter.CTkLabel(self._timestamp_label_frame, text="",
                                                       font=customtkinter.CTkFont(size=20))
         self._timestamp_text.grid(row=0, column=0, sticky="nsew", pady=(20, 0))
+        self._details_text = customtkinter.CTkLabel(self._timestamp_label_frame, text="",
+                                                    font=customtkinter.CTkFont(size=18, slant="italic"))
+        self._details_text.grid(row=1, column=0, sticky="nsew", pady=(10, 20))
+        # Phase breakdown plot viewer
+        self._phase_plot_thumbnail = self._get_placeholder_thumbnail()
+        self._phase_plot_viewer = customtkinter.CTkLabel(self._main_container, text=self._phase_plot_viewer_text,
+                                                         image=self._phase_plot_thumbnail, compound="bottom",
+                                                         font=customtkinter.CTkFont(size=18, weight="bold"))
+        self._phase_plot_viewer.grid(row=3, column=0, sticky="nw", pady=(20, 10), padx=(20, 0))
+        self._phase_plot_viewer.bind("<Button-1>", self._on_preview_image_click)
+        # Scaling plot viewer
+        self._scaling_plot_thumbnail = self._get_placeholder_thumbnail()
+        self._scaling_plot_viewer = customtkinter.CTkLabel(self._main_container, text=self._scaling_plot_viewer_text,
+                                                           image=self._scaling_plot_thumbnail, compound="bottom",
+                                                           font=customtkinter.CTkFont(size=18, weight="bold"))
+        self._scaling_plot_viewer.grid(row=3, column=2, sticky="ne", pady=(20, 10), padx=(0, 20))
+        self._scaling_plot_viewer.bind("<Button-1>", self._on_preview_image_click)
+        # Scaling table
+        self._scaling_title = customtkinter.CTkLabel(self._main_container, text="Scaling Metrics",
+                                                     font=customtkinter.CTkFont(size=22, weight="bold"))
+        self._scaling_title.grid(row=4, column=0, columnspan=3, pady=(20, 20), sticky="new")
+        self._scaling_label_frame = customtkinter.CTkFrame(self._main_container)
+        self._scaling_label_frame.columnconfigure(0, weight=1)
+        self._scaling_label_frame.grid(row=5, column=0, columnspan=3, sticky="nsew")
+        self._scaling_text = customtkinter.CTkLabel(self._scaling_label_frame, text="",
+                                                    font=customtkinter.CTkFont(size=18, family="Courier"))
+        self._scaling_text.grid(row=0, column=0, sticky="nsew", pady=(20, 0))
+        self._scaling_export_btn = customtkinter.CTkButton(self._scaling_label_frame, text="Export table as CSV",
+                                                           command=self._on_scaling_export_btn, state="disabled")
+        self._scaling_export_btn.grid(row=1, column=0, pady=(10, 20))
+
+    @staticmethod
+    def _get_placeholder_thumbnail() -> customtkinter.CTkImage:
+        """
+        Returns the blank thumbnail shown by a plot viewer with nothing to show.
+        :return: The placeholder thumbnail.
+        """
+        return customtkinter.CTkImage(light_image=Image.new("RGB", (512, 512), color="#dbdbdb"),
+                                      dark_image=Image.new("RGB", (512, 512), color="#2b2b2b"), size=(512, 512))
 
     def _refresh_top_level_image_viewer(self, element: str) -> None:
         """
@@ -78,22 +138,29 @@ class BenchTab:
         """
         if self._top_level_image_viewer is None or not self._top_level_image_viewer.winfo_exists():
             return
+        self._top_level_image_viewer.set_image(self._get_viewer_image(element))
+
+    def _get_viewer_image(self, element: str) -> Image.Image | None:
+        """
+        Returns the full size image shown by a viewer.
+        :param element: The text of the viewer.
+        :return: The image, None if there is nothing to show yet.
+        """
         if element == self._result_image_viewer_text:
-            self._top_level_image_viewer.set_image(self._result_image)
-        else:
-            self._top_level_image_viewer.set_image(self._plot_image)
+            return self._result_image
+        elif element == self._phase_plot_viewer_text:
+            return self._phase_plot_image
+        elif element == self._scaling_plot_viewer_text:
+            return self._scaling_plot_image
+        return self._plot_image
 
     def _on_preview_image_click(self, event) -> None:
         """
         Called when the preview image is clicked. Opens the image in the image viewer.
         :return:
         """
-        if event.widget.cget("text") == self._result_image_viewer_text:
-            if self._result_image is None:
-                return
-        else:
-            if self._plot_image is None:
-                return
+        if self._get_viewer_image(event.widget.cget("text")) is None:
+            return
         if self._top_level_image_viewer is None or not self._top_level_image_viewer.winfo_exists():
             self._top_level_image_viewer = ImageViewerTopLevel()
             self._top_level_image_viewer.title("Image Viewer - BenchTab")
@@ -101,15 +168,32 @@ class BenchTab:
             self._top_level_image_viewer.focus()
         self._refresh_top_level_image_viewer(event.widget.cget("text"))
 
-    def update_bench_view(self, image: Image.Image, timestamps: dict[str, float]) -> None:
+    def update_bench_view(self, image: Image.Image, timestamps: dict[str, float],
+                          details: dict[str, str] | None = None,
+                          statistics: dict[str, dict[str, float]] | None = None,
+                          phases: dict[str, dict[str, float]] | None = None,
+                          cached: list[str] | None = None) -> None:
         """
         Updates the Bench tab with the new image and timestamps.
         :param image: The merged image.
         :param timestamps: The timestamps.
+        :param details: Additional notes about how the benchmark was executed.
+        :param statistics: The summary of the repeated runs of every configuration.
+        :param phases: The seconds every configuration spent in each phase.
+        :param cached: The configurations whose timings were reused from the result cache.
         :return:
         """
         self._set_result_image(image)
-        self._set_timestamps(timestamps)
+        self._set_timestamps(timestamps, statistics if statistics else {}, cached if cached else [])
+        if phases:
+            self._set_phase_plot_image(phases)
+        else:
+            # The plot of a previous run must not be mistaken for this one
+            self._phase_plot_image = None
+            self._phase_plot_thumbnail = self._get_placeholder_thumbnail()
+            self._phase_plot_viewer.configure(image=self._phase_plot_thumbnail)
+        self._set_scaling(timestamps)
+        self._set_details(details if details else {})
 
     def _set_result_image(self, image: Image.Image) -> None:
         """
@@ -123,37 +207,159 @@ class BenchTab:
         self._result_image_viewer.configure(image=self._result_image_thumbnail)
         self._refresh_top_level_image_viewer(self._result_image_viewer_text)
 
-    def _set_timestamps(self, timestamps: dict[str, float]) -> None:
+    def _set_timestamps(self, timestamps: dict[str, float], statistics: dict[str, dict[str, float]],
+                        cached: list[str]) -> None:
         """
         Displays plot and timestamps
         :param timestamps: The timestamps.
+        :param statistics: The summary of the repeated runs of every configuration.
+        :param cached: The configurations whose timings were reused from the result cache, marked as such.
         :return:
         """
-        self._set_plot_image(timestamps)
+        self._set_plot_image(timestamps, statistics)
         results: str = ""
         for key, value in timestamps.items():
-            results += f"{key}: {value:.2f}s\n"
+            label: str = f"{key} (cached)" if key in cached else key
+            if key in statistics:
+                results += f"{label}: {timing.describe_summary(statistics[key])}\n"
+            else:
+                results += f"{label}: {value:.2f}s\n"
         self._timestamp_text.configure(text=results)
 
-    def _set_plot_image(self, timestamps: dict[str, float]) -> None:
+    def _set_details(self, details: dict[str, str]) -> None:
+        """
+        Displays the execution details.
+        :param details: The details.
+        :return:
+        """
+        results: str = ""
+        for key, value in details.items():
+            results += f"{key}: {value}\n"
+        self._details_text.configure(text=results)
+
+    def _set_plot_image(self, timestamps: dict[str, float], statistics: dict[str, dict[str, float]]) -> None:
         """
-        Creates the plot image.
+        Creates the plot image. The error bars show the confidence interval of the median, when available.
         :return:
         """
         y_elements: list[str] = list(timestamps.keys())
         x_elements: list[float] = list(timestamps.values())
+        x_errors: list[list[float]] | None = None
+        if statistics:
+            x_errors = [[max(timestamps[key] - statistics[key]["ci_low"], 0) for key in y_elements],
+                        [max(statistics[key]["ci_high"] - timestamps[key], 0) for key in y_elements]]
         plt.clf()
-        bar_h = plt.barh(y_elements, x_elements, height=0.8, color="#2CC985")
+        bar_h = plt.barh(y_elements, x_elements, height=0.8, color="#2CC985", xerr=x_errors, capsize=6)
         plt.bar_label(bar_h, labels=['%.2f' % e for e in x_elements],
                       padding=-30, fontsize=21)
         plt.ylabel("CPU set")
         plt.xlabel("Time (s)")
         plt.title("Execution Time Comparison")
+        self._plot_image = self._render_plot()
+        self._result_bench_plot_thumbnail = customtkinter.CTkImage(light_image=self._plot_image,
+                                                                   size=(512, 512))
+        self._result_bench_plot_viewer.configure(image=self._result_bench_plot_thumbnail)
+
+    def _set_phase_plot_image(self, phases: dict[str, dict[str, float]]) -> None:
+        """
+        Creates the phase breakdown plot image: one stacked bar per CPU set, one segment per phase.
+        :param phases: The seconds every configuration spent in each phase.
+        :return:
+        """
+        y_elements: list[str] = list(phases.keys())
+        phase_names: list[str] = list(next(iter(phases.values())).keys())
+        left: list[float] = [0.0] * len(y_elements)
+        plt.clf()
+        for phase_name, color in zip(phase_names, self._phase_colors):
+            x_elements: list[float] = [phases[key][phase_name] for key in y_elements]
+            plt.barh(y_elements, x_elements, height=0.8, left=left, color=color, label=phase_name)
+            left = [start + width for start, width in zip(left, x_elements)]
+        plt.legend(loc="best", fontsize=8)
+        plt.ylabel("CPU set")
+        plt.xlabel("Time (s)")
+        plt.title("Where The Time Goes")
+        self._phase_plot_image = self._render_plot()
+        self._phase_plot_thumbnail = customtkinter.CTkImage(light_image=self._phase_plot_image, size=(512, 512))
+        self._phase_plot_viewer.configure(image=self._phase_plot_thumbnail)
+
+    def _set_scaling(self, timestamps: dict[str, float]) -> None:
+        """
+        Displays the scaling metrics table and plot.
+        :param timestamps: The timestamps.
+        :return:
+        """
+        self._scaling_rows = scaling.compute_scaling(timestamps) if "Serial" in timestamps else []
+        if len(self._scaling_rows) < 2:
+            self._scaling_text.configure(text="At least the serial and one parallel configuration are needed.")
+            self._scaling_export_btn.configure(state="disabled")
+            self._scaling_plot_image = None
+            self._scaling_plot_thumbnail = self._get_placeholder_thumbnail()
+            self._scaling_plot_viewer.configure(image=self._scaling_plot_thumbnail)
+            return
+        results: str = f"{'CPU set':>10} {'Speedup':>8} {'Efficiency':>10} {'Karp-Flatt':>10}\n"
+        for row in self._scaling_rows:
+            karp_flatt: str = "-" if row["karp_flatt"] is None else f"{row['karp_flatt']:.3f}"
+            results += (f"{row['configuration']:>10} {row['speedup']:>7.2f}x {row['efficiency'] * 100:>9.0f}% "
+                        f"{karp_flatt:>10}\n")
+        for law in scaling.scaling_laws:
+            results += f"\n{law} fitted serial fraction: {scaling.fit_serial_fraction(self._scaling_rows, law):.3f}"
+        self._scaling_text.configure(text=results)
+        self._scaling_export_btn.configure(state="normal")
+        self._set_scaling_plot_image()
+
+    def _set_scaling_plot_image(self) -> None:
+        """
+        Creates the scaling plot image: measured speedup against the ideal one and the fitted scaling laws,
+        extrapolated past the benchmarked cores, then parallel efficiency and Karp-Flatt serial fraction.
+        :return:
+        """
+        cores: list[int] = [row["cores"] for row in self._scaling_rows]
+        extrapolated_cores: list[int] = list(range(1, max(4 * max(cores), 16) + 1))
+        plt.clf()
+        plt.subplot(2, 1, 1)
+        plt.plot(extrapolated_cores, extrapolated_cores, linestyle=":", color="#A0A0A0", label="ideal")
+        for law, color in zip(scaling.scaling_laws, ["#3B8ED0", "#E8A33D"]):
+            serial_fraction: float = scaling.fit_serial_fraction(self._scaling_rows, law)
+            plt.plot(extrapolated_cores, [scaling.predict_speedup(law, serial_fraction, core_set)
+                                          for core_set in extrapolated_cores],
+                     color=color, label=f"{law} (f={serial_fraction:.3f})")
+        plt.plot(cores, [row["speedup"] for row in self._scaling_rows], "o", color="#2CC985", label="measured")
+        plt.axvline(max(cores), linestyle="--", color="#D35B58", linewidth=0.8)
+        plt.ylabel("Speedup")
+        plt.title("Scaling Analysis")
+        plt.legend(loc="upper left", fontsize=7)
+        plt.subplot(2, 1, 2)
+        plt.plot(cores, [row["efficiency"] for row in self._scaling_rows], "o-", color="#2CC985",
+                 label="efficiency")
+        plt.plot(cores[1:], [row["karp_flatt"] for row in self._scaling_rows[1:]], "s-", color="#9B59B6",
+                 label="Karp-Flatt")
+        plt.ylim(bottom=0)
+        plt.xlabel("CPU set")
+        plt.legend(loc="best", fontsize=7)
+        self._scaling_plot_image = self._render_plot()
+        self._scaling_plot_thumbnail = customtkinter.CTkImage(light_image=self._scaling_plot_image, size=(512, 512))
+        self._scaling_plot_viewer.configure(image=self._scaling_plot_thumbnail)
+
+    def _on_scaling_export_btn(self) -> None:
+        """
+        Called when the export button is pressed. Saves the scaling metrics table as CSV.
+        :return:
+        """
+        filepath: str = filedialog.asksaveasfilename(defaultextension=".csv", filetypes=[("CSV files", "*.csv")])
+        if not filepath:
+            return
+        with open(filepath, "w", newline="") as table_file:
+            table_file.write(scaling.format_scaling_table(self._scaling_rows))
+
+    @staticmethod
+    def _render_plot() -> Image.Image:
+        """
+        Renders the current plot.
+        :return: The plot image, resized for the viewers.
+        """
         img_buf = io.BytesIO()
         plt.savefig(img_buf, format='png')
         im = Image.open(img_buf)
-        self._plot_image = im.copy().resize((512, 512))
+        plot_image: Image.Image = im.copy().resize((512, 512))
         img_buf.close()
-        self._result_bench_plot_thumbnail = customtkinter.CTkImage(light_image=self._plot_image,
-                                                                   size=(512, 512))
-        self._result_bench_plot_viewer.configure(image=self._result_bench_plot_thumbnail)
+        return plot_image
@@ -1,65 +1,21 @@
-import pprint
 import threading
-import time
 import sys
 import customtkinter
 import multiprocessing
-import math
 from pathlib import Path
-from PIL import Image, ImageDraw, ImageFont
-from multiprocessing import Pool
-from multiprocessing.pool import Pool as PoolType
+from PIL import Image, ImageDraw
 from CTkMessagebox import CTkMessagebox
 from customtkinter import filedialog
 
 CURRENT_POSITION = Path(__file__).parent
 sys.path.append(f"{CURRENT_POSITION}/../../../")
-from src.algorithms import morphological_operators, convolution, noise_reduction, canny
+from src.core import tiling, runners
+from src.core.result_cache import ResultCache
+from src.core.benchmark import BenchmarkRunner, BenchmarkSettings, BenchmarkReport
 from ..components.image_viewer_top_level import ImageViewerTopLevel
 from .bench_tab import BenchTab
 
 
-def generic_benchmark(target_image: Image.Image, selected_algorithm_type: str,
-                      selected_algorithm_sub_type: str) -> Image.Image:
-    if selected_algorithm_type == convolution.name_native:
-        return convolution.convolve_native(target_image,
-                                           convolution.convolution_kernels[selected_algorithm_sub_type],
-                                           "edge_detection" in selected_algorithm_sub_type)
-    elif selected_algorithm_type == convolution.name_lib:
-        return convolution.convolve_lib(target_image, convolution.convolution_kernels[selected_algorithm_sub_type],
-                                        "edge_detection" in selected_algorithm_sub_type)
-    else:
-        raise ValueError(f"Invalid algorithm type: {selected_algorithm_type}")
-
-
-def one_parameter_benchmark(target_image: Image.Image, algorithm: str, parameter) -> Image.Image:
-    if algorithm == noise_reduction.noise_reduction_sub_types[0]:
-        return noise_reduction.mean_filter(target_image, parameter)
-    elif algorithm == convolution.name_native:
-        return convolution.convolve_native(target_image, parameter)
-    elif algorithm == convolution.name_lib:
-        return convolution.convolve_lib(target_image, parameter)
-
-
-def two_parameter_benchmark(target_image: Image.Image, algorithm: str, parameter_1, parameter_2) -> Image.Image:
-    if algorithm == morphological_operators.name:
-        return morphological_operators.morphological_operate(target_image, parameter_1, parameter_2)
-
-
-def three_parameters_benchmark(target_image: Image.Image,
-                               algorithm: str, parameter_1, parameter_2,
-                               parameter_3) -> Image.Image:
-    if algorithm == noise_reduction.noise_reduction_sub_types[1]:
-        return noise_reduction.bilateral_filter(target_image, parameter_1, parameter_2, parameter_3)
-
-
-def four_parameters_benchmark(target_image: Image.Image,
-                              algorithm: str, parameter_1, parameter_2,
-                              parameter_3, parameter_4) -> Image.Image:
-    if algorithm == canny.name:
-        return canny.canny_edge_detector(target_image, parameter_1, parameter_2, parameter_3, parameter_4)
-
-
 class MainTab:
     # tkinter widgets
     _reference: customtkinter.CTkFrame
@@ -82,7 +38,10 @@ class MainTab:
     _bench_all_checkbox: customtkinter.CTkCheckBox
     _image_options_label: customtkinter.CTkLabel
     _image_divider_switch: customtkinter.CTkSwitch
-    _square_division_warning_label: customtkinter.CTkLabel
+    _shared_memory_switch: customtkinter.CTkSwitch
+    _result_cache_switch: customtkinter.CTkSwitch
+    _tiles_per_worker_menu: customtkinter.CTkOptionMenu
+    _timing_runs_menu: customtkinter.CTkOptionMenu
     _bench_start_btn: customtkinter.CTkButton
     _bench_interrupt_btn: customtkinter.CTkButton
     _bench_progress_bar: customtkinter.CTkProgressBar
@@ -93,39 +52,36 @@ class MainTab:
     _status_label: customtkinter.CTkLabel
     # Image Viewer Widget
     _top_level_image_viewer: ImageViewerTopLevel | None = None
-    # Function references
-    _preview_image_divider_implementation: callable
-    _image_divider_implementation: callable
-    _image_merger_implementation: callable
     # Implemented algorithms (Name, HasSubTypes)
-    _implemented_algorithms: dict[str, bool] = {
-        convolution.name_native: True,
-        convolution.name_lib: True,
-        morphological_operators.name: True,
-        noise_reduction.name: True,
-        canny.name: False
-    }
+    _implemented_algorithms: dict[str, bool] = runners.implemented_algorithms
     # Algorithm states
     _selected_algorithm_type: str = ""
     _selected_algorithm_sub_type: str = ""
     _selected_algorithm_params: dict[str, dict] = {}
-    _specialized_runners: dict[str, callable] = {
-        convolution.parameterized_kernel_list[0]: one_parameter_benchmark,
-        noise_reduction.noise_reduction_sub_types[0]: one_parameter_benchmark,
-        noise_reduction.noise_reduction_sub_types[1]: three_parameters_benchmark,
-        canny.name: four_parameters_benchmark,
-        morphological_operators.morphological_sub_types[0]: two_parameter_benchmark,
-        morphological_operators.morphological_sub_types[1]: two_parameter_benchmark
-    }
     # Logic states
     _available_cpu_core: int = multiprocessing.cpu_count()
     _target_cpu_core_set: int = 1
     _target_image: Image.Image | None = None
     _resized_target_image: Image.Image | None = None
     _bench_all_configurations: bool = False
-    _is_square_dividing: bool = False
-    _bench_interrupt_signal: bool = False
-    _latest_bench_pool: PoolType | None = None
+    _division_mode: str = tiling.division_modes[0]
+    _use_shared_memory: bool = False
+    _tiles_per_worker: int = 1
+    _tiles_per_worker_choices: dict[str, int] = {
+        "1 tile per worker (static)": 1,
+        "2 tiles per worker (dynamic)": 2,
+        "4 tiles per worker (dynamic)": 4,
+        "8 tiles per worker (dynamic)": 8
+    }
+    # Warm-up and timed runs of every configuration
+    _timing_runs: tuple[int, int] = (1, 5)
+    _timing_runs_choices: dict[str, tuple[int, int]] = {
+        "Single timed run": (0, 1),
+        "1 warm-up + 5 timed runs": (1, 5),
+        "2 warm-ups + 10 timed runs": (2, 10),
+        "3 warm-ups + 20 timed runs": (3, 20)
+    }
+    _bench_runner: BenchmarkRunner
 
     def __init__(self, container: customtkinter.CTkTabview):
         """
@@ -134,9 +90,7 @@ class MainTab:
         """
         self._reference = container.add("Main")
         self._reference.columnconfigure(0, weight=1)
-        self._preview_image_divider_implementation = self._preview_line_image_sub_divider
-        self._image_divider_implementation = self._line_image_sub_divider
-        self._image_merger_implementation = self._merge_image_lines
+        self._bench_runner = BenchmarkRunner()
 
     def link_bench_tab(self, bench_tab: BenchTab) -> None:
         """
@@ -229,11 +183,22 @@ class MainTab:
                                                              command=self._on_divider_switch_change,
                                                              font=customtkinter.CTkFont(size=18))
         self._image_divider_switch.grid(row=7, column=0, padx=(30, 0), pady=(5, 0), sticky="wne")
-        # Image divider label
-        self._square_division_warning_label = customtkinter.CTkLabel(self._main_container,
-                                                                     text="Workers must be a square number",
-                                                                     font=customtkinter.CTkFont(size=18),
-                                                                     text_color="red")
+        # Shared memory switch
+        self._shared_memory_switch = customtkinter.CTkSwitch(self._main_container,
+                                                             text="Dispatch pickled sub-images",
+                                                             command=self._on_shared_memory_switch_change,
+                                                             font=customtkinter.CTkFont(size=18))
+        self._shared_memory_switch.grid(row=7, column=1, pady=(5, 0), sticky="wne")
+        # Tiles per worker menu
+        self._tiles_per_worker_menu = customtkinter.CTkOptionMenu(self._main_container, width=230,
+                                                                  values=list(self._tiles_per_worker_choices.keys()),
+                                                                  command=self._on_tiles_per_worker_menu_change)
+        self._tiles_per_worker_menu.grid(row=6, column=1, sticky="new", padx=(0, 20))
+        # Timing runs menu
+        self._timing_runs_menu = customtkinter.CTkOptionMenu(self._main_container, width=230,
+                                                             values=list(self._timing_runs_choices.keys()),
+                                                             command=self._on_timing_runs_menu_change)
+        self._timing_runs_menu.grid(row=8, column=1, sticky="new", padx=(0, 20))
         # Algorithm label
         self._algorithm_label = customtkinter.CTkLabel(self._main_container, text=f"Algorithm to use:",
                                                        font=customtkinter.CTkFont(size=18))
@@ -252,6 +217,12 @@ class MainTab:
         self._status_label = customtkinter.CTkLabel(self._main_container, text="Status:",
                                                     font=customtkinter.CTkFont(size=18, weight="bold"))
         self._status_label.grid(row=10, column=0, sticky="nw", padx=(20, 0))
+        # Result cache switch
+        self._result_cache_switch = customtkinter.CTkSwitch(self._main_container,
+                                                            text="Measure the serial baseline",
+                                                            command=self._on_result_cache_switch_change,
+                                                            font=customtkinter.CTkFont(size=18))
+        self._result_cache_switch.grid(row=10, column=1, pady=(5, 0), sticky="wne")
 
         # Start benchmark button
         self._bench_start_btn = customtkinter.CTkButton(self._main_container, text="Start Benchmark", width=200,
@@ -272,13 +243,15 @@ class MainTab:
 
         # Default values
         self._cpu_core_slider.set(1)
+        self._timing_runs_menu.set(next(label for label, timing_runs in self._timing_runs_choices.items()
+                                        if timing_runs == self._timing_runs))
         self._cpu_core_progress_bar.set(0)
         self._bench_progress_bar.start()
         self._on_algorithm_type_menu_change(self._algorithm_type_menu.get())
 
     def _import_image(self) -> None:
         """
-        Import an image to be processed. If the image is not a square, ask the user if they want to resize it.
+        Import an image to be processed.
         :return:
         """
         filepath: str = filedialog.askopenfilename(filetypes=[("Image files", "*.png;*.jpg;*.jpeg")])
@@ -286,22 +259,10 @@ class MainTab:
         if not filepath:
             CTkMessagebox(title=title_text, message="Image loading cancelled.", icon="warning")
             return
-        temp_image: Image.Image = Image.open(filepath)
-        width, height = temp_image.size
-        if width != height:
-            new_size: int = 2 ** (int(math.log2(max(width, height))) + 1)
-            resize_question: CTkMessagebox = CTkMessagebox(title=title_text,
-                                                           message=f"The image MUST be a square. Resize it to {new_size}x{new_size}?\nDeclining will cancel the import.",
-                                                           icon="question", option_1="No", option_2="Yes")
-            if resize_question.get() == "Yes":
-                temp_image = temp_image.resize((new_size, new_size))
-            else:
-                CTkMessagebox(title=title_text, message="Image loading cancelled.", icon="warning")
-                return
-        self._target_image = temp_image
-        self._resized_target_image = self._target_image.copy().resize((512, 512))
+        self._target_image = Image.open(filepath)
+        self._resized_target_image = self._target_image.resize((512, 512))
         self._image_path.configure(text=f"{filepath.split('/')[-1]} ")
-        self._image_size.configure(text=f"{self._target_image.size[0]}x{self._target_image.size[0]} ")
+        self._image_size.configure(text=f"{self._target_image.size[0]}x{self._target_image.size[1]} ")
         self._update_image_preview()
         self._refresh_top_level()
 
@@ -312,118 +273,26 @@ class MainTab:
         """
         if self._target_image is None:
             return
-        self._image_thumbnail = customtkinter.CTkImage(light_image=self._preview_image_divider_implementation(),
+        self._image_thumbnail = customtkinter.CTkImage(light_image=self._preview_image_sub_divider(),
                                                        size=(512, 512))
         self._image_viewer.configure(image=self._image_thumbnail)
 
-    def _preview_line_image_sub_divider(self) -> Image.Image:
+    def _preview_image_sub_divider(self) -> Image.Image:
         """
-        Preview the image divider using lines.
-        :return: A preview of the image divider using lines.
+        Preview the image divider, drawing the planned tiles over the resized image.
+        :return: A preview of the image divider.
         """
         tmp_image: Image.Image = self._resized_target_image.copy()
         if self._target_cpu_core_set == 1:
             return tmp_image
-        line_width = 512 // self._target_cpu_core_set
-        draw = ImageDraw.Draw(tmp_image)
-        for i in range(1, self._target_cpu_core_set):
-            left = i * line_width
-            draw.line((left, 0, left, 512), fill=(255, 0, 0), width=2)
-        return tmp_image
-
-    def _line_image_sub_divider(self) -> list[Image.Image]:
-        """
-        Divide the image using lines.
-        :return: A list of the lines that the image is divided into.
-        """
-        tmp_image: Image.Image = self._target_image.copy()
-        if self._target_cpu_core_set == 1:
-            return [tmp_image]
-        sub_images: list[Image.Image] = []
-        line_width = tmp_image.width // self._target_cpu_core_set
-        for i in range(self._target_cpu_core_set):
-            left = i * line_width
-            right = left + line_width
-            sub_images.append(tmp_image.crop((left, 0, right, tmp_image.height)))
-        return sub_images
-
-    def _merge_image_lines(self, lines: list[Image.Image]) -> Image.Image:
-        """
-        Merge the lines of an image into one image.
-        :param lines: The lines to merge.
-        :return: The merged image.
-        """
-        if len(lines) == 1:
-            return lines[0]
-        tmp_image = Image.new("RGBA", self._target_image.size)
-        line_width = tmp_image.width // self._target_cpu_core_set
-        for i in range(self._target_cpu_core_set):
-            left = i * line_width
-            right = left + line_width
-            tmp_image.paste(lines[i], (left, 0, right, tmp_image.height))
-        return tmp_image
-
-    def _preview_square_image_sub_divider(self) -> Image.Image:
-        """
-        Preview the image divider using squares.
-        :return: The preview of the image divider using squares.
-        """
-        tmp_image: Image.Image = self._resized_target_image.copy()
+        width_ratio: float = 512 / self._target_image.width
+        height_ratio: float = 512 / self._target_image.height
         draw = ImageDraw.Draw(tmp_image)
-        if self._is_square_doable() is False:
-            draw.text((100, 225), "ERROR:\nThe number of CPU cores must \nbe a square number.", fill=(255, 0, 0),
-                      stroke_fill=(0, 0, 0), stroke_width=3, font=ImageFont.truetype("arial.ttf", 22))
-        else:
-            num_parts: int = int(self._target_cpu_core_set ** 0.5)
-            square_size: int = 512 // num_parts
-            for row in range(num_parts):
-                for column in range(num_parts):
-                    x_start: int = column * square_size
-                    y_start: int = row * square_size
-                    x_end: int = x_start + square_size
-                    y_end: int = y_start + square_size
-                    draw.rectangle((x_start, y_start, x_end, y_end), outline=(255, 0, 0), width=2)
-        return tmp_image
-
-    def _square_image_sub_divider(self) -> list[Image.Image]:
-        """
-        Divide the image using squares.
-        :return: A list of the squares that the image is divided into.
-        """
-        tmp_image: Image.Image = self._target_image.copy()
-        if self._target_cpu_core_set == 1:
-            return [tmp_image]
-        else:
-            num_parts: int = int(self._target_cpu_core_set ** 0.5)
-            square_size: int = tmp_image.width // num_parts
-            sub_images: list[Image.Image] = []
-            for row in range(num_parts):
-                for column in range(num_parts):
-                    x_start: int = column * square_size
-                    y_start: int = row * square_size
-                    x_end: int = x_start + square_size
-                    y_end: int = y_start + square_size
-                    sub_images.append(tmp_image.crop((x_start, y_start, x_end, y_end)))
-        return sub_images
-
-    def _merge_image_squares(self, squares: list[Image.Image]) -> Image.Image:
-        """
-        Merge the squares of an image into one image.
-        :param squares: The squares to merge.
-        :return: The merged image.
-        """
-        if len(squares) == 1:
-            return squares[0]
-        tmp_image = Image.new("RGBA", self._target_image.size)
-        square_size: int = squares[0].width
-        iterator: int = int(len(squares) ** 0.5)
-        for row in range(iterator):
-            for column in range(iterator):
-                x_start: int = column * square_size
-                y_start: int = row * square_size
-                x_end: int = x_start + square_size
-                y_end: int = y_start + square_size
-                tmp_image.paste(squares[row * iterator + column], (x_start, y_start, x_end, y_end))
+        for left, upper, right, lower in tiling.plan_tiles(self._target_image.width, self._target_image.height,
+                                                           self._target_cpu_core_set * self._tiles_per_worker,
+                                                           self._division_mode):
+            draw.rectangle((int(left * width_ratio), int(upper * height_ratio), int(right * width_ratio),
+                            int(lower * height_ratio)), outline=(255, 0, 0), width=2)
         return tmp_image
 
     def _refresh_top_level(self) -> None:
@@ -488,26 +357,65 @@ class MainTab:
 
     def _on_divider_switch_change(self) -> None:
         """
-        Called when the image divider switch is changed. Updates the switch text, implementation references and
-        refreshes the preview.
+        Called when the image divider switch is changed. Updates the switch text, the division mode and refreshes the
+        preview.
         :return:
         """
-        self._is_square_dividing = bool(self._image_divider_switch.get())
-        if self._is_square_dividing:
-            self._image_divider_switch.configure(text="Divide image using squares")
-            self._preview_image_divider_implementation = self._preview_square_image_sub_divider
-            self._image_divider_implementation = self._square_image_sub_divider
-            self._image_merger_implementation = self._merge_image_squares
-            self._square_division_warning_label.grid(row=7, column=1, columnspan=2, sticky="wn")
-
+        if self._image_divider_switch.get():
+            self._division_mode = tiling.division_modes[1]
+            self._image_divider_switch.configure(text="Divide image using a grid")
         else:
+            self._division_mode = tiling.division_modes[0]
             self._image_divider_switch.configure(text="Divide image using lines")
-            self._preview_image_divider_implementation = self._preview_line_image_sub_divider
-            self._image_divider_implementation = self._line_image_sub_divider
-            self._image_merger_implementation = self._merge_image_lines
-            self._square_division_warning_label.grid_forget()
         self._update_image_preview()
 
+    def _on_shared_memory_switch_change(self) -> None:
+        """
+        Called when the shared memory switch is changed. Updates the switch text and the dispatch mode.
+        :return:
+        """
+        self._use_shared_memory = bool(self._shared_memory_switch.get())
+        if self._use_shared_memory:
+            self._shared_memory_switch.configure(text="Dispatch tiles through shared memory")
+        else:
+            self._shared_memory_switch.configure(text="Dispatch pickled sub-images")
+
+    def _on_result_cache_switch_change(self) -> None:
+        """
+        Called when the result cache switch is changed. Updates the switch text and whether the serial baseline is
+        reused from the result cache. The parallel configurations are always measured.
+        :return:
+        """
+        if not self._result_cache_switch.get():
+            self._bench_runner.set_result_cache(None)
+            self._result_cache_switch.configure(text="Measure the serial baseline")
+            return
+        try:
+            self._bench_runner.set_result_cache(ResultCache())
+        except PermissionError as error:
+            self._result_cache_switch.deselect()
+            CTkMessagebox(title="Result cache", message=str(error), icon="cancel")
+            return
+        self._result_cache_switch.configure(text="Reuse the cached serial baseline")
+
+    def _on_tiles_per_worker_menu_change(self, value: str) -> None:
+        """
+        Called when the tiles per worker menu is changed. Updates the over-decomposition factor and refreshes the
+        preview.
+        :param value: The new value of the tiles per worker menu.
+        :return:
+        """
+        self._tiles_per_worker = self._tiles_per_worker_choices[value]
+        self._update_image_preview()
+
+    def _on_timing_runs_menu_change(self, value: str) -> None:
+        """
+        Called when the timing runs menu is changed. Updates the warm-up and timed runs of every configuration.
+        :param value: The new value of the timing runs menu.
+        :return:
+        """
+        self._timing_runs = self._timing_runs_choices[value]
+
     def _toggle_controls(self) -> None:
         """
         Toggles the controls of the tab.
@@ -517,6 +425,10 @@ class MainTab:
         self._bench_start_btn.configure(state=toggled)
         self._load_image_btn.configure(state=toggled)
         self._image_divider_switch.configure(state=toggled)
+        self._shared_memory_switch.configure(state=toggled)
+        self._result_cache_switch.configure(state=toggled)
+        self._tiles_per_worker_menu.configure(state=toggled)
+        self._timing_runs_menu.configure(state=toggled)
         self._bench_all_checkbox.configure(state=toggled)
         if not self._bench_all_configurations:
             self._cpu_core_slider.configure(state=toggled)
@@ -529,13 +441,6 @@ class MainTab:
             self._bench_interrupt_btn.configure(state="normal")
             self._bench_progress_bar.grid(row=12, column=2, sticky="e", padx=(0, 20))
 
-    def _is_square_doable(self) -> bool:
-        """
-        Returns whether the square division is doable or not.
-        :return: A boolean value indicating whether the square division is doable or not.
-        """
-        return (self._target_cpu_core_set ** 0.5).is_integer()
-
     def _on_algorithm_type_menu_change(self, value: str) -> None:
         """
         Called when the algorithm type menu is changed.
@@ -557,18 +462,7 @@ class MainTab:
         Configures the algorithm sub type menu.
         :return:
         """
-        if self._selected_algorithm_type in [convolution.name_native, convolution.name_lib]:
-            values = list(convolution.convolution_kernels.keys())
-            for parameterized_kernel in convolution.parameterized_kernel_list:
-                if parameterized_kernel not in values:
-                    values.append(parameterized_kernel)
-        elif self._selected_algorithm_type == morphological_operators.name:
-            values = morphological_operators.morphological_sub_types
-        elif self._selected_algorithm_type == noise_reduction.name:
-            values = noise_reduction.noise_reduction_sub_types
-        else:
-            raise NotImplementedError(f"Algorithm type {self._selected_algorithm_type} has not sub types "
-                                      f"implemented yet.")
+        values: list[str] = runners.get_sub_types(self._selected_algorithm_type)
         self._algorithm_sub_type_menu.configure(values=values)
         self._algorithm_sub_type_menu.grid(row=9, column=1, sticky="new", padx=(0, 20))
         self._algorithm_sub_type_menu.set(values[0])
@@ -590,62 +484,22 @@ class MainTab:
         Checks and updates the algorithm parameters.
         :return:
         """
-        self._selected_algorithm_params = {}
-        if self._selected_algorithm_type == canny.name:
-            self._selected_algorithm_params = {
-                "gauss_size": {"value": 3, "type": int},
-                "sigma": {"value": 1, "type": float},
-                "low_threshold": {"value": 20, "type": int},
-                "high_threshold": {"value": 40, "type": int}
-            }
-        elif self._selected_algorithm_sub_type in morphological_operators.morphological_sub_types:
-            self._selected_algorithm_params = {
-                "structural_element": {"value": "square", "type": str,
-                                       "choices": list(morphological_operators.structural_elements.keys())},
-            }
-        elif self._selected_algorithm_sub_type == noise_reduction.noise_reduction_sub_types[0]:
-            self._selected_algorithm_params = {"kernel_size": {"value": 3, "type": int}}
-        elif self._selected_algorithm_sub_type == noise_reduction.noise_reduction_sub_types[1]:
-            self._selected_algorithm_params = {
-                "diameter": {"value": 5, "type": int},
-                "sigma_color": {"value": 10, "type": int},
-                "sigma_space": {"value": 15, "type": int}
-            }
-        elif self._selected_algorithm_sub_type == convolution.parameterized_kernel_list[0]:
-            self._selected_algorithm_params = {
-                "kernel_size": {"value": 3, "type": int},
-                "sigma": {"value": 1, "type": int}
-            }
-        if not self._selected_algorithm_params:
-            return
+        self._selected_algorithm_params = runners.get_default_parameters(self._selected_algorithm_type,
+                                                                         self._selected_algorithm_sub_type)
         for param in self._selected_algorithm_params.keys():
-            user_input_failed: bool = False
             text: str = f"Insert the value for '{param}' parameter.\nDefault value is {self._selected_algorithm_params[param]['value']}"
             if "choices" in self._selected_algorithm_params[param]:
                 text += f"\nAvailable choices are: {self._selected_algorithm_params[param]['choices']}"
             user_input: str = customtkinter.CTkInputDialog(text=text,
                                                            title=f"Algorithms Parameters").get_input()
-            param_type = self._selected_algorithm_params[param]["type"]
-            if param_type == str:
-                if user_input not in self._selected_algorithm_params[param]["choices"]:
-                    user_input_failed = True
-                else:
-                    self._selected_algorithm_params[param]["value"] = user_input
-            else:
-                if not user_input.isdecimal() or int(user_input) <= 0:
-                    user_input_failed = True
-                else:
-                    self._selected_algorithm_params[param]["value"] = param_type(user_input)
-            if user_input_failed:
+            value = runners.parse_parameter(self._selected_algorithm_params[param], user_input)
+            if value is None:
                 CTkMessagebox(title="Invalid input",
                               message=f"The value {user_input} is not a valid parameter for '{param}'.\n"
                                       f"Fallback to default value: {self._selected_algorithm_params[param]['value']}",
                               icon="warning")
-        if self._selected_algorithm_sub_type == convolution.parameterized_kernel_list[0]:
-            convolution.convolution_kernels[self._selected_algorithm_sub_type] = convolution.generate_gauss_kernel(
-                self._selected_algorithm_params["kernel_size"]["value"],
-                self._selected_algorithm_params["sigma"]["value"]
-            )
+            else:
+                self._selected_algorithm_params[param]["value"] = value
 
     def _get_bench_configuration_sets(self) -> list[int]:
         """
@@ -656,11 +510,7 @@ class MainTab:
         if not self._bench_all_configurations:
             result.append(self._target_cpu_core_set)
         else:
-            if not self._is_square_dividing:
-                result += range(2, self._available_cpu_core + 1)
-            else:
-                upper_bound: int = int(math.sqrt(self._available_cpu_core))
-                result += [i * i for i in range(2, upper_bound + 1)]
+            result += range(2, self._available_cpu_core + 1)
         return sorted(set(result))
 
     def _on_start_bench_btn(self) -> None:
@@ -672,10 +522,6 @@ class MainTab:
             CTkMessagebox(title="No image selected", message="Please select an image and then run the benchmark.",
                           icon="warning")
             return
-        if self._is_square_dividing and not self._is_square_doable():
-            CTkMessagebox(title="Invalid settings", message="To perform a square division the image must be square.",
-                          icon="warning")
-            return
         self._toggle_controls()
         t = threading.Thread(target=self._bench_dispatch)
         t.start()
@@ -685,82 +531,42 @@ class MainTab:
         Called when the interrupt benchmark button is pressed. Stops the benchmark.
         :return:
         """
-        if self._bench_interrupt_signal:
-            return
-        self._bench_interrupt_signal = True
+        self._bench_runner.interrupt()
+
+    def _get_benchmark_settings(self) -> BenchmarkSettings:
+        """
+        Returns the benchmark settings selected in the tab.
+        :return: The benchmark settings.
+        """
+        return BenchmarkSettings(self._selected_algorithm_type, self._selected_algorithm_sub_type,
+                                 {param: description["value"]
+                                  for param, description in self._selected_algorithm_params.items()},
+                                 self._get_bench_configuration_sets(), self._division_mode,
+                                 self._use_shared_memory, self._tiles_per_worker, *self._timing_runs)
 
     def _bench_dispatch(self) -> None:
-        result_timestamps: dict[str, float] = {}
-        bench_config_sets: list[int] = self._get_bench_configuration_sets()
-        result_image: Image.Image | None = None
-        algorithm: str = self._selected_algorithm_sub_type if self._selected_algorithm_sub_type else self._selected_algorithm_type
-        if algorithm in self._specialized_runners:
-            benchmark: callable = self._specialized_runners[algorithm]
-        else:
-            benchmark: callable = generic_benchmark
-        msgbox_text: str = "Benchmark completed successfully.\nLook at benchmark tab for results.\n"
-        msgbox_icon: str = "check"
-        for index, cpu_set in enumerate(bench_config_sets):
-            self._status_text.configure(text=f"Running benchmark with {cpu_set} CPU core(s)...")
-            self._target_cpu_core_set = cpu_set
-            self._latest_bench_pool = Pool(cpu_set)
-            args = self._generate_pickle_args_package(algorithm)
-            start_time = time.time()
-            async_handler = self._latest_bench_pool.starmap_async(benchmark, args)
-            self._latest_bench_pool.close()
-            while True:
-                if self._bench_interrupt_signal:
-                    self._latest_bench_pool.terminate()
-                    break
-                elif async_handler.ready():
-                    break
-                else:
-                    time.sleep(0.05)
-            if self._bench_interrupt_signal:
-                break
-            end_time = time.time()
-            result_timestamps["Serial" if cpu_set == 1 else f"P ({cpu_set})"] = end_time - start_time
-            if index == len(bench_config_sets) - 1:
-                result_image = self._image_merger_implementation([img for img in async_handler.get()])
-        if self._bench_interrupt_signal:
-            self._bench_interrupt_signal = False
-            msgbox_text = "Benchmark interrupted."
-            msgbox_icon = "warning"
-        else:
-            self._benchmark_tab.update_bench_view(result_image, result_timestamps)
-        self._toggle_controls()
+        """
+        Runs the benchmark in the background thread and reports the results to the Bench tab.
+        :return:
+        """
+        msgbox_text: str = "Benchmark interrupted."
+        msgbox_icon: str = "warning"
+        try:
+            report: BenchmarkReport | None = self._bench_runner.run(
+                self._target_image, self._get_benchmark_settings(),
+                lambda text: self._status_text.configure(text=text))
+            if report is not None:
+                msgbox_text = "Benchmark completed successfully.\nLook at benchmark tab for results.\n"
+                msgbox_icon = "check"
+                self._benchmark_tab.update_bench_view(report.result_image, report.timestamps, report.details,
+                                                      report.statistics, report.phases, report.cached)
+        except Exception as error:
+            # The warm pool may still run the failed tasks, the next benchmark starts a fresh one
+            self._bench_runner.shutdown()
+            msgbox_text = f"Benchmark failed.\n{type(error).__name__}: {error}"
+            msgbox_icon = "cancel"
+        finally:
+            self._toggle_controls()
         CTkMessagebox(title="Benchmark", message=msgbox_text,
                       icon=msgbox_icon)
         self._status_text.configure(text=msgbox_text.split(".")[0])
-
-    def _generate_pickle_args_package(self, algorithm: str) -> list[tuple]:
-        """
-        Generates the arguments package for the benchmark function.
-        :param algorithm: The algorithm to be benchmarked.
-        :return: The arguments package for the benchmark function.
-        """
-        sub_images: list[Image.Image] = self._image_divider_implementation()
-        if algorithm not in self._specialized_runners:
-            return [(sub_image, self._selected_algorithm_type, self._selected_algorithm_sub_type) for sub_image in
-                    sub_images]
-        elif algorithm == noise_reduction.noise_reduction_sub_types[0]:
-            return [(sub_image, self._selected_algorithm_sub_type, self._selected_algorithm_params[
-                "kernel_size"]["value"]) for sub_image in sub_images]
-        elif algorithm == noise_reduction.noise_reduction_sub_types[1]:
-            return [(sub_image, self._selected_algorithm_sub_type, self._selected_algorithm_params[
-                "diameter"]["value"], self._selected_algorithm_params["sigma_color"]["value"],
-                     self._selected_algorithm_params["sigma_space"]["value"]) for sub_image in sub_images]
-        elif algorithm == canny.name:
-            return [(sub_image, self._selected_algorithm_type, self._selected_algorithm_params[
-                "gauss_size"]["value"], self._selected_algorithm_params["sigma"]["value"],
-                     self._selected_algorithm_params["low_threshold"]["value"],
-                     self._selected_algorithm_params["high_threshold"]["value"]) for sub_image in sub_images]
-        elif algorithm == convolution.parameterized_kernel_list[0]:
-            return [(sub_image, self._selected_algorithm_type,
-                     convolution.convolution_kernels[self._selected_algorithm_sub_type])
-                    for sub_image in sub_images]
-        elif algorithm in morphological_operators.morphological_sub_types:
-            return [(sub_image, self._selected_algorithm_type, self._selected_algorithm_sub_type,
-                     morphological_operators.structural_elements[self._selected_algorithm_params["structural_element"]["value"]]) for sub_image in sub_images]
-        else:
-            raise NotImplementedError("This algorithm has not pickle arguments implemented yet.")